@@ -0,0 +1,97 @@
+# coding: utf-8
+
+import sys
+import time
+
+from pycti import OpenCTIApiClient
+from pycti.utils.opencti_stix2 import OpenCTIStix2
+
+# Numbers of exported indicators
+counts = [int(arg) for arg in sys.argv[1:]] or [12500, 25000, 50000, 100000]
+
+
+def indicator(index):
+    # 100 authors and one marking shared by all the indicators
+    author = str(index % 100)
+    return {
+        "id": "opencti-indicator-" + str(index),
+        "standard_id": "indicator--" + str(index),
+        "entity_type": "Indicator",
+        "parent_types": ["Stix-Domain-Object"],
+        "name": "Indicator " + str(index),
+        "pattern": "[ipv4-addr:value = '10.0.0." + str(index % 256) + "']",
+        "createdBy": {
+            "id": "opencti-identity-" + author,
+            "standard_id": "identity--" + author,
+            "entity_type": "Organization",
+            "parent_types": ["Identity"],
+            "name": "Author " + author,
+        },
+        "createdById": "opencti-identity-" + author,
+        "objectMarking": [
+            {
+                "standard_id": "marking-definition--tlp-white",
+                "definition_type": "TLP",
+                "definition": "TLP:WHITE",
+            }
+        ],
+        "objectMarkingIds": ["opencti-marking"],
+    }
+
+
+class Lister:
+    def __init__(self, count):
+        self.count = count
+
+    def list(self, **kwargs):
+        return (indicator(index) for index in range(self.count))
+
+
+class BenchmarkClient(OpenCTIApiClient):
+    """Lists generated indicators without a server"""
+
+    def __init__(self, count):
+        self.indicator = Lister(count)
+
+    def __getattr__(self, name):
+        return Lister(0)
+
+    def log(self, level, message):
+        pass
+
+
+def legacy_export_list(stix2, count):
+    """The previous assembly, with a list of ids and concatenated results"""
+
+    uuids = []
+    objects = []
+    for entity in Lister(count).list():
+        entity_bundle = stix2.prepare_export(stix2.generate_export(entity), "simple")
+        entity_bundle_filtered = stix2.filter_objects(uuids, entity_bundle)
+        for x in entity_bundle_filtered:
+            uuids.append(x["id"])
+        objects = objects + entity_bundle_filtered
+    return objects
+
+
+for count in counts:
+    stix2 = OpenCTIStix2(BenchmarkClient(count))
+    start = time.perf_counter()
+    objects = stix2.export_list("Indicator")["objects"]
+    duration = time.perf_counter() - start
+    print(
+        "export_list, %d indicators: %.2f s, %.1f us per indicator (%d objects)"
+        % (count, duration, duration / count * 1000000, len(objects))
+    )
+    # The legacy assembly is quadratic, only run it on the small exports
+    if count <= 25000:
+        start = time.perf_counter()
+        legacy_objects = legacy_export_list(stix2, count)
+        duration = time.perf_counter() - start
+        assert [item["id"] for item in legacy_objects] == [
+            item["id"] for item in objects
+        ]
+        print(
+            "legacy, %d indicators: %.2f s, %.1f us per indicator"
+            % (count, duration, duration / count * 1000000)
+        )
@@ -0,0 +1,114 @@
+# coding: utf-8
+
+import sys
+import time
+import tracemalloc
+
+from pycti import OpenCTIStix2Splitter
+
+# Number of objects of the synthetic bundle
+count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+
+
+class RecursiveStix2Splitter:
+    """The previous, recursive, implementation"""
+
+    def __init__(self):
+        self.cache_index = {}
+        self.elements = []
+
+    def enlist_element(self, item_id, raw_data):
+        nb_deps = 1
+        if item_id not in raw_data:
+            return 0
+        existing_item = self.cache_index.get(item_id)
+        if existing_item is not None:
+            return existing_item["nb_deps"]
+        item = raw_data[item_id]
+        for key, value in item.items():
+            if key.endswith("_refs"):
+                for element_ref in item[key]:
+                    nb_deps += self.enlist_element(element_ref, raw_data)
+            elif key.endswith("_ref"):
+                is_created_by_ref = key == "created_by_ref"
+                if is_created_by_ref:
+                    is_marking = item["id"].startswith("marking-definition--")
+                    if is_marking is False:
+                        nb_deps += self.enlist_element(value, raw_data)
+                else:
+                    nb_deps += self.enlist_element(value, raw_data)
+        item["nb_deps"] = nb_deps
+        self.elements.append(item)
+        self.cache_index[item_id] = item
+        return nb_deps
+
+    def split_bundle(self, bundle, use_json=True, event_version=None):
+        raw_data = {}
+        for item in bundle["objects"]:
+            raw_data[item["id"]] = item
+        for item in bundle["objects"]:
+            self.enlist_element(item["id"], raw_data)
+        bundles = []
+        self.elements.sort(key=lambda elem: elem["nb_deps"])
+        for entity in self.elements:
+            bundles.append(
+                OpenCTIStix2Splitter.stix2_create_bundle(
+                    [entity], use_json, event_version
+                )
+            )
+        return bundles
+
+
+def synthetic_bundle():
+    # An author, a marking, indicators and relationships between them
+    objects = [
+        {"id": "identity--0", "type": "identity", "name": "Author"},
+        {
+            "id": "marking-definition--0",
+            "type": "marking-definition",
+            "created_by_ref": "identity--0",
+        },
+    ]
+    indicators = count // 2
+    for index in range(indicators):
+        objects.append(
+            {
+                "id": "indicator--" + str(index),
+                "type": "indicator",
+                "created_by_ref": "identity--0",
+                "object_marking_refs": ["marking-definition--0"],
+            }
+        )
+    for index in range(count - indicators - 2):
+        objects.append(
+            {
+                "id": "relationship--" + str(index),
+                "type": "relationship",
+                "source_ref": "indicator--" + str(index % indicators),
+                "target_ref": "indicator--" + str((index * 7 + 1) % indicators),
+                "created_by_ref": "identity--0",
+            }
+        )
+    return {"type": "bundle", "id": "bundle--0", "objects": objects}
+
+
+def run(splitter_class):
+    # Timed without tracing, tracemalloc slows down each allocation
+    bundle = synthetic_bundle()
+    start = time.perf_counter()
+    splitter_class().split_bundle(bundle, False)
+    duration = time.perf_counter() - start
+    bundle = synthetic_bundle()
+    tracemalloc.start()
+    splitter_class().split_bundle(bundle, False)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(
+        "%s: %.1f s, peak memory %.1f MB"
+        % (splitter_class.__name__, duration, peak / 1024 / 1024)
+    )
+
+
+# Split the synthetic bundle with both implementations
+run(RecursiveStix2Splitter)
+run(OpenCTIStix2Splitter)
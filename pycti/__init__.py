@@ -2,6 +2,7 @@
 __version__ = "5.2.5"
 
 from .api.opencti_api_client import OpenCTIApiClient
+from .api.opencti_api_client_async import AsyncOpenCTIApiClient
 from .api.opencti_api_connector import OpenCTIApiConnector
 from .api.opencti_api_work import OpenCTIApiWork
 from .connector.opencti_connector import ConnectorType, OpenCTIConnector
@@ -42,11 +43,16 @@ from .entities.opencti_tool import Tool
 from .entities.opencti_vulnerability import Vulnerability
 from .utils.constants import StixCyberObservableTypes, StixMetaTypes
 from .utils.opencti_stix2 import OpenCTIStix2
+from .utils.opencti_stix2_cache import OpenCTIStix2MemoryCache, OpenCTIStix2SqliteCache
+from .utils.opencti_stix2_export import OpenCTIStix2ExportIndex
+from .utils.opencti_stix2_scheduler import OpenCTIStix2Scheduler
 from .utils.opencti_stix2_splitter import OpenCTIStix2Splitter
+from .utils.opencti_stix2_stream import OpenCTIStix2BundleIndex
 from .utils.opencti_stix2_update import OpenCTIStix2Update
 from .utils.opencti_stix2_utils import OpenCTIStix2Utils, SimpleObservable
 
 __all__ = [
+    "AsyncOpenCTIApiClient",
     "AttackPattern",
     "Campaign",
     "ConnectorType",
@@ -70,6 +76,11 @@ __all__ = [
     "OpenCTIConnector",
     "OpenCTIConnectorHelper",
     "OpenCTIStix2",
+    "OpenCTIStix2BundleIndex",
+    "OpenCTIStix2ExportIndex",
+    "OpenCTIStix2MemoryCache",
+    "OpenCTIStix2Scheduler",
+    "OpenCTIStix2SqliteCache",
     "OpenCTIStix2Splitter",
     "OpenCTIStix2Update",
     "OpenCTIStix2Utils",
@@ -0,0 +1,525 @@
+# coding: utf-8
+import contextvars
+import functools
+import json
+import logging
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from pycti.utils.opencti_graphql import (
+    NAME,
+    VARIABLE,
+    read_name,
+    skip_block,
+    skip_ignored,
+)
+
+_current_batch = contextvars.ContextVar("opencti_current_batch", default=None)
+
+
+@functools.lru_cache(maxsize=512)
+def parse_operation(query):
+    """split a single GraphQL operation into its mergeable parts
+
+    :param query: GraphQL document containing exactly one operation
+    :type query: str
+    :raises ValueError: if the document cannot be merged with others
+    :return: the operation type, the variable definitions, the declared variable
+        names and the list of `(response key, field)` root selections
+    :rtype: tuple
+    """
+
+    index = skip_ignored(query, 0)
+    if query.startswith("{", index):
+        operation_type = "query"
+    else:
+        operation_type, index = read_name(query, index)
+        if operation_type not in ["query", "mutation"]:
+            raise ValueError("Unsupported operation type: " + operation_type)
+        index = skip_ignored(query, index)
+        if NAME.match(query, index):
+            _, index = read_name(query, index)
+            index = skip_ignored(query, index)
+    variable_definitions = ""
+    if query.startswith("(", index):
+        end = skip_block(query, index)
+        variable_definitions = query[index + 1 : end - 1].strip()
+        index = skip_ignored(query, end)
+    if not query.startswith("{", index):
+        raise ValueError("Missing selection set in GraphQL operation")
+    end = skip_block(query, index)
+    if skip_ignored(query, end) != len(query):
+        raise ValueError("Only single operation documents can be merged")
+    selection = query[index + 1 : end - 1]
+
+    fields = []
+    index = skip_ignored(selection, 0)
+    while index < len(selection):
+        if selection.startswith("...", index):
+            raise ValueError("Root fragments cannot be merged")
+        start = index
+        key, index = read_name(selection, index)
+        index = skip_ignored(selection, index)
+        if selection.startswith(":", index):
+            # Already aliased, keep the alias as response key
+            start = skip_ignored(selection, index + 1)
+            _, index = read_name(selection, start)
+            index = skip_ignored(selection, index)
+        if selection.startswith("(", index):
+            index = skip_ignored(selection, skip_block(selection, index))
+        while selection.startswith("@", index):
+            _, index = read_name(selection, index + 1)
+            index = skip_ignored(selection, index)
+            if selection.startswith("(", index):
+                index = skip_ignored(selection, skip_block(selection, index))
+        if selection.startswith("{", index):
+            index = skip_block(selection, index)
+        fields.append((key, selection[start:index].strip()))
+        index = skip_ignored(selection, index)
+    if len(fields) == 0:
+        raise ValueError("Empty selection set in GraphQL operation")
+    declared = tuple(
+        match.group(1)
+        for match in VARIABLE.finditer(variable_definitions)
+        if match.group(1) is not None
+    )
+    return operation_type, variable_definitions, declared, tuple(fields)
+
+
+def _prefix_variables(text, prefix):
+    return VARIABLE.sub(
+        lambda match: "$" + prefix + match.group(1)
+        if match.group(1) is not None
+        else match.group(0),
+        text,
+    )
+
+
+def merge_operations(operations):
+    """merge several operations of the same type into one aliased document
+
+    Every operation gets a distinct prefix (`b0_`, `b1_`...) applied to its
+    variables and root fields so they can be executed in a single request.
+
+    :param operations: list of `(query, variables)` tuples
+    :type operations: list
+    :raises ValueError: if an operation cannot be merged
+    :return: the merged document, its variables and for each operation the list
+        of `(alias, response key)` tuples needed to split the response
+    :rtype: tuple
+    """
+
+    merged_type = None
+    definitions = []
+    selections = []
+    merged_variables = {}
+    aliases = []
+    for index, (query, variables) in enumerate(operations):
+        operation_type, variable_definitions, declared, fields = parse_operation(query)
+        if merged_type is not None and operation_type != merged_type:
+            raise ValueError("Queries and mutations cannot be merged together")
+        merged_type = operation_type
+        prefix = "b" + str(index) + "_"
+        if len(variable_definitions) > 0:
+            definitions.append(_prefix_variables(variable_definitions, prefix))
+        for name in declared:
+            if variables is not None and name in variables:
+                merged_variables[prefix + name] = variables[name]
+        operation_aliases = []
+        for key, field in fields:
+            selections.append(prefix + key + ": " + _prefix_variables(field, prefix))
+            operation_aliases.append((prefix + key, key))
+        aliases.append(operation_aliases)
+    document = merged_type + " Batch"
+    if len(definitions) > 0:
+        document += "(" + ", ".join(definitions) + ")"
+    document += " {\n" + "\n".join(selections) + "\n}"
+    return document, merged_variables, aliases
+
+
+class _Operation:
+    def __init__(self, query, variables, operation_type, size, blocking, context):
+        self.query = query
+        self.variables = variables
+        self.operation_type = operation_type
+        self.size = size
+        self.blocking = blocking
+        # Request context of the caller, the operation is sent from another thread
+        self.context = context
+        self.future = Future()
+
+
+class OpenCTIApiBatch:
+    """Batched execution of GraphQL operations
+
+    Queued operations are merged into aliased GraphQL documents so that many
+    of them are sent in a single HTTP round trip. Results are fanned back to
+    one future per operation.
+
+    Usage::
+
+        with api.batch(max_operations=100) as batch:
+            futures = [
+                batch.submit(api.label.create, value=label) for label in labels
+            ]
+        labels_ids = [future.result()["id"] for future in futures]
+
+    Functions run with :py:meth:`submit` are executed on a thread pool and every
+    `OpenCTIApiClient.query` they issue is routed through the batch. Raw
+    operations can also be queued with :py:meth:`query`. Only the operations
+    queued with the same request context (applicant, retry number, work) are
+    merged together.
+
+    :param api: instance of :py:class:`~pycti.api.opencti_api_client.OpenCTIApiClient`
+    :param max_operations: maximum number of operations per request, defaults to 50
+    :type max_operations: int, optional
+    :param max_bytes: maximum estimated size of a request, defaults to 1 MiB
+    :type max_bytes: int, optional
+    :param max_workers: number of threads running submitted functions, defaults to 16
+    :type max_workers: int, optional
+    :param linger: seconds to wait for more operations before sending, defaults to 0.01
+    :type linger: float, optional
+    """
+
+    def __init__(
+        self,
+        api,
+        max_operations=50,
+        max_bytes=1024 * 1024,
+        max_workers=16,
+        linger=0.01,
+    ):
+        if max_operations < 1:
+            raise ValueError("max_operations must be greater than 0")
+        self.api = api
+        self.max_operations = max_operations
+        self.max_bytes = max_bytes
+        self.max_workers = max_workers
+        self.linger = linger
+        self.requests_count = 0
+        self.operations_count = 0
+        self._pending = []
+        self._pending_since = None
+        self._waiting = 0
+        self._running = 0
+        self._flush_requested = False
+        self._closed = False
+        self._condition = threading.Condition()
+        self._executor = None
+        self._dispatcher = None
+
+    @staticmethod
+    def current():
+        """get the batch the calling context is bound to
+
+        :return: the current batch or None
+        :rtype: OpenCTIApiBatch
+        """
+
+        return _current_batch.get()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def accepts(self, query, variables):
+        """check if an operation can be merged in a batch
+
+        Operations uploading files and documents that cannot be parsed are
+        executed directly.
+
+        :param query: GraphQL query string
+        :type query: str
+        :param variables: GraphQL query variables
+        :type variables: dict
+        :rtype: bool
+        """
+
+        if variables is not None and any(
+            self.api.is_file_variable(value) for value in variables.values()
+        ):
+            return False
+        try:
+            parse_operation(query)
+        except ValueError:
+            return False
+        return True
+
+    def query(self, query, variables=None, blocking=False):
+        """queue a GraphQL operation
+
+        :param query: GraphQL query string
+        :type query: str
+        :param variables: GraphQL query variables, defaults to None
+        :type variables: dict, optional
+        :param blocking: whether the caller waits for the result right away
+        :type blocking: bool, optional
+        :return: a future resolving to the response json content
+        :rtype: concurrent.futures.Future
+        """
+
+        operation = self._operation(query, variables, blocking)
+        if isinstance(operation, Future):
+            return operation
+        with self._condition:
+            if self._closed:
+                raise ValueError("The batch is closed")
+            self._start_dispatcher()
+            # Back-pressure when operations are queued faster than sent
+            while len(self._pending) >= 2 * self.max_operations:
+                self._condition.wait()
+            self._enqueue([operation])
+        return operation.future
+
+    def query_many(self, operations):
+        """queue GraphQL operations together and send them right away
+
+        The operations are queued at once, they are merged in the same
+        requests whatever the time taken to queue them.
+
+        :param operations: list of `(query, variables)` tuples
+        :type operations: list
+        :return: futures resolving to the response json content of the
+            operations, in order
+        :rtype: list
+        """
+
+        queued = [
+            self._operation(query, variables, False) for query, variables in operations
+        ]
+        with self._condition:
+            if self._closed:
+                raise ValueError("The batch is closed")
+            self._start_dispatcher()
+            self._enqueue([o for o in queued if isinstance(o, _Operation)])
+            self._flush_requested = True
+        return [o.future if isinstance(o, _Operation) else o for o in queued]
+
+    def _operation(self, query, variables, blocking):
+        """build a queued operation, or execute it right away and return its
+        future if it cannot be merged"""
+
+        if variables is None:
+            variables = {}
+        if not self.accepts(query, variables):
+            future = Future()
+            try:
+                future.set_result(self.api.query(query, variables))
+            except Exception as e:  # pylint: disable=broad-except
+                future.set_exception(e)
+            return future
+        return _Operation(
+            query,
+            variables,
+            parse_operation(query)[0],
+            len(query) + len(json.dumps(variables)),
+            blocking,
+            self.api.get_request_context(),
+        )
+
+    def _enqueue(self, operations):
+        if len(operations) == 0:
+            return
+        if len(self._pending) == 0:
+            self._pending_since = time.monotonic()
+        self._pending.extend(operations)
+        self._waiting += len([o for o in operations if o.blocking])
+        self._condition.notify_all()
+
+    def submit(self, function, *args, **kwargs):
+        """run a function with all its API queries routed through the batch
+
+        :param function: the function to execute, e.g. `api.indicator.create`
+        :type function: callable
+        :return: a future resolving to the function result
+        :rtype: concurrent.futures.Future
+        """
+
+        return self.submit_many([functools.partial(function, *args, **kwargs)])[0]
+
+    def submit_many(self, functions):
+        """run functions together with all their API queries routed through
+        the batch
+
+        The functions are counted as running at once, the operations they
+        queue are merged in the same requests whatever the time taken to
+        start them.
+
+        :param functions: the functions to execute, without arguments, e.g.
+            `functools.partial(api.label.create, value="x")`
+        :type functions: list
+        :return: futures resolving to the function results, in order
+        :rtype: list
+        """
+
+        with self._condition:
+            if self._closed:
+                raise ValueError("The batch is closed")
+            self._start_dispatcher()
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix="opencti-batch"
+                )
+            # Counted from now on, a function not started yet will queue operations
+            self._running += len(functions)
+        return [
+            self._executor.submit(
+                contextvars.copy_context().run, self._run, function, (), {}
+            )
+            for function in functions
+        ]
+
+    def executed(self, query, variables, result):
+        """called when an operation not handled by the batch was executed
+        directly while the batch is current
+
+        :param query: GraphQL query string
+        :type query: str
+        :param variables: GraphQL query variables
+        :type variables: dict
+        :param result: the response json content
+        :type result: dict
+        """
+
+    def flush(self):
+        """send the queued operations without waiting for the batch to be full"""
+
+        with self._condition:
+            self._flush_requested = True
+            self._condition.notify_all()
+
+    def close(self):
+        """wait for the submitted functions and send the remaining operations"""
+
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        if self._dispatcher is not None:
+            self._dispatcher.join()
+            self._dispatcher = None
+
+    def _run(self, function, args, kwargs):
+        token = _current_batch.set(self)
+        try:
+            return function(*args, **kwargs)
+        finally:
+            _current_batch.reset(token)
+            with self._condition:
+                self._running -= 1
+                self._condition.notify_all()
+
+    def _start_dispatcher(self):
+        if self._dispatcher is None:
+            self._dispatcher = threading.Thread(
+                target=self._dispatch_loop, name="opencti-batch-dispatcher", daemon=True
+            )
+            self._dispatcher.start()
+
+    def _ready(self):
+        if self._closed or self._flush_requested:
+            return True
+        if len(self._pending) >= self.max_operations:
+            return True
+        if sum(operation.size for operation in self._pending) >= self.max_bytes:
+            return True
+        # Every function that can run is waiting for a result, nothing else
+        # will come
+        if 0 < self._waiting and min(self._running, self.max_workers) <= self._waiting:
+            return True
+        return time.monotonic() - self._pending_since >= self.linger
+
+    def _take(self):
+        operations = []
+        size = 0
+        for operation in self._pending:
+            if len(operations) > 0 and (
+                operation.operation_type != operations[0].operation_type
+                or operation.context != operations[0].context
+                or len(operations) >= self.max_operations
+                or size + operation.size > self.max_bytes
+            ):
+                break
+            operations.append(operation)
+            size += operation.size
+        del self._pending[: len(operations)]
+        self._waiting -= len([o for o in operations if o.blocking])
+        if len(self._pending) == 0:
+            self._flush_requested = False
+        else:
+            self._pending_since = time.monotonic()
+        self._condition.notify_all()
+        return operations
+
+    def _dispatch_loop(self):
+        while True:
+            with self._condition:
+                while len(self._pending) == 0 or not self._ready():
+                    if self._closed and len(self._pending) == 0:
+                        return
+                    if len(self._pending) == 0:
+                        self._condition.wait()
+                    else:
+                        self._condition.wait(
+                            max(
+                                0.0,
+                                self.linger - (time.monotonic() - self._pending_since),
+                            )
+                        )
+                operations = self._take()
+            self._send(operations)
+
+    def _send(self, operations):
+        with self.api.request_context(**operations[0].context):
+            self._send_operations(operations)
+
+    def _send_operations(self, operations):
+        self.requests_count += 1
+        self.operations_count += len(operations)
+        try:
+            if len(operations) == 1:
+                # Nothing to merge, send the operation as is
+                operation = operations[0]
+                operation.future.set_result(
+                    self.api.query(operation.query, operation.variables)
+                )
+                return
+            document, variables, aliases = merge_operations(
+                [(operation.query, operation.variables) for operation in operations]
+            )
+            logging.debug("Sending a batch of %d operations", len(operations))
+            r = self.api.post_query(document, variables)
+            if r.status_code != 200:
+                logging.info(r.text)
+                raise ValueError(r.text)
+            result = r.json()
+        except Exception as e:  # pylint: disable=broad-except
+            for operation in operations:
+                if not operation.future.done():
+                    operation.future.set_exception(e)
+            return
+        data = result.get("data") or {}
+        errors = {}
+        global_error = None
+        for error in result.get("errors", []):
+            path = error.get("path")
+            if path:
+                errors.setdefault(path[0], error)
+            elif global_error is None:
+                global_error = error
+        for operation, operation_aliases in zip(operations, aliases):
+            error = global_error
+            for alias, _ in operation_aliases:
+                if alias in errors:
+                    error = errors[alias]
+                    break
+            if error is not None:
+                operation.future.set_exception(self.api.query_error(error))
+            else:
+                operation.future.set_result(
+                    {"data": {key: data.get(alias) for alias, key in operation_aliases}}
+                )
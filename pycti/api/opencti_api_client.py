@@ -1,9 +1,15 @@
 # coding: utf-8
 import base64
+import contextlib
+import contextvars
 import datetime
+import hashlib
 import io
 import json
 import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
 from typing import Union
 
 import magic
@@ -11,7 +17,9 @@ import requests
 import urllib3
 from pythonjsonlogger import jsonlogger
 
+from pycti.api.opencti_api_batch import OpenCTIApiBatch
 from pycti.api.opencti_api_connector import OpenCTIApiConnector
+from pycti.api.opencti_api_data_loader import OpenCTIApiDataLoader
 from pycti.api.opencti_api_work import OpenCTIApiWork
 from pycti.entities.opencti_attack_pattern import AttackPattern
 from pycti.entities.opencti_campaign import Campaign
@@ -50,6 +58,10 @@ from pycti.utils.opencti_stix2 import OpenCTIStix2
 
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
+# Applicant, retry number and work of the requests, local to the calling context
+_request_context = contextvars.ContextVar("opencti_request_context", default=None)
+REQUEST_CONTEXT_KEYS = ["applicant_id", "retry_number", "work_id"]
+
 
 class CustomJsonFormatter(jsonlogger.JsonFormatter):
     def add_fields(self, log_record, record, message_dict):
@@ -180,6 +192,76 @@ class OpenCTIApiClient:
                 "OpenCTI API is not reachable. Waiting for OpenCTI API to start or check your configuration..."
             )
 
+    def get_request_context(self):
+        """get the request context of the calling context
+
+        :return: the `applicant_id`, `retry_number` and `work_id` set in the
+            calling context
+        :rtype: dict
+        """
+
+        context = _request_context.get()
+        return {} if context is None else dict(context)
+
+    def _check_request_context(self, values):
+        for key in values:
+            if key not in REQUEST_CONTEXT_KEYS:
+                raise ValueError("Unknown request context key: " + key)
+
+    def set_request_context(self, **values):
+        """set values of the request context of the calling context
+
+        The values are local to the calling thread or task and to the
+        contexts copied from it (batches, data loaders, async client), so
+        that concurrent workers can share a client. They override the
+        headers set for the whole client with :py:meth:`set_applicant_id_header`
+        and :py:meth:`set_retry_number`.
+
+        :param `**values`: `applicant_id`, `retry_number` or `work_id`
+        :raises ValueError: if a key is unknown
+        """
+
+        self._check_request_context(values)
+        _request_context.set({**self.get_request_context(), **values})
+
+    @contextlib.contextmanager
+    def request_context(self, **values):
+        """set values of the request context until the block exits
+
+        Usage::
+
+            with api.request_context(applicant_id=user_id, work_id=work_id):
+                api.stix2.import_bundle(bundle)
+
+        :param `**values`: `applicant_id`, `retry_number` or `work_id`
+        :raises ValueError: if a key is unknown
+        """
+
+        self._check_request_context(values)
+        token = _request_context.set({**self.get_request_context(), **values})
+        try:
+            yield
+        finally:
+            _request_context.reset(token)
+
+    def get_request_headers(self):
+        """get the HTTP headers of the requests of the calling context
+
+        :return: the headers of the client, overridden by the headers of the
+            request context
+        :rtype: dict
+        """
+
+        headers = dict(self.request_headers)
+        context = self.get_request_context()
+        if "applicant_id" in context:
+            headers["opencti-applicant-id"] = context["applicant_id"]
+        if "retry_number" in context:
+            headers["opencti-retry-number"] = (
+                "" if context["retry_number"] is None else str(context["retry_number"])
+            )
+        return {key: value for key, value in headers.items() if value is not None}
+
     def set_applicant_id_header(self, applicant_id):
         self.request_headers["opencti-applicant-id"] = applicant_id
 
@@ -188,9 +270,78 @@ class OpenCTIApiClient:
             "" if retry_number is None else str(retry_number)
         )
 
+    def batch(self, **kwargs):
+        """create a batch merging queued operations into few HTTP requests
+
+        :param `**kwargs`: options of :py:class:`~pycti.api.opencti_api_batch.OpenCTIApiBatch`
+            (`max_operations`, `max_bytes`, `max_workers`, `linger`)
+        :return: the batch, to be used as a context manager
+        :rtype: OpenCTIApiBatch
+        """
+
+        return OpenCTIApiBatch(self, **kwargs)
+
+    def data_loader(self, **kwargs):
+        """create a loader deduplicating and memoizing reads by id
+
+        If a loader is already active in the calling context, it is reused.
+
+        :param `**kwargs`: options of :py:class:`~pycti.api.opencti_api_batch.OpenCTIApiBatch`
+        :return: the loader, to be used as a context manager
+        :rtype: OpenCTIApiDataLoader
+        """
+
+        current = OpenCTIApiBatch.current()
+        if isinstance(current, OpenCTIApiDataLoader):
+            return contextlib.nullcontext(current)
+        return OpenCTIApiDataLoader(self, **kwargs)
+
+    def query_many(self, operations, return_exceptions=False, **kwargs):
+        """submit several queries to the OpenCTI GraphQL API in batches
+
+        :param operations: list of `(query, variables)` tuples
+        :type operations: list
+        :param return_exceptions: return the error of the failed operations
+            in place of their result instead of raising it, defaults to False
+        :type return_exceptions: bool, optional
+        :param `**kwargs`: options of :py:class:`~pycti.api.opencti_api_batch.OpenCTIApiBatch`
+        :raises ValueError: if one of the operations failed
+        :return: the response json content of every operation, in order
+        :rtype: list
+        """
+
+        with self.batch(**kwargs) as batch:
+            futures = batch.query_many(operations)
+        if return_exceptions:
+            return [
+                future.exception()
+                if future.exception() is not None
+                else future.result()
+                for future in futures
+            ]
+        return [future.result() for future in futures]
+
+    @staticmethod
+    def is_file_variable(value):
+        """check if a query variable must be sent as a multipart upload
+
+        :param value: variable value
+        :return: `True` for a File or a non-empty list of File
+        :rtype: bool
+        """
+
+        return type(value) is File or (
+            isinstance(value, list)
+            and len(value) > 0
+            and all(map(lambda x: isinstance(x, File), value))
+        )
+
     def query(self, query, variables={}):
         """submit a query to the OpenCTI GraphQL API
 
+        When called from a function submitted to a batch, the query is merged
+        with the other queued operations of the batch.
+
         :param query: GraphQL query string
         :type query: str
         :param variables: GraphQL query variables, defaults to {}
@@ -199,6 +350,52 @@ class OpenCTIApiClient:
         :rtype: Any
         """
 
+        batch = OpenCTIApiBatch.current()
+        if batch is not None and batch.accepts(query, variables):
+            return batch.query(query, variables, blocking=True).result()
+
+        r = self.post_query(query, variables)
+        # Build response
+        if r.status_code == 200:
+            result = r.json()
+            if "errors" in result:
+                raise self.query_error(result["errors"][0])
+            else:
+                if batch is not None:
+                    batch.executed(query, variables, result)
+                return result
+        else:
+            logging.info(r.text)
+            raise ValueError(r.text)
+
+    def query_error(self, error):
+        """log a GraphQL error and convert it to an exception
+
+        :param error: an entry of the `errors` list of a GraphQL response
+        :type error: dict
+        :return: the exception to raise
+        :rtype: ValueError
+        """
+
+        error_name = error["name"] if "name" in error else error["message"]
+        if "data" in error and "reason" in error["data"]:
+            logging.error(error["data"]["reason"])
+            return ValueError({"name": error_name, "message": error["data"]["reason"]})
+        else:
+            logging.error(error["message"])
+            return ValueError({"name": error_name, "message": error["message"]})
+
+    def post_query(self, query, variables={}):
+        """send a query to the OpenCTI GraphQL API without processing the response
+
+        :param query: GraphQL query string
+        :type query: str
+        :param variables: GraphQL query variables, defaults to {}
+        :type variables: dict, optional
+        :return: the HTTP response
+        :rtype: requests.Response
+        """
+
         query_var = {}
         files_vars = []
         # Implementation of spec https://github.com/jaydenseric/graphql-multipart-request-spec
@@ -208,11 +405,7 @@ class OpenCTIApiClient:
         for key in var_keys:
             val = variables[key]
             is_file = type(val) is File
-            is_files = (
-                isinstance(val, list)
-                and len(val) > 0
-                and all(map(lambda x: isinstance(x, File), val))
-            )
+            is_files = not is_file and self.is_file_variable(val)
             if is_file or is_files:
                 files_vars.append({"key": key, "file": val, "multiple": is_files})
                 query_var[key] = None if is_file else [None] * len(val)
@@ -281,7 +474,7 @@ class OpenCTIApiClient:
                 self.api_url,
                 data=multipart_data,
                 files=multipart_files,
-                headers=self.request_headers,
+                headers=self.get_request_headers(),
                 verify=self.ssl_verify,
                 proxies=self.proxies,
             )
@@ -290,54 +483,189 @@ class OpenCTIApiClient:
             r = self.session.post(
                 self.api_url,
                 json={"query": query, "variables": variables},
-                headers=self.request_headers,
+                headers=self.get_request_headers(),
                 verify=self.ssl_verify,
                 proxies=self.proxies,
             )
-        # Build response
-        if r.status_code == 200:
-            result = r.json()
-            if "errors" in result:
-                main_error = result["errors"][0]
-                error_name = (
-                    main_error["name"]
-                    if "name" in main_error
-                    else main_error["message"]
+        return r
+
+    def download_opencti_file(
+        self,
+        fetch_uri,
+        destination,
+        size=None,
+        expected_hash=None,
+        hash_algorithm="sha256",
+        chunk_size=65536,
+        timeout=(10, 300),
+        max_attempts=3,
+        resume=False,
+    ):
+        """download a file from the OpenCTI API in chunks
+
+        The file is written as it is received, with the session, the TLS and
+        the proxies settings of the client. When the connection is lost, the
+        download resumes where it stopped with an HTTP range request. An
+        existing file path destination is overwritten, unless `resume` is
+        set: it is then taken as the beginning of the file and completed the
+        same way.
+
+        :param fetch_uri: download URI to use
+        :type fetch_uri: str
+        :param destination: path of the file to write or writable buffer
+        :type destination: str or io.IOBase
+        :param size: expected size in bytes, defaults to None (not checked)
+        :type size: int, optional
+        :param expected_hash: expected hex digest, defaults to None (not checked)
+        :type expected_hash: str, optional
+        :param hash_algorithm: algorithm of `expected_hash`, defaults to sha256
+        :type hash_algorithm: str, optional
+        :param chunk_size: size of the written chunks, a lost connection
+            loses the chunk being read, defaults to 65536
+        :type chunk_size: int, optional
+        :param timeout: connect and read timeouts in seconds, defaults to (10, 300)
+        :type timeout: tuple, optional
+        :param max_attempts: maximum number of requests, defaults to 3
+        :type max_attempts: int, optional
+        :param resume: complete an existing file path destination instead of
+            overwriting it, defaults to False
+        :type resume: bool, optional
+        :raises ValueError: if the request is rejected or the size or the hash
+            of the file is not the expected one
+        :return: the size of the file
+        :rtype: int
+        """
+
+        hasher = hashlib.new(hash_algorithm) if expected_hash is not None else None
+        if not isinstance(destination, str):
+            return self._download(
+                fetch_uri,
+                destination,
+                0,
+                size,
+                expected_hash,
+                hasher,
+                chunk_size,
+                timeout,
+                max_attempts,
+            )
+        offset = 0
+        if resume and os.path.exists(destination):
+            offset = os.path.getsize(destination)
+            if hasher is not None and offset > 0:
+                with open(destination, "rb") as file:
+                    for chunk in iter(lambda: file.read(chunk_size), b""):
+                        hasher.update(chunk)
+        with open(destination, "ab" if offset > 0 else "wb") as file:
+            try:
+                return self._download(
+                    fetch_uri,
+                    file,
+                    offset,
+                    size,
+                    expected_hash,
+                    hasher,
+                    chunk_size,
+                    timeout,
+                    max_attempts,
                 )
-                if "data" in main_error and "reason" in main_error["data"]:
-                    logging.error(main_error["data"]["reason"])
-                    raise ValueError(
-                        {"name": error_name, "message": main_error["data"]["reason"]}
-                    )
-                else:
-                    logging.error(main_error["message"])
-                    raise ValueError(
-                        {"name": error_name, "message": main_error["message"]}
-                    )
-            else:
-                return result
-        else:
-            logging.info(r.text)
-            raise ValueError(r.text)
+            except ValueError:
+                # A corrupted file must not be resumed
+                file.close()
+                os.remove(destination)
+                raise
+
+    def _download(
+        self,
+        fetch_uri,
+        file,
+        written,
+        size,
+        expected_hash,
+        hasher,
+        chunk_size,
+        timeout,
+        max_attempts,
+    ):
+        attempts = 0
+        while True:
+            headers = self.get_request_headers()
+            if written > 0:
+                headers["Range"] = "bytes=" + str(written) + "-"
+            try:
+                with self.session.get(
+                    fetch_uri,
+                    headers=headers,
+                    stream=True,
+                    verify=self.ssl_verify,
+                    proxies=self.proxies,
+                    timeout=timeout,
+                ) as r:
+                    if r.status_code == 416 and written > 0:
+                        # Nothing left to download
+                        break
+                    if 400 <= r.status_code < 500:
+                        raise ValueError(
+                            "Download of "
+                            + fetch_uri
+                            + " failed with status "
+                            + str(r.status_code)
+                        )
+                    r.raise_for_status()
+                    # The range is ignored, skip what was already written
+                    skip = written if r.status_code != 206 else 0
+                    for chunk in r.iter_content(chunk_size=chunk_size):
+                        if skip > 0:
+                            if len(chunk) <= skip:
+                                skip -= len(chunk)
+                                continue
+                            chunk = chunk[skip:]
+                            skip = 0
+                        file.write(chunk)
+                        if hasher is not None:
+                            hasher.update(chunk)
+                        written += len(chunk)
+                        if size is not None and written > size:
+                            raise ValueError(
+                                "Downloaded file is larger than " + str(size) + " bytes"
+                            )
+                break
+            except requests.RequestException as e:
+                attempts += 1
+                if attempts >= max_attempts:
+                    raise
+                self.log("warning", "Download interrupted (" + str(e) + "), resuming")
+                time.sleep(min(2**attempts, 30))
+        if size is not None and written != size:
+            raise ValueError(
+                "Downloaded file has " + str(written) + " bytes instead of " + str(size)
+            )
+        if hasher is not None and hasher.hexdigest() != expected_hash.lower():
+            raise ValueError("Downloaded file does not match its hash")
+        return written
 
     def fetch_opencti_file(self, fetch_uri, binary=False, serialize=False):
         """get file from the OpenCTI API
 
+        The response body is returned whatever the response status, see
+        :py:meth:`download_opencti_file` for a checked, streamed download.
+
         :param fetch_uri: download URI to use
         :type fetch_uri: str
-        :param binary: [description], defaults to False
+        :param binary: return bytes instead of text, defaults to False
         :type binary: bool, optional
-        :return: returns either the file content as text or bytes based on `binary`
+        :param serialize: return the content encoded in base64, defaults to False
+        :type serialize: bool, optional
+        :return: returns either the file content as text or bytes based on
+            `binary`, or its base64 encoding when `serialize` is set
         :rtype: str or bytes
         """
 
-        r = self.session.get(fetch_uri, headers=self.request_headers)
+        r = self.session.get(fetch_uri, headers=self.get_request_headers())
+        if serialize:
+            return base64.b64encode(r.content).decode("utf-8")
         if binary:
-            if serialize:
-                return base64.b64encode(r.content).decode("utf-8")
             return r.content
-        if serialize:
-            return base64.b64encode(r.text).decode("utf-8")
         return r.text
 
     def log(self, level, message):
@@ -458,6 +786,55 @@ class OpenCTIApiClient:
             result["pagination"] = data["pageInfo"]
         return result
 
+    def paginate(self, query, variables, key, prefetch=True):
+        """iterate over all the entities of a paginated list query
+
+        The entities are yielded page by page, so only the current page (and
+        the next one, when prefetched) is held in memory.
+
+        :param query: GraphQL list query string, taking an `$after` cursor
+        :type query: str
+        :param variables: GraphQL query variables
+        :type variables: dict
+        :param key: name of the connection in the response data
+        :type key: str
+        :param prefetch: fetch the next page in the background while the
+            current one is consumed, defaults to True
+        :type prefetch: bool, optional
+        :return: generator of processed entities
+        :rtype: Iterator[dict]
+        """
+
+        def fetch(after):
+            result = self.query(query, {**variables, "after": after})
+            return result["data"][key]
+
+        executor = (
+            ThreadPoolExecutor(max_workers=1, thread_name_prefix="opencti-paginate")
+            if prefetch
+            else None
+        )
+        try:
+            data = fetch(variables.get("after"))
+            while True:
+                page_info = data["pageInfo"]
+                has_next_page = page_info["hasNextPage"]
+                if has_next_page:
+                    after = page_info["endCursor"]
+                    self.log("info", "Listing " + key + " after " + after)
+                    if executor is not None:
+                        # The prefetch runs in the caller context (batch, loader...)
+                        context = contextvars.copy_context()
+                        next_data = executor.submit(context.run, fetch, after)
+                for entity in self.process_multiple(data):
+                    yield entity
+                if not has_next_page:
+                    return
+                data = next_data.result() if executor is not None else fetch(after)
+        finally:
+            if executor is not None:
+                executor.shutdown(wait=False)
+
     def process_multiple_ids(self, data) -> list:
         """processes data returned by the OpenCTI API with multiple ids
 
@@ -0,0 +1,170 @@
+# coding: utf-8
+import asyncio
+import contextvars
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+from requests.adapters import HTTPAdapter
+
+from pycti.api.opencti_api_client import OpenCTIApiClient
+
+
+class AsyncOpenCTIApiNamespace:
+    """Awaitable view of a namespace of the synchronous client
+
+    Every method of the wrapped namespace (``indicator``, ``report``, ``work``...)
+    is exposed as a coroutine function taking the same arguments.
+
+    :param client: instance of :py:class:`AsyncOpenCTIApiClient`
+    :param namespace: the wrapped synchronous namespace
+    """
+
+    def __init__(self, client, namespace):
+        self._client = client
+        self._namespace = namespace
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        attribute = getattr(self._namespace, name)
+        if not callable(attribute):
+            return attribute
+
+        @functools.wraps(attribute)
+        async def method(*args, **kwargs):
+            return await self._client.run(attribute, *args, **kwargs)
+
+        return method
+
+
+class AsyncOpenCTIApiClient:
+    """Asyncio API client for OpenCTI
+
+    Exposes the same entity namespaces and methods as
+    :py:class:`~pycti.api.opencti_api_client.OpenCTIApiClient` as awaitables,
+    e.g. ``await client.indicator.create(...)`` or ``await client.query(...)``.
+    The calls are executed on a thread pool sharing one HTTP connection pool,
+    so up to `max_workers` GraphQL requests can be in flight at the same time
+    from a single event loop.
+
+    The synchronous client, and its health check, is created on the thread
+    pool by :py:meth:`open`, called when entering ``async with``. The client
+    attributes are missing until then.
+
+    :param url: OpenCTI API url
+    :type url: str
+    :param token: OpenCTI API token
+    :type token: str
+    :param log_level: log level for the client
+    :type log_level: str, optional
+    :param ssl_verify:
+    :type ssl_verify: bool, optional
+    :param proxies:
+    :type proxies: dict, optional
+    :param json_logging: format the logs as json if set to True
+    :type json_logging: bool, optional
+    :param max_workers: maximum number of concurrent requests, defaults to 32
+    :type max_workers: int, optional
+    """
+
+    def __init__(
+        self,
+        url,
+        token,
+        log_level="info",
+        ssl_verify=False,
+        proxies=None,
+        json_logging=False,
+        max_workers=32,
+    ):
+        """Constructor method"""
+
+        if max_workers < 1:
+            raise ValueError("max_workers must be greater than 0")
+        self.max_workers = max_workers
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="opencti-api"
+        )
+        self._client_arguments = dict(
+            url=url,
+            token=token,
+            log_level=log_level,
+            ssl_verify=ssl_verify,
+            proxies=proxies,
+            json_logging=json_logging,
+        )
+        self.api = None
+        self._namespaces = {}
+        self._open_lock = None
+
+    async def open(self):
+        """create the synchronous client without blocking the event loop
+
+        The client constructor checks the platform health, it runs on the
+        client thread pool.
+
+        :return: the opened client
+        :rtype: AsyncOpenCTIApiClient
+        """
+
+        # Created in the loop of the first caller
+        if self._open_lock is None:
+            self._open_lock = asyncio.Lock()
+        async with self._open_lock:
+            if self.api is None:
+                api = await self.run(OpenCTIApiClient, **self._client_arguments)
+                # Keep one connection per worker instead of the default pool of 10
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.max_workers)
+                api.session.mount("http://", adapter)
+                api.session.mount("https://", adapter)
+                self.api = api
+        return self
+
+    def __getattr__(self, name):
+        if name.startswith("_") or name == "api":
+            raise AttributeError(name)
+        if self.api is None:
+            raise AttributeError(name + ", the client must be opened before use")
+        attribute = getattr(self.api, name)
+        if callable(attribute):
+
+            @functools.wraps(attribute)
+            async def method(*args, **kwargs):
+                return await self.run(attribute, *args, **kwargs)
+
+            return method
+        # The entities and the API namespaces are bound to the client
+        if any(getattr(attribute, key, None) is self.api for key in ["opencti", "api"]):
+            if name not in self._namespaces:
+                self._namespaces[name] = AsyncOpenCTIApiNamespace(self, attribute)
+            return self._namespaces[name]
+        return attribute
+
+    async def __aenter__(self):
+        return await self.open()
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+
+    async def run(self, function, *args, **kwargs):
+        """run a synchronous client function on the client thread pool
+
+        The caller context variables are propagated to the worker thread.
+
+        :param function: the function to execute
+        :type function: callable
+        :return: the function result
+        """
+
+        loop = asyncio.get_running_loop()
+        context = contextvars.copy_context()
+        call = functools.partial(context.run, function, *args, **kwargs)
+        return await loop.run_in_executor(self.executor, call)
+
+    async def close(self):
+        """wait for the pending requests and release the connections"""
+
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self.executor.shutdown)
+        if self.api is not None:
+            self.api.session.close()
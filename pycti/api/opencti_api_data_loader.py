@@ -0,0 +1,215 @@
+# coding: utf-8
+import copy
+from collections import OrderedDict
+from concurrent.futures import Future
+
+from pycti.api.opencti_api_batch import OpenCTIApiBatch, _current_batch, parse_operation
+
+
+def _strings(value):
+    if isinstance(value, str):
+        yield value
+    elif isinstance(value, dict):
+        for item in value.values():
+            yield from _strings(item)
+    elif isinstance(value, list):
+        for item in value:
+            yield from _strings(item)
+
+
+def _object_ids(result):
+    # Ids of the objects read by id, at the root of the response data
+    for value in result["data"].values():
+        if isinstance(value, dict):
+            for key in ["id", "standard_id"]:
+                if isinstance(value.get(key), str):
+                    yield value[key]
+            yield from _strings(value.get("x_opencti_stix_ids", []))
+
+
+class OpenCTIApiDataLoader(OpenCTIApiBatch):
+    """Request-coalescing loader for reads by id
+
+    While the loader is active, every read by id (`indicator.read(id=...)`,
+    `stix_domain_object.read(id=...)`, `opencti_stix_object_or_stix_relationship.read(id=...)`...)
+    is deduplicated and memoized, and the reads issued concurrently by the
+    functions run with :py:meth:`submit` are resolved in a single aliased query.
+    Other operations are sent directly, the mutations forget the memoized
+    reads of the objects they may have changed. The least recently used reads
+    are forgotten beyond `max_size` memoized reads.
+
+    Usage::
+
+        with api.data_loader():
+            malware = api.malware.read(id=malware_id)
+            ...
+
+    :param api: instance of :py:class:`~pycti.api.opencti_api_client.OpenCTIApiClient`
+    :param max_size: maximum number of memoized reads, defaults to 10000
+    :type max_size: int, optional
+    :param `**kwargs`: options of :py:class:`~pycti.api.opencti_api_batch.OpenCTIApiBatch`
+    """
+
+    def __init__(self, api, max_size=10000, **kwargs):
+        super().__init__(api, **kwargs)
+        if max_size < 1:
+            raise ValueError("max_size must be greater than 0")
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._memo = OrderedDict()
+        # Memoized reads by id of the object read or of the objects returned
+        self._index = {}
+        self._indexed = {}
+        self._tokens = []
+
+    def __enter__(self):
+        self._tokens.append(_current_batch.set(self))
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        _current_batch.reset(self._tokens.pop())
+        if len(self._tokens) == 0:
+            self.close()
+            self.clear()
+
+    def accepts(self, query, variables):
+        """check if an operation is a read by id
+
+        :param query: GraphQL query string
+        :type query: str
+        :param variables: GraphQL query variables
+        :type variables: dict
+        :rtype: bool
+        """
+
+        if variables is None or list(variables.keys()) != ["id"]:
+            return False
+        try:
+            operation_type, _, declared, fields = parse_operation(query)
+        except ValueError:
+            return False
+        return operation_type == "query" and declared == ("id",) and len(fields) == 1
+
+    def query(self, query, variables=None, blocking=False):
+        """load the result of a read by id, sharing the pending or memoized result
+
+        :param query: GraphQL query string
+        :type query: str
+        :param variables: GraphQL query variables, defaults to None
+        :type variables: dict, optional
+        :param blocking: whether the caller waits for the result right away
+        :type blocking: bool, optional
+        :return: a future resolving to the response json content
+        :rtype: concurrent.futures.Future
+        """
+
+        if not self.accepts(query, variables):
+            return super().query(query, variables, blocking)
+        key = (query, variables["id"])
+        with self._condition:
+            source = self._memo.get(key)
+            if source is not None:
+                self.hits += 1
+                self._memo.move_to_end(key)
+                if blocking and not source.done():
+                    # Waiting on an operation already queued by someone else
+                    self._waiting += 1
+                    source.add_done_callback(lambda _: self._release_waiting())
+            else:
+                self.misses += 1
+                source = super().query(query, variables, blocking)
+                self._memo[key] = source
+                self._add_to_index(key, [key[1]])
+                if len(self._memo) > self.max_size:
+                    self._forget(next(iter(self._memo)))
+                source.add_done_callback(lambda done: self._resolved(key, done))
+        return self._copy(source)
+
+    def executed(self, query, variables, result):
+        """forget the memoized reads of the objects a mutation may have changed
+
+        The reads of every id found in the variables or in the result of the
+        mutation are forgotten, as well as the memoized objects having one of
+        these ids.
+
+        :param query: GraphQL query string
+        :type query: str
+        :param variables: GraphQL query variables
+        :type variables: dict
+        :param result: the response json content
+        :type result: dict
+        """
+
+        try:
+            if parse_operation(query)[0] == "query":
+                return
+        except ValueError:
+            # Uploads are mutations
+            pass
+        ids = set(_strings(variables)) | set(_strings(result))
+        with self._condition:
+            for id in ids:
+                for key in list(self._index.get(id, ())):
+                    self._forget(key)
+
+    def clear(self, id=None):
+        """forget the memoized results
+
+        :param id: only forget the results of this id, defaults to None
+        :type id: str, optional
+        """
+
+        with self._condition:
+            if id is None:
+                self._memo.clear()
+                self._index.clear()
+                self._indexed.clear()
+            else:
+                for key in [key for key in self._index.get(id, ()) if key[1] == id]:
+                    self._forget(key)
+
+    @staticmethod
+    def _copy(source):
+        # Results are processed in place by the callers, each one gets its copy
+        future = Future()
+
+        def resolve(done):
+            if done.exception() is not None:
+                future.set_exception(done.exception())
+            else:
+                future.set_result(copy.deepcopy(done.result()))
+
+        source.add_done_callback(resolve)
+        return future
+
+    def _release_waiting(self):
+        with self._condition:
+            self._waiting -= 1
+            self._condition.notify_all()
+
+    def _add_to_index(self, key, ids):
+        ids = set(ids)
+        for id in ids:
+            self._index.setdefault(id, set()).add(key)
+        self._indexed.setdefault(key, set()).update(ids)
+
+    def _forget(self, key):
+        del self._memo[key]
+        for id in self._indexed.pop(key, ()):
+            keys = self._index[id]
+            keys.discard(key)
+            if len(keys) == 0:
+                del self._index[id]
+
+    def _resolved(self, key, future):
+        with self._condition:
+            if self._memo.get(key) is not future:
+                return
+            # Errors and entities not found yet are not memoized
+            if future.exception() is not None or not any(
+                value is not None for value in future.result()["data"].values()
+            ):
+                self._forget(key)
+            else:
+                self._add_to_index(key, _object_ids(future.result()))
@@ -1,20 +1,27 @@
 import base64
+import collections
+import contextvars
 import datetime
+import functools
+import gzip
 import json
 import logging
 import os
+import random
 import signal
 import ssl
 import sys
 import threading
 import time
 import traceback
+import urllib.parse
 import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
 from typing import Callable, Dict, List, Optional, Union
 
 import pika
-from pika.exceptions import NackError, UnroutableError
-from sseclient import SSEClient
+import requests
 
 from pycti.api.opencti_api_client import OpenCTIApiClient
 from pycti.connector.opencti_connector import OpenCTIConnector
@@ -22,6 +29,8 @@ from pycti.utils.opencti_stix2_splitter import OpenCTIStix2Splitter
 
 TRUTHY: List[str] = ["yes", "true", "True"]
 FALSY: List[str] = ["no", "false", "False"]
+# Content encoding of the pushed messages by push encoding
+PUSH_ENCODINGS: Dict[str, Optional[str]] = {"json": None, "raw": None, "gzip": "gzip"}
 
 
 def killProgramHook(etype, value, tb):
@@ -67,6 +76,30 @@ def get_config_variable(
     return result
 
 
+def decode_push_message(body: bytes, properties) -> Dict:
+    """decode a message pushed by :py:meth:`OpenCTIConnectorHelper.send_stix2_bundle`
+
+    :param body: message body
+    :type body: bytes
+    :param properties: message properties
+    :type properties: pika.BasicProperties
+    :return: the message fields, the bundle is in `content` and its encoding in
+        `content_encoding`, see
+        :py:meth:`~pycti.utils.opencti_stix2.OpenCTIStix2.import_bundle_from_json`
+    :rtype: Dict
+    """
+
+    if properties is not None and properties.content_type == "application/json":
+        message = dict(properties.headers or {})
+        message["content"] = body
+        message["content_encoding"] = properties.content_encoding
+        return message
+    message = json.loads(body)
+    message["content"] = base64.b64decode(message["content"])
+    message["content_encoding"] = None
+    return message
+
+
 def create_ssl_context() -> ssl.SSLContext:
     """Set strong SSL defaults: require TLSv1.2+
 
@@ -94,15 +127,21 @@ def create_ssl_context() -> ssl.SSLContext:
 class ListenQueue(threading.Thread):
     """Main class for the ListenQueue used in OpenCTIConnectorHelper
 
+    Up to `concurrency` messages are processed at once by a pool of threads,
+    a message is acknowledged once processed. Each message is processed with
+    its own API request context (work id and applicant).
+
     :param helper: instance of a `OpenCTIConnectorHelper` class
     :type helper: OpenCTIConnectorHelper
     :param config: dict containing client config
     :type config: Dict
     :param callback: callback function to process queue
     :type callback: callable
+    :param concurrency: number of messages processed at once, defaults to 1
+    :type concurrency: int, optional
     """
 
-    def __init__(self, helper, config: Dict, callback) -> None:
+    def __init__(self, helper, config: Dict, callback, concurrency: int = 1) -> None:
         threading.Thread.__init__(self)
         self.pika_credentials = None
         self.pika_parameters = None
@@ -110,6 +149,7 @@ class ListenQueue(threading.Thread):
         self.channel = None
         self.helper = helper
         self.callback = callback
+        self.concurrency = concurrency
         self.host = config["connection"]["host"]
         self.use_ssl = config["connection"]["use_ssl"]
         self.port = config["connection"]["port"]
@@ -117,7 +157,12 @@ class ListenQueue(threading.Thread):
         self.password = config["connection"]["pass"]
         self.queue_name = config["listen"]
         self.exit_event = threading.Event()
-        self.thread = None
+        self.executor = ThreadPoolExecutor(
+            max_workers=concurrency, thread_name_prefix="opencti-listen"
+        )
+        # Work ids of the messages being processed, by delivery tag
+        self.processing = {}
+        self.processing_lock = threading.Lock()
 
     # noinspection PyUnusedLocal
     def _process_message(self, channel, method, properties, body) -> None:
@@ -134,50 +179,70 @@ class ListenQueue(threading.Thread):
         """
 
         json_data = json.loads(body)
-        channel.basic_ack(delivery_tag=method.delivery_tag)
-        self.thread = threading.Thread(target=self._data_handler, args=[json_data])
-        self.thread.start()
-        five_minutes = 60 * 5
-        time_wait = 0
-        while self.thread.is_alive():  # Loop while the thread is processing
-            if (
-                self.helper.work_id is not None and time_wait > five_minutes
-            ):  # Ping every 5 minutes
-                self.helper.api.work.ping(self.helper.work_id)
-                time_wait = 0
-            else:
-                time_wait += 1
-            time.sleep(1)
+        with self.processing_lock:
+            self.processing[method.delivery_tag] = json_data["internal"]["work_id"]
+        # Each message has its own context, see OpenCTIApiClient.request_context
+        context = contextvars.Context()
+        self.executor.submit(
+            context.run,
+            self._data_handler,
+            self.pika_connection,
+            channel,
+            method.delivery_tag,
+            json_data,
+        )
 
+    def _ack_message(self, channel, delivery_tag) -> None:
+        if channel.is_open:
+            channel.basic_ack(delivery_tag=delivery_tag)
         logging.info(
-            "%s",
-            (
-                f"Message (delivery_tag={method.delivery_tag}) processed"
-                ", thread terminated"
-            ),
+            "%s", f"Message (delivery_tag={delivery_tag}) processed and acknowledged"
         )
 
-    def _data_handler(self, json_data) -> None:
-        # Set the API headers
+    def _ping_works(self) -> None:
+        with self.processing_lock:
+            work_ids = set(self.processing.values())
+        for work_id in work_ids:
+            if work_id is not None:
+                try:
+                    self.helper.api.work.ping(work_id)
+                except Exception:  # pylint: disable=broad-except
+                    logging.error("Error pinging the work %s", work_id)
+        # Ping every 5 minutes
+        self.pika_connection.call_later(60 * 5, self._ping_works)
+
+    def _data_handler(self, pika_connection, channel, delivery_tag, json_data) -> None:
+        # Set the API request context of the message
         work_id = json_data["internal"]["work_id"]
         applicant_id = json_data["internal"]["applicant_id"]
-        self.helper.work_id = work_id
+        request_context = {"work_id": work_id}
         if applicant_id is not None:
-            self.helper.applicant_id = applicant_id
-            self.helper.api.set_applicant_id_header(applicant_id)
-        # Execute the callback
-        try:
-            self.helper.api.work.to_received(
-                work_id, "Connector ready to process the operation"
-            )
-            message = self.callback(json_data["event"])
-            self.helper.api.work.to_processed(work_id, message)
-        except Exception as e:  # pylint: disable=broad-except
-            logging.exception("Error in message processing, reporting error to API")
+            request_context["applicant_id"] = applicant_id
+        # Execute the callback, the worker thread is reused for other messages
+        with self.helper.api.request_context(**request_context):
             try:
-                self.helper.api.work.to_processed(work_id, str(e), True)
-            except:  # pylint: disable=bare-except
-                logging.error("Failing reporting the processing")
+                self.helper.api.work.to_received(
+                    work_id, "Connector ready to process the operation"
+                )
+                message = self.callback(json_data["event"])
+                self.helper.api.work.to_processed(work_id, message)
+            except Exception as e:  # pylint: disable=broad-except
+                logging.exception("Error in message processing, reporting error to API")
+                try:
+                    self.helper.api.work.to_processed(work_id, str(e), True)
+                except:  # pylint: disable=bare-except
+                    logging.error("Failing reporting the processing")
+            finally:
+                with self.processing_lock:
+                    self.processing.pop(delivery_tag, None)
+                # The channel is only used by the thread of its connection
+                try:
+                    pika_connection.add_callback_threadsafe(
+                        functools.partial(self._ack_message, channel, delivery_tag)
+                    )
+                except Exception:  # pylint: disable=broad-except
+                    # Connection lost, the message is delivered again
+                    logging.error("Unable to acknowledge the message %s", delivery_tag)
 
     def run(self) -> None:
         while not self.exit_event.is_set():
@@ -196,9 +261,11 @@ class ListenQueue(threading.Thread):
                 self.pika_connection = pika.BlockingConnection(self.pika_parameters)
                 self.channel = self.pika_connection.channel()
                 assert self.channel is not None
+                self.channel.basic_qos(prefetch_count=self.concurrency)
                 self.channel.basic_consume(
                     queue=self.queue_name, on_message_callback=self._process_message
                 )
+                self.pika_connection.call_later(60 * 5, self._ping_works)
                 self.channel.start_consuming()
             except (KeyboardInterrupt, SystemExit):
                 self.helper.log_info("Connector stop")
@@ -209,8 +276,14 @@ class ListenQueue(threading.Thread):
 
     def stop(self):
         self.exit_event.set()
-        if self.thread:
-            self.thread.join()
+        if self.pika_connection is not None and self.channel is not None:
+            try:
+                self.pika_connection.add_callback_threadsafe(
+                    self.channel.stop_consuming
+                )
+            except Exception:  # pylint: disable=broad-except
+                pass
+        self.executor.shutdown(wait=True)
 
 
 class PingAlive(threading.Thread):
@@ -260,7 +333,235 @@ class PingAlive(threading.Thread):
         self.exit_event.set()
 
 
+class SSEMessage:
+    """A message of a server-sent events stream
+
+    :param event: type of the event, defaults to `message`
+    :type event: str
+    :param data: data of the event, the `data` lines joined with newlines
+    :type data: str
+    :param id: id of the event, if any
+    :type id: str, optional
+    :param retry: reconnection time requested by the server in milliseconds
+    :type retry: int, optional
+    """
+
+    __slots__ = ("event", "data", "id", "retry")
+
+    def __init__(self, event="message", data="", id=None, retry=None):
+        self.event = event
+        self.data = data
+        self.id = id
+        self.retry = retry
+
+
+def _iter_lines(chunks):
+    """split a stream of bytes chunks into lines, without their line ending"""
+
+    pending = []
+    for chunk in chunks:
+        if b"\n" not in chunk:
+            pending.append(chunk)
+            continue
+        pending.append(chunk)
+        lines = b"".join(pending).split(b"\n")
+        pending = [lines.pop()]
+        for line in lines:
+            yield line[:-1] if line.endswith(b"\r") else line
+
+
+def _parse_messages(lines):
+    """group the lines of a server-sent events stream into messages"""
+
+    event = None
+    data = []
+    event_id = None
+    retry = None
+    for line in lines:
+        if len(line) == 0:
+            if event is not None or len(data) > 0 or event_id is not None:
+                yield SSEMessage(
+                    event or "message",
+                    b"\n".join(data).decode("utf-8", errors="replace"),
+                    event_id,
+                    retry,
+                )
+            event = None
+            data = []
+            event_id = None
+            retry = None
+            continue
+        if line.startswith(b":"):
+            # Comment
+            continue
+        name, _, value = line.partition(b":")
+        if value.startswith(b" "):
+            value = value[1:]
+        if name == b"data":
+            data.append(value)
+        elif name == b"event":
+            event = value.decode("utf-8", errors="replace")
+        elif name == b"id":
+            event_id = value.decode("utf-8", errors="replace")
+        elif name == b"retry" and value.isdigit():
+            retry = int(value)
+
+
+class SSEReader:
+    """Reader of a server-sent events stream surviving disconnections
+
+    The stream is read as a streaming HTTP response. When the connection is
+    lost, when the server closes the stream or when nothing, not even a
+    heartbeat, is received for `heartbeat_timeout` seconds, the reader
+    reconnects after the backoff of `retry_policy`. It resumes after the last
+    message read, with the `Last-Event-ID` header and the `from` parameter of
+    the OpenCTI streams. Client errors (e.g. an invalid token) are raised.
+
+    :param url: URL of the stream
+    :type url: str
+    :param headers: headers of the requests, defaults to None
+    :type headers: dict, optional
+    :param verify: whether to verify the SSL certificate, defaults to True
+    :type verify: bool, optional
+    :param last_event_id: id of the last message already read, defaults to None
+    :type last_event_id: str, optional
+    :param heartbeat_timeout: seconds without receiving anything before
+        reconnecting, defaults to 60
+    :type heartbeat_timeout: float, optional
+    :param retry_policy: backoff of the reconnections, the reader gives up
+        after `max_attempts` consecutive failed connections, defaults to 100
+        attempts and a backoff of up to 60 seconds
+    :type retry_policy: RetryPolicy, optional
+    :param session: HTTP session of the requests, defaults to a new session
+    :type session: requests.Session, optional
+    """
+
+    def __init__(
+        self,
+        url,
+        headers=None,
+        verify=True,
+        last_event_id=None,
+        heartbeat_timeout=60,
+        retry_policy=None,
+        session=None,
+    ) -> None:
+        self.url = url
+        self.headers = dict(headers or {})
+        self.verify = verify
+        self.last_event_id = last_event_id
+        self.heartbeat_timeout = heartbeat_timeout
+        self.retry_policy = (
+            retry_policy if retry_policy is not None else RetryPolicy(100)
+        )
+        self.session = session if session is not None else requests.Session()
+        self.reconnections = 0
+        self.response = None
+        self.closed = threading.Event()
+
+    def _resume_url(self):
+        if self.last_event_id is None:
+            return self.url
+        parts = urllib.parse.urlsplit(self.url)
+        query = [
+            (key, value)
+            for key, value in urllib.parse.parse_qsl(
+                parts.query, keep_blank_values=True
+            )
+            if key != "from"
+        ]
+        query.append(("from", self.last_event_id))
+        return urllib.parse.urlunsplit(
+            parts._replace(query=urllib.parse.urlencode(query))
+        )
+
+    def _connect(self):
+        headers = dict(self.headers)
+        headers["Accept"] = "text/event-stream"
+        headers["Cache-Control"] = "no-cache"
+        if self.last_event_id is not None:
+            headers["Last-Event-ID"] = self.last_event_id
+        response = self.session.get(
+            self._resume_url(),
+            headers=headers,
+            stream=True,
+            verify=self.verify,
+            timeout=(self.heartbeat_timeout, self.heartbeat_timeout),
+        )
+        if 400 <= response.status_code < 500 and response.status_code != 429:
+            response.close()
+            raise ValueError(
+                "Stream request failed with status " + str(response.status_code)
+            )
+        response.raise_for_status()
+        return response
+
+    def __iter__(self):
+        # Consecutive failed connections, reset by a received message
+        attempts = 0
+        while not self.closed.is_set():
+            try:
+                self.response = self._connect()
+                chunks = self.response.iter_content(chunk_size=None)
+                for message in _parse_messages(_iter_lines(chunks)):
+                    attempts = 0
+                    if message.id is not None:
+                        self.last_event_id = message.id
+                    yield message
+                    if self.closed.is_set():
+                        return
+                logging.warning("Stream closed by the server")
+            except Exception as e:  # pylint: disable=broad-except
+                # Closing the response interrupts the read with any error
+                if self.closed.is_set():
+                    return
+                if not isinstance(e, requests.RequestException):
+                    raise
+                logging.warning("Stream connection lost: %s", e)
+            finally:
+                if self.response is not None:
+                    self.response.close()
+                    self.response = None
+            attempts += 1
+            if attempts >= self.retry_policy.max_attempts:
+                raise ValueError(
+                    "Unable to read the stream after " + str(attempts) + " attempts"
+                )
+            delay = self.retry_policy.delay(attempts)
+            logging.info("Reconnecting the stream in %.1f s", delay)
+            self.closed.wait(delay)
+            self.reconnections += 1
+
+    def close(self):
+        """stop reading, the current read is interrupted"""
+
+        self.closed.set()
+        response = self.response
+        if response is not None:
+            response.close()
+
+
 class ListenStream(threading.Thread):
+    """Main class for the ListenStream used in OpenCTIConnectorHelper
+
+    The callback is called with every event of the stream. When `batch_size`
+    is set, it is called with lists of up to `batch_size` events, sent at
+    the latest `batch_timeout` seconds after their first event was received.
+    The last event id is then kept in memory and saved in the connector
+    state once the callback of a batch succeeded.
+
+    :param helper: instance of a `OpenCTIConnectorHelper` class
+    :type helper: OpenCTIConnectorHelper
+    :param callback: callback function to process the events
+    :type callback: callable
+    :param batch_size: maximum number of events of a batch, defaults to None
+        (one event at a time)
+    :type batch_size: int, optional
+    :param batch_timeout: maximum seconds an event waits in a batch, checked
+        when a message (including a heartbeat) is received, defaults to 5
+    :type batch_timeout: float, optional
+    """
+
     def __init__(
         self,
         helper,
@@ -272,8 +573,12 @@ class ListenStream(threading.Thread):
         live_stream_id,
         listen_delete,
         no_dependencies,
+        batch_size=None,
+        batch_timeout=5,
     ) -> None:
         threading.Thread.__init__(self)
+        if batch_size is not None and batch_size < 1:
+            raise ValueError("batch_size must be greater than 0")
         self.helper = helper
         self.callback = callback
         self.url = url
@@ -283,6 +588,9 @@ class ListenStream(threading.Thread):
         self.live_stream_id = live_stream_id
         self.listen_delete = listen_delete if listen_delete is not None else True
         self.no_dependencies = no_dependencies if no_dependencies is not None else False
+        self.batch_size = batch_size
+        self.batch_timeout = batch_timeout
+        self.messages = None
         self.exit = False
 
     def run(self) -> None:  # pylint: disable=too-many-branches
@@ -336,7 +644,7 @@ class ListenStream(threading.Thread):
                         f"{live_stream_url}, SSL verify: {opencti_ssl_verify}, Listen Delete: {self.listen_delete})"
                     ),
                 )
-                messages = SSEClient(
+                messages = SSEReader(
                     live_stream_url,
                     headers={
                         "authorization": "Bearer " + self.token,
@@ -376,7 +684,7 @@ class ListenStream(threading.Thread):
                         f", SSL verify: {self.helper.opencti_ssl_verify}, Listen Delete: {self.helper.connect_live_stream_listen_delete}, No Dependencies: {self.helper.connect_live_stream_no_dependencies})"
                     ),
                 )
-                messages = SSEClient(
+                messages = SSEReader(
                     live_stream_url,
                     headers={
                         "authorization": "Bearer " + self.helper.opencti_token,
@@ -389,6 +697,10 @@ class ListenStream(threading.Thread):
                     },
                     verify=self.helper.opencti_ssl_verify,
                 )
+            self.messages = messages
+            if self.batch_size is not None:
+                self._consume_batches(messages)
+                return
             # Iter on stream messages
             for msg in messages:
                 if self.exit:
@@ -409,8 +721,436 @@ class ListenStream(threading.Thread):
         except:
             sys.excepthook(*sys.exc_info())
 
+    def _save_last_event_id(self, last_event_id) -> None:
+        state = self.helper.get_state()
+        state["connectorLastEventId"] = last_event_id
+        self.helper.set_state(state)
+
+    def _consume_batches(self, messages) -> None:
+        """call the callback with batches of events of the stream
+
+        :param messages: the messages of the stream
+        :type messages: Iterable
+        """
+
+        batch = []
+        batch_start = None
+        # Id of the last received message, saved once the batch is processed
+        last_event_id = None
+        for msg in messages:
+            if self.exit:
+                break
+            if msg.event == "heartbeat" or msg.event == "connected":
+                pass
+            else:
+                if msg.event != "sync":
+                    if len(batch) == 0:
+                        batch_start = time.monotonic()
+                    batch.append(msg)
+                if msg.id is not None:
+                    last_event_id = str(msg.id)
+            if len(batch) > 0 and (
+                len(batch) >= self.batch_size
+                or time.monotonic() - batch_start >= self.batch_timeout
+            ):
+                self.callback(batch)
+                batch = []
+            if len(batch) == 0 and last_event_id is not None:
+                self._save_last_event_id(last_event_id)
+                last_event_id = None
+        # Deliver the received events before exiting
+        if len(batch) > 0:
+            self.callback(batch)
+        if last_event_id is not None:
+            self._save_last_event_id(last_event_id)
+
     def stop(self):
         self.exit = True
+        if self.messages is not None:
+            self.messages.close()
+
+
+class RetryPolicy:
+    """Retry policy of the messages of a PushQueue
+
+    A message negatively acknowledged by the broker is published again after
+    an exponential backoff with jitter, up to `max_attempts` publications. The
+    same backoff spaces the consecutive reconnections of the broker and of
+    the SSEReader streams.
+
+    :param max_attempts: maximum number of publications of a message,
+        defaults to 5
+    :type max_attempts: int, optional
+    :param backoff: delay in seconds before the first retry, defaults to 1
+    :type backoff: float, optional
+    :param max_backoff: maximum delay in seconds, defaults to 60
+    :type max_backoff: float, optional
+    :param jitter: random fraction of the delay removed, from 0 to 1,
+        defaults to 0.5
+    :type jitter: float, optional
+    :param dead_letter: callback receiving the routing key, the body and the
+        properties of the messages given up, defaults to None
+    :type dead_letter: callable, optional
+    """
+
+    def __init__(
+        self,
+        max_attempts: int = 5,
+        backoff: float = 1,
+        max_backoff: float = 60,
+        jitter: float = 0.5,
+        dead_letter: Callable = None,
+    ) -> None:
+        if max_attempts < 1:
+            raise ValueError("max_attempts must be greater than 0")
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.jitter = jitter
+        self.dead_letter = dead_letter
+
+    def delay(self, attempt: int) -> float:
+        """get the delay before a retry
+
+        :param attempt: number of failed attempts
+        :type attempt: int
+        :return: the delay in seconds
+        :rtype: float
+        """
+
+        delay = min(self.max_backoff, self.backoff * 2 ** max(attempt - 1, 0))
+        return delay * (1 - self.jitter * random.random())
+
+
+class _PushMessage:
+    __slots__ = ("routing_key", "body", "properties", "future", "start", "attempts")
+
+    def __init__(self, routing_key, body, properties):
+        self.routing_key = routing_key
+        self.body = body
+        self.properties = properties
+        self.future = Future()
+        self.start = time.monotonic()
+        self.attempts = 0
+
+
+class PushQueue(threading.Thread):
+    """Long-lived publisher of the messages of OpenCTIConnectorHelper
+
+    The broker connection is opened once, in the thread, and opened again when
+    lost. The messages are persistent and confirmed by the broker, at most
+    `window` messages await their confirmation at once. The messages negatively
+    acknowledged are published again according to the retry policy, the
+    messages not confirmed before a connection loss are published again once
+    reconnected. After `max_attempts` failed connections in a row, the
+    publisher stops and the pending messages fail.
+
+    :param helper: instance of a `OpenCTIConnectorHelper` class
+    :type helper: OpenCTIConnectorHelper
+    :param config: dict containing client config
+    :type config: Dict
+    :param window: maximum number of unconfirmed messages, defaults to 100
+    :type window: int, optional
+    :param retry_policy: retry policy, defaults to a `RetryPolicy` with its defaults
+    :type retry_policy: RetryPolicy, optional
+    :param timeout: seconds a publication waits for a free place in the
+        window, defaults to 300
+    :type timeout: float, optional
+    """
+
+    def __init__(
+        self,
+        helper,
+        config: Dict,
+        window: int = 100,
+        retry_policy: RetryPolicy = None,
+        timeout: float = 300,
+    ) -> None:
+        threading.Thread.__init__(self, daemon=True)
+        self.helper = helper
+        self.host = config["connection"]["host"]
+        self.use_ssl = config["connection"]["use_ssl"]
+        self.port = config["connection"]["port"]
+        self.user = config["connection"]["user"]
+        self.password = config["connection"]["pass"]
+        self.exchange = config["push_exchange"]
+        self.retry_policy = retry_policy if retry_policy is not None else RetryPolicy()
+        self.timeout = timeout
+        self.pika_connection = None
+        self.channel = None
+        self.exit_event = threading.Event()
+        self.window = threading.Semaphore(window)
+        self.lock = threading.Lock()
+        # Messages to publish, waiting for a retry and published by delivery tag
+        self.messages = collections.deque()
+        self.delayed = set()
+        self.unconfirmed = collections.OrderedDict()
+        self.delivery_tag = 0
+        self.connection_failures = 0
+        # Reason of the stop when the broker could not be reached
+        self.error = None
+        # Metrics
+        self.published = 0
+        self.confirmed = 0
+        self.nacked = 0
+        self.dead_lettered = 0
+        self.reconnections = 0
+        self.latency_total = 0.0
+        self.latency_max = 0.0
+
+    def publish(
+        self, routing_key: str, body: Union[str, bytes], properties: Dict = None
+    ) -> Future:
+        """publish a message, blocks while `window` messages are unconfirmed
+
+        :param routing_key: routing key of the message
+        :type routing_key: str
+        :param body: message body
+        :type body: str or bytes
+        :param properties: properties of the message, e.g. `headers`, in
+            addition to the persistent delivery mode, defaults to None
+        :type properties: Dict, optional
+        :raises ValueError: if the publisher is stopped or no place is freed in
+            the window before the timeout
+        :return: a future resolved when the broker confirms the message, or
+            failed when the message is given up
+        :rtype: concurrent.futures.Future
+        """
+
+        deadline = time.monotonic() + self.timeout
+        # Woken up every second to notice a stop
+        while not self.window.acquire(
+            timeout=min(1.0, max(0.0, deadline - time.monotonic()))
+        ):
+            if self.exit_event.is_set():
+                raise self._stopped_error()
+            if time.monotonic() >= deadline:
+                raise ValueError(
+                    "The broker did not confirm the pending messages in time"
+                )
+        message = _PushMessage(routing_key, body, properties or {})
+        with self.lock:
+            if self.exit_event.is_set():
+                self.window.release()
+                raise self._stopped_error()
+            self.messages.append(message)
+        self._call_soon(self._publish_messages)
+        return message.future
+
+    def _stopped_error(self) -> ValueError:
+        if self.error is not None:
+            return self.error
+        return ValueError("The push queue is stopped")
+
+    def get_metrics(self) -> Dict:
+        """get the publication metrics
+
+        :return: the message counters and the publish latencies in seconds,
+            from the call to :py:meth:`publish` to the broker confirmation
+        :rtype: Dict
+        """
+
+        with self.lock:
+            return {
+                "published": self.published,
+                "confirmed": self.confirmed,
+                "nacked": self.nacked,
+                "dead_lettered": self.dead_lettered,
+                "reconnections": self.reconnections,
+                "queued": len(self.messages),
+                "delayed": len(self.delayed),
+                "unconfirmed": len(self.unconfirmed),
+                "latency_avg": self.latency_total / self.confirmed
+                if self.confirmed > 0
+                else 0.0,
+                "latency_max": self.latency_max,
+            }
+
+    def _call_soon(self, callback) -> None:
+        pika_connection = self.pika_connection
+        if pika_connection is not None:
+            try:
+                pika_connection.ioloop.add_callback_threadsafe(callback)
+            except Exception:  # pylint: disable=broad-except
+                # Connection lost, the messages are published once reconnected
+                pass
+
+    def _publish_messages(self) -> None:
+        with self.lock:
+            while (
+                self.channel is not None
+                and self.channel.is_open
+                and len(self.messages) > 0
+            ):
+                message = self.messages.popleft()
+                self.channel.basic_publish(
+                    exchange=self.exchange,
+                    routing_key=message.routing_key,
+                    body=message.body,
+                    properties=pika.BasicProperties(
+                        delivery_mode=2,  # make message persistent
+                        **message.properties,
+                    ),
+                )
+                message.attempts += 1
+                self.delivery_tag += 1
+                self.unconfirmed[self.delivery_tag] = message
+                self.published += 1
+
+    def _retry(self, message) -> None:
+        with self.lock:
+            if message not in self.delayed:
+                return
+            self.delayed.discard(message)
+            self.messages.append(message)
+        self._publish_messages()
+
+    def _on_delivery_confirmation(self, frame) -> None:
+        method = frame.method
+        confirmed = []
+        given_up = []
+        with self.lock:
+            if method.multiple:
+                delivery_tags = [
+                    delivery_tag
+                    for delivery_tag in self.unconfirmed
+                    if delivery_tag <= method.delivery_tag
+                ]
+            else:
+                delivery_tags = [method.delivery_tag]
+            for delivery_tag in delivery_tags:
+                message = self.unconfirmed.pop(delivery_tag, None)
+                if message is None:
+                    continue
+                if isinstance(method, pika.spec.Basic.Ack):
+                    latency = time.monotonic() - message.start
+                    self.confirmed += 1
+                    self.latency_total += latency
+                    self.latency_max = max(self.latency_max, latency)
+                    confirmed.append(message)
+                    continue
+                self.nacked += 1
+                if message.attempts >= self.retry_policy.max_attempts:
+                    self.dead_lettered += 1
+                    given_up.append(message)
+                    continue
+                delay = self.retry_policy.delay(message.attempts)
+                logging.error(
+                    "Unable to send bundle, retry in %.1f seconds (attempt %d)",
+                    delay,
+                    message.attempts,
+                )
+                self.delayed.add(message)
+                self.pika_connection.ioloop.call_later(
+                    delay, functools.partial(self._retry, message)
+                )
+        for message in confirmed:
+            self.window.release()
+            message.future.set_result(None)
+        for message in given_up:
+            logging.error(
+                "Unable to send bundle after %d attempts, giving up", message.attempts
+            )
+            self.window.release()
+            if self.retry_policy.dead_letter is not None:
+                self.retry_policy.dead_letter(
+                    message.routing_key, message.body, message.properties
+                )
+            message.future.set_exception(
+                ValueError("The bundle has been rejected by the broker")
+            )
+
+    def _on_connection_open(self, connection) -> None:
+        connection.channel(on_open_callback=self._on_channel_open)
+
+    def _on_connection_open_error(self, connection, error) -> None:
+        self.helper.log_error("Unable to connect the broker: " + str(error))
+        connection.ioloop.stop()
+
+    def _on_connection_closed(self, connection, reason) -> None:
+        if not self.exit_event.is_set():
+            self.helper.log_error("Broker connection closed: " + str(reason))
+        connection.ioloop.stop()
+
+    def _on_channel_open(self, channel) -> None:
+        channel.add_on_close_callback(self._on_channel_closed)
+        channel.confirm_delivery(
+            ack_nack_callback=self._on_delivery_confirmation,
+            callback=lambda frame: self._on_confirm_delivery_ok(channel),
+        )
+
+    def _on_confirm_delivery_ok(self, channel) -> None:
+        with self.lock:
+            self.channel = channel
+        # Connected, the next reconnection starts with the shortest delay
+        self.connection_failures = 0
+        self._publish_messages()
+
+    def _on_channel_closed(self, channel, reason) -> None:
+        with self.lock:
+            self.channel = None
+        if self.pika_connection is not None and self.pika_connection.is_open:
+            self.pika_connection.close()
+
+    def _close(self) -> None:
+        if self.pika_connection.is_open:
+            self.pika_connection.close()
+        else:
+            self.pika_connection.ioloop.stop()
+
+    def run(self) -> None:
+        while not self.exit_event.is_set():
+            pika_credentials = pika.PlainCredentials(self.user, self.password)
+            pika_parameters = pika.ConnectionParameters(
+                host=self.host,
+                port=self.port,
+                virtual_host="/",
+                credentials=pika_credentials,
+                ssl_options=pika.SSLOptions(create_ssl_context(), self.host)
+                if self.use_ssl
+                else None,
+            )
+            self.pika_connection = pika.SelectConnection(
+                pika_parameters,
+                on_open_callback=self._on_connection_open,
+                on_open_error_callback=self._on_connection_open_error,
+                on_close_callback=self._on_connection_closed,
+            )
+            self.pika_connection.ioloop.start()
+            # The unconfirmed and delayed messages are published again once
+            # reconnected
+            with self.lock:
+                self.channel = None
+                self.messages.extendleft(reversed(self.unconfirmed.values()))
+                self.messages.extend(self.delayed)
+                self.unconfirmed.clear()
+                self.delayed.clear()
+                self.delivery_tag = 0
+            if not self.exit_event.is_set():
+                self.connection_failures += 1
+                if self.connection_failures >= self.retry_policy.max_attempts:
+                    self.error = ValueError(
+                        "Unable to connect the broker after "
+                        + str(self.connection_failures)
+                        + " attempts"
+                    )
+                    logging.error("%s", str(self.error))
+                    self.exit_event.set()
+                    break
+                self.reconnections += 1
+                self.exit_event.wait(self.retry_policy.delay(self.connection_failures))
+        with self.lock:
+            messages = list(self.messages)
+            self.messages.clear()
+        for message in messages:
+            self.window.release()
+            message.future.set_exception(self._stopped_error())
+
+    def stop(self) -> None:
+        self.exit_event.set()
+        self._call_soon(self._close)
+        if self.is_alive():
+            self.join()
 
 
 class OpenCTIConnectorHelper:  # pylint: disable=too-many-public-methods
@@ -421,6 +1161,9 @@ class OpenCTIConnectorHelper:  # pylint: disable=too-many-public-methods
     """
 
     def __init__(self, config: Dict) -> None:
+        # Work and applicant used outside of a request context
+        self._work_id = None
+        self._applicant_id = None
         # Load API config
         self.opencti_url = get_config_variable(
             "OPENCTI_URL", ["opencti", "url"], config
@@ -501,6 +1244,48 @@ class OpenCTIConnectorHelper:  # pylint: disable=too-many-public-methods
             False,
             False,
         )
+        self.connect_bundle_max_objects = get_config_variable(
+            "CONNECTOR_BUNDLE_MAX_OBJECTS",
+            ["connector", "bundle_max_objects"],
+            config,
+            True,
+            1,
+        )
+        self.connect_concurrency = get_config_variable(
+            "CONNECTOR_CONCURRENCY",
+            ["connector", "concurrency"],
+            config,
+            True,
+            1,
+        )
+        self.connect_push_max_attempts = get_config_variable(
+            "CONNECTOR_PUSH_MAX_ATTEMPTS",
+            ["connector", "push_max_attempts"],
+            config,
+            True,
+            5,
+        )
+        self.connect_push_encoding = get_config_variable(
+            "CONNECTOR_PUSH_ENCODING",
+            ["connector", "push_encoding"],
+            config,
+            False,
+            "json",
+        )
+        self.connect_bundle_max_size = get_config_variable(
+            "CONNECTOR_BUNDLE_MAX_SIZE",
+            ["connector", "bundle_max_size"],
+            config,
+            True,
+            None,
+        )
+        self.connect_push_timeout = get_config_variable(
+            "CONNECTOR_PUSH_TIMEOUT",
+            ["connector", "push_timeout"],
+            config,
+            True,
+            300,
+        )
 
         # Configure logger
         numeric_level = getattr(
@@ -543,10 +1328,38 @@ class OpenCTIConnectorHelper:  # pylint: disable=too-many-public-methods
 
         # self.listen_stream = None
         self.listen_queue = None
+        self.push_queue = None
+        self.push_queue_lock = threading.Lock()
+        self.push_retry_policy = RetryPolicy(
+            max_attempts=self.connect_push_max_attempts
+        )
+
+    @property
+    def work_id(self) -> Optional[str]:
+        """id of the current work, read from the API request context of the
+        processed message, defaults to the value set on the helper"""
+        return self.api.get_request_context().get("work_id", self._work_id)
+
+    @work_id.setter
+    def work_id(self, work_id: Optional[str]) -> None:
+        self._work_id = work_id
+
+    @property
+    def applicant_id(self) -> Optional[str]:
+        """id of the user the data is pushed for, read from the API request
+        context of the processed message, defaults to the value set on the
+        helper"""
+        return self.api.get_request_context().get("applicant_id", self._applicant_id)
+
+    @applicant_id.setter
+    def applicant_id(self, applicant_id: Optional[str]) -> None:
+        self._applicant_id = applicant_id
 
     def stop(self) -> None:
         if self.listen_queue:
             self.listen_queue.stop()
+        if self.push_queue:
+            self.push_queue.stop()
         # if self.listen_stream:
         #     self.listen_stream.stop()
         self.ping.stop()
@@ -611,7 +1424,9 @@ class OpenCTIConnectorHelper:  # pylint: disable=too-many-public-methods
         :type message_callback: Callable[[Dict], str]
         """
 
-        self.listen_queue = ListenQueue(self, self.config, message_callback)
+        self.listen_queue = ListenQueue(
+            self, self.config, message_callback, self.connect_concurrency
+        )
         self.listen_queue.start()
 
     def listen_stream(
@@ -624,10 +1439,19 @@ class OpenCTIConnectorHelper:  # pylint: disable=too-many-public-methods
         live_stream_id=None,
         listen_delete=True,
         no_dependencies=False,
+        batch_size=None,
+        batch_timeout=5,
     ) -> ListenStream:
         """listen for messages and register callback function
 
-        :param message_callback: callback function to process messages
+        :param message_callback: callback function to process messages, called
+            with lists of messages when `batch_size` is set
+        :param batch_size: maximum number of messages per callback call,
+            defaults to None (one message per call)
+        :type batch_size: int, optional
+        :param batch_timeout: maximum seconds a message waits for its batch
+            to be full, defaults to 5
+        :type batch_timeout: float, optional
         """
 
         self.listen_stream = ListenStream(
@@ -640,6 +1464,8 @@ class OpenCTIConnectorHelper:  # pylint: disable=too-many-public-methods
             live_stream_id,
             listen_delete,
             no_dependencies,
+            batch_size,
+            batch_timeout,
         )
         self.listen_stream.start()
         return self.listen_stream
@@ -687,8 +1513,24 @@ class OpenCTIConnectorHelper:  # pylint: disable=too-many-public-methods
         :type entities_types: list, optional
         :param update: whether to updated data in the database, defaults to False
         :type update: bool, optional
+        :param bundle_max_objects: maximum number of objects per sent bundle,
+            defaults to the `bundle_max_objects` connector setting (1)
+        :type bundle_max_objects: int, optional
+        :param bundle_max_size: maximum size in bytes of a sent bundle, defaults
+            to the `bundle_max_size` connector setting (no limit)
+        :type bundle_max_size: int, optional
+        :param push_encoding: encoding of the messages, `json` for a JSON
+            message with the base64 encoded bundle, `raw` for the bundle in the
+            message body and the other fields in the headers, `gzip` for the
+            same with a gzip compressed body, defaults to the `push_encoding`
+            connector setting (`json`)
+        :type push_encoding: str, optional
+        :param keep_bundles: whether to return the sent bundles, the bundles are
+            published while being serialized and only kept in memory for the
+            result, set to False to hold one bundle at a time, defaults to True
+        :type keep_bundles: bool, optional
         :raises ValueError: if the bundle is empty
-        :return: list of bundles
+        :return: list of bundles, empty if not kept
         :rtype: list
         """
         work_id = kwargs.get("work_id", self.work_id)
@@ -699,6 +1541,14 @@ class OpenCTIConnectorHelper:  # pylint: disable=too-many-public-methods
         bypass_validation = kwargs.get("bypass_validation", False)
         entity_id = kwargs.get("entity_id", None)
         file_name = kwargs.get("file_name", None)
+        bundle_max_objects = kwargs.get(
+            "bundle_max_objects", self.connect_bundle_max_objects
+        )
+        bundle_max_size = kwargs.get("bundle_max_size", self.connect_bundle_max_size)
+        keep_bundles = kwargs.get("keep_bundles", True)
+        push_encoding = kwargs.get("push_encoding", self.connect_push_encoding)
+        if push_encoding not in PUSH_ENCODINGS:
+            raise ValueError("Unknown push encoding: " + str(push_encoding))
 
         if not file_name and work_id:
             file_name = f"{work_id}.json"
@@ -717,61 +1567,87 @@ class OpenCTIConnectorHelper:  # pylint: disable=too-many-public-methods
 
         if bypass_split:
             bundles = [bundle]
+            nb_bundles = 1
         else:
             stix2_splitter = OpenCTIStix2Splitter()
-            bundles = stix2_splitter.split_bundle(bundle, True, event_version)
+            bundles = stix2_splitter.iter_bundles(
+                bundle, True, event_version, bundle_max_objects, bundle_max_size
+            )
+            nb_bundles = stix2_splitter.nb_bundles
 
-        if len(bundles) == 0:
+        if nb_bundles == 0:
             raise ValueError("Nothing to import")
 
         if work_id:
-            self.api.work.add_expectations(work_id, len(bundles))
-
-        pika_credentials = pika.PlainCredentials(
-            self.config["connection"]["user"], self.config["connection"]["pass"]
-        )
-        pika_parameters = pika.ConnectionParameters(
-            host=self.config["connection"]["host"],
-            port=self.config["connection"]["port"],
-            virtual_host="/",
-            credentials=pika_credentials,
-            ssl_options=pika.SSLOptions(
-                create_ssl_context(), self.config["connection"]["host"]
-            )
-            if self.config["connection"]["use_ssl"]
-            else None,
-        )
+            self.api.work.add_expectations(work_id, nb_bundles)
 
-        pika_connection = pika.BlockingConnection(pika_parameters)
-        channel = pika_connection.channel()
+        push_queue = self.get_push_queue()
+        futures = []
+        sent_bundles = []
+        # Bundles are serialized one at a time while publishing
         for sequence, bundle in enumerate(bundles, start=1):
-            self._send_bundle(
-                channel,
-                bundle,
-                work_id=work_id,
-                entities_types=entities_types,
-                sequence=sequence,
-                update=update,
+            futures.append(
+                self._send_bundle(
+                    push_queue,
+                    bundle,
+                    work_id=work_id,
+                    entities_types=entities_types,
+                    sequence=sequence,
+                    update=update,
+                    push_encoding=push_encoding,
+                )
             )
-        channel.close()
-        return bundles
+            if keep_bundles:
+                sent_bundles.append(bundle)
+        # Wait for the broker confirmations, in order
+        try:
+            for future in futures:
+                future.result(timeout=push_queue.timeout)
+        except FutureTimeoutError:
+            raise ValueError("The broker did not confirm the bundles in time")
+        logging.info("%s", f"{len(futures)} bundle(s) have been sent")
+        return sent_bundles
+
+    def get_push_queue(self) -> PushQueue:
+        """get the publisher of the bundles, started on first use
+
+        :return: the publisher shared by all the threads of the connector
+        :rtype: PushQueue
+        """
 
-    def _send_bundle(self, channel, bundle, **kwargs) -> None:
+        with self.push_queue_lock:
+            # Started again after giving up connecting the broker
+            if self.push_queue is None or not self.push_queue.is_alive():
+                self.push_queue = PushQueue(
+                    self,
+                    self.config,
+                    retry_policy=self.push_retry_policy,
+                    timeout=self.connect_push_timeout,
+                )
+                self.push_queue.start()
+            return self.push_queue
+
+    def _send_bundle(self, push_queue, bundle, **kwargs) -> Future:
         """send a STIX2 bundle to RabbitMQ to be consumed by workers
 
-        :param channel: RabbitMQ channel
-        :type channel: callable
+        :param push_queue: the publisher
+        :type push_queue: PushQueue
         :param bundle: valid stix2 bundle
         :type bundle:
         :param entities_types: list of entity types, defaults to None
         :type entities_types: list, optional
         :param update: whether to update data in the database, defaults to False
         :type update: bool, optional
+        :param push_encoding: encoding of the message, defaults to `json`
+        :type push_encoding: str, optional
+        :return: a future resolved when the broker confirms the bundle
+        :rtype: concurrent.futures.Future
         """
         work_id = kwargs.get("work_id", None)
         sequence = kwargs.get("sequence", 0)
         update = kwargs.get("update", False)
         entities_types = kwargs.get("entities_types", None)
+        push_encoding = kwargs.get("push_encoding", "json")
 
         if entities_types is None:
             entities_types = []
@@ -788,27 +1664,30 @@ class OpenCTIConnectorHelper:  # pylint: disable=too-many-public-methods
             "applicant_id": self.applicant_id,
             "action_sequence": sequence,
             "entities_types": entities_types,
-            "content": base64.b64encode(bundle.encode("utf-8")).decode("utf-8"),
             "update": update,
         }
         if work_id is not None:
             message["work_id"] = work_id
 
-        # Send the message
-        try:
-            routing_key = "push_routing_" + self.connector_id
-            channel.basic_publish(
-                exchange=self.config["push_exchange"],
-                routing_key=routing_key,
-                body=json.dumps(message),
-                properties=pika.BasicProperties(
-                    delivery_mode=2,  # make message persistent
-                ),
+        # Send the message, published again until confirmed
+        routing_key = "push_routing_" + self.connector_id
+        if push_encoding == "json":
+            message["content"] = base64.b64encode(bundle.encode("utf-8")).decode(
+                "utf-8"
             )
-            logging.info("Bundle has been sent")
-        except (UnroutableError, NackError) as e:
-            logging.error("Unable to send bundle, retry...%s", e)
-            self._send_bundle(channel, bundle, **kwargs)
+            return push_queue.publish(routing_key, json.dumps(message))
+        body = bundle.encode("utf-8")
+        if push_encoding == "gzip":
+            body = gzip.compress(body, compresslevel=1)
+        return push_queue.publish(
+            routing_key,
+            body,
+            {
+                "content_type": "application/json",
+                "content_encoding": PUSH_ENCODINGS[push_encoding],
+                "headers": message,
+            },
+        )
 
     def split_stix2_bundle(self, bundle) -> list:
         """splits a valid stix2 bundle into a list of bundles
@@ -2,6 +2,8 @@
 
 import json
 
+from pycti.utils.opencti_projection import get_projection
+
 
 class AttackPattern:
     def __init__(self, opencti):
@@ -161,6 +163,8 @@ class AttackPattern:
         custom_attributes = kwargs.get("customAttributes", None)
         get_all = kwargs.get("getAll", False)
         with_pagination = kwargs.get("withPagination", False)
+        stream = kwargs.get("stream", False)
+        projection = kwargs.get("projection", "full")
         if get_all:
             first = 500
 
@@ -174,7 +178,11 @@ class AttackPattern:
                     edges {
                         node {
                             """
-            + (custom_attributes if custom_attributes is not None else self.properties)
+            + (
+                custom_attributes
+                if custom_attributes is not None
+                else get_projection(self.properties, projection)
+            )
             + """
                         }
                     }
@@ -189,37 +197,28 @@ class AttackPattern:
             }
         """
         )
-        result = self.opencti.query(
-            query,
-            {
-                "filters": filters,
-                "search": search,
-                "first": first,
-                "after": after,
-                "orderBy": order_by,
-                "orderMode": order_mode,
-            },
-        )
+        variables = {
+            "filters": filters,
+            "search": search,
+            "first": first,
+            "after": after,
+            "orderBy": order_by,
+            "orderMode": order_mode,
+        }
+        if stream:
+            return self.opencti.paginate(query, variables, "attackPatterns")
+        result = self.opencti.query(query, variables)
         if get_all:
             final_data = []
             data = self.opencti.process_multiple(result["data"]["attackPatterns"])
-            final_data = final_data + data
+            final_data.extend(data)
             while result["data"]["attackPatterns"]["pageInfo"]["hasNextPage"]:
                 after = result["data"]["attackPatterns"]["pageInfo"]["endCursor"]
                 self.opencti.log("info", "Listing Attack-Patterns after " + after)
-                result = self.opencti.query(
-                    query,
-                    {
-                        "filters": filters,
-                        "search": search,
-                        "first": first,
-                        "after": after,
-                        "orderBy": order_by,
-                        "orderMode": order_mode,
-                    },
-                )
+                variables["after"] = after
+                result = self.opencti.query(query, variables)
                 data = self.opencti.process_multiple(result["data"]["attackPatterns"])
-                final_data = final_data + data
+                final_data.extend(data)
             return final_data
         else:
             return self.opencti.process_multiple(
@@ -238,6 +237,7 @@ class AttackPattern:
         id = kwargs.get("id", None)
         filters = kwargs.get("filters", None)
         custom_attributes = kwargs.get("customAttributes", None)
+        projection = kwargs.get("projection", "full")
         if id is not None:
             self.opencti.log("info", "Reading Attack-Pattern {" + id + "}.")
             query = (
@@ -248,7 +248,7 @@ class AttackPattern:
                 + (
                     custom_attributes
                     if custom_attributes is not None
-                    else self.properties
+                    else get_projection(self.properties, projection)
                 )
                 + """
                     }
@@ -258,7 +258,7 @@ class AttackPattern:
             result = self.opencti.query(query, {"id": id})
             return self.opencti.process_multiple_fields(result["data"]["attackPattern"])
         elif filters is not None:
-            result = self.list(filters=filters)
+            result = self.list(filters=filters, projection=projection)
             if len(result) > 0:
                 return result[0]
             else:
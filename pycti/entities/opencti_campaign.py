@@ -2,6 +2,8 @@
 
 import json
 
+from pycti.utils.opencti_projection import get_projection
+
 
 class Campaign:
     def __init__(self, opencti):
@@ -146,6 +148,8 @@ class Campaign:
         custom_attributes = kwargs.get("customAttributes", None)
         get_all = kwargs.get("getAll", False)
         with_pagination = kwargs.get("withPagination", False)
+        stream = kwargs.get("stream", False)
+        projection = kwargs.get("projection", "full")
         if get_all:
             first = 500
 
@@ -159,7 +163,11 @@ class Campaign:
                     edges {
                         node {
                             """
-            + (custom_attributes if custom_attributes is not None else self.properties)
+            + (
+                custom_attributes
+                if custom_attributes is not None
+                else get_projection(self.properties, projection)
+            )
             + """
                         }
                     }
@@ -174,17 +182,17 @@ class Campaign:
             }
         """
         )
-        result = self.opencti.query(
-            query,
-            {
-                "filters": filters,
-                "search": search,
-                "first": first,
-                "after": after,
-                "orderBy": order_by,
-                "orderMode": order_mode,
-            },
-        )
+        variables = {
+            "filters": filters,
+            "search": search,
+            "first": first,
+            "after": after,
+            "orderBy": order_by,
+            "orderMode": order_mode,
+        }
+        if stream:
+            return self.opencti.paginate(query, variables, "campaigns")
+        result = self.opencti.query(query, variables)
         return self.opencti.process_multiple(
             result["data"]["campaigns"], with_pagination
         )
@@ -201,6 +209,7 @@ class Campaign:
         id = kwargs.get("id", None)
         filters = kwargs.get("filters", None)
         custom_attributes = kwargs.get("customAttributes", None)
+        projection = kwargs.get("projection", "full")
         if id is not None:
             self.opencti.log("info", "Reading Campaign {" + id + "}.")
             query = (
@@ -211,7 +220,7 @@ class Campaign:
                 + (
                     custom_attributes
                     if custom_attributes is not None
-                    else self.properties
+                    else get_projection(self.properties, projection)
                 )
                 + """
                     }
@@ -221,7 +230,7 @@ class Campaign:
             result = self.opencti.query(query, {"id": id})
             return self.opencti.process_multiple_fields(result["data"]["campaign"])
         elif filters is not None:
-            result = self.list(filters=filters)
+            result = self.list(filters=filters, projection=projection)
             if len(result) > 0:
                 return result[0]
             else:
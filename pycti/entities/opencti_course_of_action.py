@@ -2,6 +2,8 @@
 
 import json
 
+from pycti.utils.opencti_projection import get_projection
+
 
 class CourseOfAction:
     def __init__(self, opencti):
@@ -144,6 +146,8 @@ class CourseOfAction:
         custom_attributes = kwargs.get("customAttributes", None)
         get_all = kwargs.get("getAll", False)
         with_pagination = kwargs.get("withPagination", False)
+        stream = kwargs.get("stream", False)
+        projection = kwargs.get("projection", "full")
         if get_all:
             first = 500
 
@@ -158,7 +162,11 @@ class CourseOfAction:
                     edges {
                         node {
                             """
-            + (custom_attributes if custom_attributes is not None else self.properties)
+            + (
+                custom_attributes
+                if custom_attributes is not None
+                else get_projection(self.properties, projection)
+            )
             + """
                         }
                     }
@@ -173,17 +181,17 @@ class CourseOfAction:
             }
         """
         )
-        result = self.opencti.query(
-            query,
-            {
-                "filters": filters,
-                "search": search,
-                "first": first,
-                "after": after,
-                "orderBy": order_by,
-                "orderMode": order_mode,
-            },
-        )
+        variables = {
+            "filters": filters,
+            "search": search,
+            "first": first,
+            "after": after,
+            "orderBy": order_by,
+            "orderMode": order_mode,
+        }
+        if stream:
+            return self.opencti.paginate(query, variables, "coursesOfAction")
+        result = self.opencti.query(query, variables)
         return self.opencti.process_multiple(
             result["data"]["coursesOfAction"], with_pagination
         )
@@ -200,6 +208,7 @@ class CourseOfAction:
         id = kwargs.get("id", None)
         filters = kwargs.get("filters", None)
         custom_attributes = kwargs.get("customAttributes", None)
+        projection = kwargs.get("projection", "full")
         if id is not None:
             self.opencti.log("info", "Reading Course-Of-Action {" + id + "}.")
             query = (
@@ -210,7 +219,7 @@ class CourseOfAction:
                 + (
                     custom_attributes
                     if custom_attributes is not None
-                    else self.properties
+                    else get_projection(self.properties, projection)
                 )
                 + """
                     }
@@ -222,7 +231,7 @@ class CourseOfAction:
                 result["data"]["courseOfAction"]
             )
         elif filters is not None:
-            result = self.list(filters=filters)
+            result = self.list(filters=filters, projection=projection)
             if len(result) > 0:
                 return result[0]
             else:
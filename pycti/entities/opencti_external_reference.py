@@ -5,6 +5,8 @@ import os
 
 import magic
 
+from pycti.utils.opencti_projection import get_projection
+
 
 class ExternalReference:
     def __init__(self, opencti, file):
@@ -57,6 +59,8 @@ class ExternalReference:
         custom_attributes = kwargs.get("customAttributes", None)
         get_all = kwargs.get("getAll", False)
         with_pagination = kwargs.get("withPagination", False)
+        stream = kwargs.get("stream", False)
+        projection = kwargs.get("projection", "full")
         if get_all:
             first = 500
 
@@ -71,7 +75,11 @@ class ExternalReference:
                     edges {
                         node {
                             """
-            + (custom_attributes if custom_attributes is not None else self.properties)
+            + (
+                custom_attributes
+                if custom_attributes is not None
+                else get_projection(self.properties, projection)
+            )
             + """
                         }
                     }
@@ -86,16 +94,16 @@ class ExternalReference:
             }
         """
         )
-        result = self.opencti.query(
-            query,
-            {
-                "filters": filters,
-                "first": first,
-                "after": after,
-                "orderBy": order_by,
-                "orderMode": order_mode,
-            },
-        )
+        variables = {
+            "filters": filters,
+            "first": first,
+            "after": after,
+            "orderBy": order_by,
+            "orderMode": order_mode,
+        }
+        if stream:
+            return self.opencti.paginate(query, variables, "externalReferences")
+        result = self.opencti.query(query, variables)
         return self.opencti.process_multiple(
             result["data"]["externalReferences"], with_pagination
         )
@@ -111,6 +119,7 @@ class ExternalReference:
     def read(self, **kwargs):
         id = kwargs.get("id", None)
         filters = kwargs.get("filters", None)
+        projection = kwargs.get("projection", "full")
         if id is not None:
             self.opencti.log("info", "Reading External-Reference {" + id + "}.")
             query = (
@@ -118,7 +127,7 @@ class ExternalReference:
                 query ExternalReference($id: String!) {
                     externalReference(id: $id) {
                         """
-                + self.properties
+                + get_projection(self.properties, projection)
                 + """
                     }
                 }
@@ -129,7 +138,7 @@ class ExternalReference:
                 result["data"]["externalReference"]
             )
         elif filters is not None:
-            result = self.list(filters=filters)
+            result = self.list(filters=filters, projection=projection)
             if len(result) > 0:
                 return result[0]
             else:
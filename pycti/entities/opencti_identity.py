@@ -3,6 +3,7 @@
 import json
 
 from pycti.utils.constants import IdentityTypes
+from pycti.utils.opencti_projection import get_projection
 
 
 class Identity:
@@ -157,6 +158,8 @@ class Identity:
         custom_attributes = kwargs.get("customAttributes", None)
         get_all = kwargs.get("getAll", False)
         with_pagination = kwargs.get("withPagination", False)
+        stream = kwargs.get("stream", False)
+        projection = kwargs.get("projection", "full")
         if get_all:
             first = 500
 
@@ -170,7 +173,11 @@ class Identity:
                     edges {
                         node {
                             """
-            + (custom_attributes if custom_attributes is not None else self.properties)
+            + (
+                custom_attributes
+                if custom_attributes is not None
+                else get_projection(self.properties, projection)
+            )
             + """
                         }
                     }
@@ -185,18 +192,18 @@ class Identity:
             }
         """
         )
-        result = self.opencti.query(
-            query,
-            {
-                "types": types,
-                "filters": filters,
-                "search": search,
-                "first": first,
-                "after": after,
-                "orderBy": order_by,
-                "orderMode": order_mode,
-            },
-        )
+        variables = {
+            "types": types,
+            "filters": filters,
+            "search": search,
+            "first": first,
+            "after": after,
+            "orderBy": order_by,
+            "orderMode": order_mode,
+        }
+        if stream:
+            return self.opencti.paginate(query, variables, "identities")
+        result = self.opencti.query(query, variables)
         return self.opencti.process_multiple(
             result["data"]["identities"], with_pagination
         )
@@ -213,6 +220,7 @@ class Identity:
         id = kwargs.get("id", None)
         filters = kwargs.get("filters", None)
         custom_attributes = kwargs.get("customAttributes", None)
+        projection = kwargs.get("projection", "full")
         if id is not None:
             self.opencti.log("info", "Reading Identity {" + id + "}.")
             query = (
@@ -223,7 +231,7 @@ class Identity:
                 + (
                     custom_attributes
                     if custom_attributes is not None
-                    else self.properties
+                    else get_projection(self.properties, projection)
                 )
                 + """
                     }
@@ -233,7 +241,7 @@ class Identity:
             result = self.opencti.query(query, {"id": id})
             return self.opencti.process_multiple_fields(result["data"]["identity"])
         elif filters is not None:
-            result = self.list(filters=filters)
+            result = self.list(filters=filters, projection=projection)
             if len(result) > 0:
                 return result[0]
             else:
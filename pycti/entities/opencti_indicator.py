@@ -2,6 +2,8 @@
 
 import json
 
+from pycti.utils.opencti_projection import get_projection
+
 
 class Indicator:
     """Main Indicator class for OpenCTI
@@ -159,6 +161,25 @@ class Indicator:
                 }
             }
         """
+        self.add_query = """
+            mutation IndicatorAdd($input: IndicatorAddInput) {
+                indicatorAdd(input: $input) {
+                    id
+                    standard_id
+                    entity_type
+                    parent_types
+                    observables {
+                        edges {
+                            node {
+                                id
+                                standard_id
+                                entity_type
+                            }
+                        }
+                    }
+                }
+            }
+        """
 
     def list(self, **kwargs):
         """List Indicator objects
@@ -175,6 +196,8 @@ class Indicator:
         :param list customAttributes: (optional) list of attributes keys to return
         :param bool getAll: (optional) switch to return all entries (be careful to use this without any other filters)
         :param bool withPagination: (optional) switch to use pagination
+        :param bool stream: (optional) switch to return a generator iterating over all entries page by page
+        :param str projection: (optional) the projection of the returned fields: "`minimal`", "`standard`" or "`full`" (default)
 
         :return: List of Indicators
         :rtype: list
@@ -189,6 +212,8 @@ class Indicator:
         custom_attributes = kwargs.get("customAttributes", None)
         get_all = kwargs.get("getAll", False)
         with_pagination = kwargs.get("withPagination", False)
+        stream = kwargs.get("stream", False)
+        projection = kwargs.get("projection", "full")
         if get_all:
             first = 100
 
@@ -202,7 +227,11 @@ class Indicator:
                         edges {
                             node {
                                 """
-            + (custom_attributes if custom_attributes is not None else self.properties)
+            + (
+                custom_attributes
+                if custom_attributes is not None
+                else get_projection(self.properties, projection)
+            )
             + """
                         }
                     }
@@ -217,37 +246,28 @@ class Indicator:
             }
         """
         )
-        result = self.opencti.query(
-            query,
-            {
-                "filters": filters,
-                "search": search,
-                "first": first,
-                "after": after,
-                "orderBy": order_by,
-                "orderMode": order_mode,
-            },
-        )
+        variables = {
+            "filters": filters,
+            "search": search,
+            "first": first,
+            "after": after,
+            "orderBy": order_by,
+            "orderMode": order_mode,
+        }
+        if stream:
+            return self.opencti.paginate(query, variables, "indicators")
+        result = self.opencti.query(query, variables)
         if get_all:
             final_data = []
             data = self.opencti.process_multiple(result["data"]["indicators"])
-            final_data = final_data + data
+            final_data.extend(data)
             while result["data"]["indicators"]["pageInfo"]["hasNextPage"]:
                 after = result["data"]["indicators"]["pageInfo"]["endCursor"]
                 self.opencti.log("info", "Listing Indicators after " + after)
-                result = self.opencti.query(
-                    query,
-                    {
-                        "filters": filters,
-                        "search": search,
-                        "first": first,
-                        "after": after,
-                        "orderBy": order_by,
-                        "orderMode": order_mode,
-                    },
-                )
+                variables["after"] = after
+                result = self.opencti.query(query, variables)
                 data = self.opencti.process_multiple(result["data"]["indicators"])
-                final_data = final_data + data
+                final_data.extend(data)
             return final_data
         else:
             return self.opencti.process_multiple(
@@ -274,6 +294,7 @@ class Indicator:
         id = kwargs.get("id", None)
         filters = kwargs.get("filters", None)
         custom_attributes = kwargs.get("customAttributes", None)
+        projection = kwargs.get("projection", "full")
         if id is not None:
             self.opencti.log("info", "Reading Indicator {" + id + "}.")
             query = (
@@ -284,7 +305,7 @@ class Indicator:
                 + (
                     custom_attributes
                     if custom_attributes is not None
-                    else self.properties
+                    else get_projection(self.properties, projection)
                 )
                 + """
                     }
@@ -294,7 +315,11 @@ class Indicator:
             result = self.opencti.query(query, {"id": id})
             return self.opencti.process_multiple_fields(result["data"]["indicator"])
         elif filters is not None:
-            result = self.list(filters=filters, customAttributes=custom_attributes)
+            result = self.list(
+                filters=filters,
+                customAttributes=custom_attributes,
+                projection=projection,
+            )
             if len(result) > 0:
                 return result[0]
             else:
@@ -316,6 +341,62 @@ class Indicator:
         :return: Indicator object
         :rtype: Indicator
         """
+        input_variables = self._prepare_input(**kwargs)
+        if input_variables is not None:
+            self.opencti.log(
+                "info", "Creating Indicator {" + input_variables["name"] + "}."
+            )
+            result = self.opencti.query(self.add_query, {"input": input_variables})
+            return self.opencti.process_multiple_fields(result["data"]["indicatorAdd"])
+        else:
+            self.opencti.log(
+                "error",
+                "[opencti_indicator] Missing parameters: name or pattern or x_opencti_main_observable_type",
+            )
+
+    def create_many(self, items, chunk_size=100):
+        """
+        Create several Indicator objects, sending them in chunked requests
+
+        :param list items: the arguments of :py:meth:`create` for each Indicator
+        :param int chunk_size: (optional) the maximum number of Indicators created per request
+
+        :return: the created Indicators in the order of the items, the items which
+            failed are replaced by their error
+        :rtype: list
+        """
+        self.opencti.log("info", "Creating " + str(len(items)) + " Indicators.")
+        results = []
+        operations = []
+        for item in items:
+            input_variables = self._prepare_input(**item)
+            if input_variables is None:
+                results.append(
+                    ValueError(
+                        "Missing parameters: name or pattern or x_opencti_main_observable_type"
+                    )
+                )
+            else:
+                results.append(None)
+                operations.append((self.add_query, {"input": input_variables}))
+        responses = iter(
+            self.opencti.query_many(
+                operations, return_exceptions=True, max_operations=chunk_size
+            )
+        )
+        for index, result in enumerate(results):
+            if result is None:
+                response = next(responses)
+                results[index] = (
+                    response
+                    if isinstance(response, Exception)
+                    else self.opencti.process_multiple_fields(
+                        response["data"]["indicatorAdd"]
+                    )
+                )
+        return results
+
+    def _prepare_input(self, **kwargs):
         stix_id = kwargs.get("stix_id", None)
         created_by = kwargs.get("createdBy", None)
         object_marking = kwargs.get("objectMarking", None)
@@ -345,74 +426,40 @@ class Indicator:
         create_observables = kwargs.get("x_opencti_create_observables", False)
         update = kwargs.get("update", False)
 
-        if (
-            name is not None
-            and pattern is not None
-            and x_opencti_main_observable_type is not None
-        ):
-            if x_opencti_main_observable_type == "File":
-                x_opencti_main_observable_type = "StixFile"
-            self.opencti.log("info", "Creating Indicator {" + name + "}.")
-            query = """
-                mutation IndicatorAdd($input: IndicatorAddInput) {
-                    indicatorAdd(input: $input) {
-                        id
-                        standard_id
-                        entity_type
-                        parent_types
-                        observables {
-                            edges {
-                                node {
-                                    id
-                                    standard_id
-                                    entity_type
-                                }
-                            }
-                        }
-                    }
-                }
-            """
-            if pattern_type is None:
-                pattern_type = "stix2"
-            result = self.opencti.query(
-                query,
-                {
-                    "input": {
-                        "stix_id": stix_id,
-                        "createdBy": created_by,
-                        "objectMarking": object_marking,
-                        "objectLabel": object_label,
-                        "externalReferences": external_references,
-                        "revoked": revoked,
-                        "confidence": confidence,
-                        "lang": lang,
-                        "created": created,
-                        "modified": modified,
-                        "pattern_type": pattern_type,
-                        "pattern_version": pattern_version,
-                        "pattern": pattern,
-                        "name": name,
-                        "description": description,
-                        "indicator_types": indicator_types,
-                        "valid_until": valid_until,
-                        "valid_from": valid_from,
-                        "x_opencti_score": x_opencti_score,
-                        "x_opencti_detection": x_opencti_detection,
-                        "x_opencti_main_observable_type": x_opencti_main_observable_type,
-                        "x_mitre_platforms": x_mitre_platforms,
-                        "x_opencti_stix_ids": x_opencti_stix_ids,
-                        "killChainPhases": kill_chain_phases,
-                        "createObservables": create_observables,
-                        "update": update,
-                    }
-                },
-            )
-            return self.opencti.process_multiple_fields(result["data"]["indicatorAdd"])
-        else:
-            self.opencti.log(
-                "error",
-                "[opencti_indicator] Missing parameters: name or pattern or x_opencti_main_observable_type",
-            )
+        if name is None or pattern is None or x_opencti_main_observable_type is None:
+            return None
+        if x_opencti_main_observable_type == "File":
+            x_opencti_main_observable_type = "StixFile"
+        if pattern_type is None:
+            pattern_type = "stix2"
+        return {
+            "stix_id": stix_id,
+            "createdBy": created_by,
+            "objectMarking": object_marking,
+            "objectLabel": object_label,
+            "externalReferences": external_references,
+            "revoked": revoked,
+            "confidence": confidence,
+            "lang": lang,
+            "created": created,
+            "modified": modified,
+            "pattern_type": pattern_type,
+            "pattern_version": pattern_version,
+            "pattern": pattern,
+            "name": name,
+            "description": description,
+            "indicator_types": indicator_types,
+            "valid_until": valid_until,
+            "valid_from": valid_from,
+            "x_opencti_score": x_opencti_score,
+            "x_opencti_detection": x_opencti_detection,
+            "x_opencti_main_observable_type": x_opencti_main_observable_type,
+            "x_mitre_platforms": x_mitre_platforms,
+            "x_opencti_stix_ids": x_opencti_stix_ids,
+            "killChainPhases": kill_chain_phases,
+            "createObservables": create_observables,
+            "update": update,
+        }
 
     def add_stix_cyber_observable(self, **kwargs):
         """
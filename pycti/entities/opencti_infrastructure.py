@@ -2,6 +2,8 @@
 
 import json
 
+from pycti.utils.opencti_projection import get_projection
+
 
 class Infrastructure:
     """Main Infrastructure class for OpenCTI
@@ -159,6 +161,8 @@ class Infrastructure:
         :param list customAttributes: (optional) list of attributes keys to return
         :param bool getAll: (optional) switch to return all entries (be careful to use this without any other filters)
         :param bool withPagination: (optional) switch to use pagination
+        :param bool stream: (optional) switch to return a generator iterating over all entries page by page
+        :param str projection: (optional) the projection of the returned fields: "`minimal`", "`standard`" or "`full`" (default)
         """
 
         filters = kwargs.get("filters", None)
@@ -170,6 +174,8 @@ class Infrastructure:
         custom_attributes = kwargs.get("customAttributes", None)
         get_all = kwargs.get("getAll", False)
         with_pagination = kwargs.get("withPagination", False)
+        stream = kwargs.get("stream", False)
+        projection = kwargs.get("projection", "full")
         if get_all:
             first = 500
 
@@ -183,7 +189,11 @@ class Infrastructure:
                     edges {
                         node {
                             """
-            + (custom_attributes if custom_attributes is not None else self.properties)
+            + (
+                custom_attributes
+                if custom_attributes is not None
+                else get_projection(self.properties, projection)
+            )
             + """
                         }
                     }
@@ -198,38 +208,29 @@ class Infrastructure:
             }
         """
         )
-        result = self.opencti.query(
-            query,
-            {
-                "filters": filters,
-                "search": search,
-                "first": first,
-                "after": after,
-                "orderBy": order_by,
-                "orderMode": order_mode,
-            },
-        )
+        variables = {
+            "filters": filters,
+            "search": search,
+            "first": first,
+            "after": after,
+            "orderBy": order_by,
+            "orderMode": order_mode,
+        }
+        if stream:
+            return self.opencti.paginate(query, variables, "infrastructures")
+        result = self.opencti.query(query, variables)
 
         if get_all:
             final_data = []
             data = self.opencti.process_multiple(result["data"]["infrastructures"])
-            final_data = final_data + data
+            final_data.extend(data)
             while result["data"]["infrastructures"]["pageInfo"]["hasNextPage"]:
                 after = result["data"]["infrastructures"]["pageInfo"]["endCursor"]
                 self.opencti.log("info", "Listing Infrastructures after " + after)
-                result = self.opencti.query(
-                    query,
-                    {
-                        "filters": filters,
-                        "search": search,
-                        "first": first,
-                        "after": after,
-                        "orderBy": order_by,
-                        "orderMode": order_mode,
-                    },
-                )
+                variables["after"] = after
+                result = self.opencti.query(query, variables)
                 data = self.opencti.process_multiple(result["data"]["infrastructures"])
-                final_data = final_data + data
+                final_data.extend(data)
             return final_data
         else:
             return self.opencti.process_multiple(
@@ -253,6 +254,7 @@ class Infrastructure:
         id = kwargs.get("id", None)
         filters = kwargs.get("filters", None)
         custom_attributes = kwargs.get("customAttributes", None)
+        projection = kwargs.get("projection", "full")
         if id is not None:
             self.opencti.log("info", "Reading Infrastructure {" + id + "}.")
             query = (
@@ -263,7 +265,7 @@ class Infrastructure:
                 + (
                     custom_attributes
                     if custom_attributes is not None
-                    else self.properties
+                    else get_projection(self.properties, projection)
                 )
                 + """
                     }
@@ -275,7 +277,11 @@ class Infrastructure:
                 result["data"]["infrastructure"]
             )
         elif filters is not None:
-            result = self.list(filters=filters, customAttributes=custom_attributes)
+            result = self.list(
+                filters=filters,
+                customAttributes=custom_attributes,
+                projection=projection,
+            )
             if len(result) > 0:
                 return result[0]
             else:
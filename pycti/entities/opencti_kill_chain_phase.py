@@ -2,6 +2,8 @@
 
 import json
 
+from pycti.utils.opencti_projection import get_projection
+
 
 class KillChainPhase:
     def __init__(self, opencti):
@@ -38,6 +40,8 @@ class KillChainPhase:
         custom_attributes = kwargs.get("customAttributes", None)
         get_all = kwargs.get("getAll", False)
         with_pagination = kwargs.get("withPagination", False)
+        stream = kwargs.get("stream", False)
+        projection = kwargs.get("projection", "full")
         if get_all:
             first = 500
 
@@ -51,7 +55,11 @@ class KillChainPhase:
                     edges {
                         node {
                             """
-            + (custom_attributes if custom_attributes is not None else self.properties)
+            + (
+                custom_attributes
+                if custom_attributes is not None
+                else get_projection(self.properties, projection)
+            )
             + """
                         }
                     }
@@ -66,16 +74,16 @@ class KillChainPhase:
             }
         """
         )
-        result = self.opencti.query(
-            query,
-            {
-                "filters": filters,
-                "first": first,
-                "after": after,
-                "orderBy": order_by,
-                "orderMode": order_mode,
-            },
-        )
+        variables = {
+            "filters": filters,
+            "first": first,
+            "after": after,
+            "orderBy": order_by,
+            "orderMode": order_mode,
+        }
+        if stream:
+            return self.opencti.paginate(query, variables, "killChainPhases")
+        result = self.opencti.query(query, variables)
         return self.opencti.process_multiple(
             result["data"]["killChainPhases"], with_pagination
         )
@@ -91,6 +99,7 @@ class KillChainPhase:
     def read(self, **kwargs):
         id = kwargs.get("id", None)
         filters = kwargs.get("filters", None)
+        projection = kwargs.get("projection", "full")
         if id is not None:
             self.opencti.log("info", "Reading Kill-Chain-Phase {" + id + "}.")
             query = (
@@ -98,7 +107,7 @@ class KillChainPhase:
                 query KillChainPhase($id: String!) {
                     killChainPhase(id: $id) {
                         """
-                + self.properties
+                + get_projection(self.properties, projection)
                 + """
                     }
                 }
@@ -109,7 +118,7 @@ class KillChainPhase:
                 result["data"]["killChainPhase"]
             )
         elif filters is not None:
-            result = self.list(filters=filters)
+            result = self.list(filters=filters, projection=projection)
             if len(result) > 0:
                 return result[0]
             else:
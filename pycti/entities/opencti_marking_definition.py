@@ -2,6 +2,8 @@
 
 import json
 
+from pycti.utils.opencti_projection import get_projection
+
 
 class MarkingDefinition:
     def __init__(self, opencti):
@@ -39,6 +41,8 @@ class MarkingDefinition:
         custom_attributes = kwargs.get("customAttributes", None)
         get_all = kwargs.get("getAll", False)
         with_pagination = kwargs.get("withPagination", False)
+        stream = kwargs.get("stream", False)
+        projection = kwargs.get("projection", "full")
         if get_all:
             first = 500
 
@@ -53,7 +57,11 @@ class MarkingDefinition:
                     edges {
                         node {
                             """
-            + (custom_attributes if custom_attributes is not None else self.properties)
+            + (
+                custom_attributes
+                if custom_attributes is not None
+                else get_projection(self.properties, projection)
+            )
             + """
                         }
                     }
@@ -68,16 +76,16 @@ class MarkingDefinition:
             }
         """
         )
-        result = self.opencti.query(
-            query,
-            {
-                "filters": filters,
-                "first": first,
-                "after": after,
-                "orderBy": order_by,
-                "orderMode": order_mode,
-            },
-        )
+        variables = {
+            "filters": filters,
+            "first": first,
+            "after": after,
+            "orderBy": order_by,
+            "orderMode": order_mode,
+        }
+        if stream:
+            return self.opencti.paginate(query, variables, "markingDefinitions")
+        result = self.opencti.query(query, variables)
         return self.opencti.process_multiple(
             result["data"]["markingDefinitions"], with_pagination
         )
@@ -93,6 +101,7 @@ class MarkingDefinition:
     def read(self, **kwargs):
         id = kwargs.get("id", None)
         filters = kwargs.get("filters", None)
+        projection = kwargs.get("projection", "full")
         if id is not None:
             self.opencti.log("info", "Reading Marking-Definition {" + id + "}.")
             query = (
@@ -100,7 +109,7 @@ class MarkingDefinition:
                 query MarkingDefinition($id: String!) {
                     markingDefinition(id: $id) {
                         """
-                + self.properties
+                + get_projection(self.properties, projection)
                 + """
                     }
                 }
@@ -111,7 +120,7 @@ class MarkingDefinition:
                 result["data"]["markingDefinition"]
             )
         elif filters is not None:
-            result = self.list(filters=filters)
+            result = self.list(filters=filters, projection=projection)
             if len(result) > 0:
                 return result[0]
             else:
@@ -1,5 +1,7 @@
 # coding: utf-8
 
+from pycti.utils.opencti_projection import get_projection
+
 
 class StixCoreRelationship:
     def __init__(self, opencti):
@@ -312,6 +314,8 @@ class StixCoreRelationship:
         custom_attributes = kwargs.get("customAttributes", None)
         get_all = kwargs.get("getAll", False)
         with_pagination = kwargs.get("withPagination", False)
+        stream = kwargs.get("stream", False)
+        projection = kwargs.get("projection", "full")
         if get_all:
             first = 100
 
@@ -332,7 +336,11 @@ class StixCoreRelationship:
                         edges {
                             node {
                                 """
-            + (custom_attributes if custom_attributes is not None else self.properties)
+            + (
+                custom_attributes
+                if custom_attributes is not None
+                else get_projection(self.properties, projection)
+            )
             + """
                         }
                     }
@@ -347,59 +355,41 @@ class StixCoreRelationship:
             }
          """
         )
-        result = self.opencti.query(
-            query,
-            {
-                "elementId": element_id,
-                "fromId": from_id,
-                "fromTypes": from_types,
-                "toId": to_id,
-                "toTypes": to_types,
-                "relationship_type": relationship_type,
-                "startTimeStart": start_time_start,
-                "startTimeStop": start_time_stop,
-                "stopTimeStart": stop_time_start,
-                "stopTimeStop": stop_time_stop,
-                "filters": filters,
-                "first": first,
-                "after": after,
-                "orderBy": order_by,
-                "orderMode": order_mode,
-            },
-        )
+        variables = {
+            "elementId": element_id,
+            "fromId": from_id,
+            "fromTypes": from_types,
+            "toId": to_id,
+            "toTypes": to_types,
+            "relationship_type": relationship_type,
+            "startTimeStart": start_time_start,
+            "startTimeStop": start_time_stop,
+            "stopTimeStart": stop_time_start,
+            "stopTimeStop": stop_time_stop,
+            "filters": filters,
+            "first": first,
+            "after": after,
+            "orderBy": order_by,
+            "orderMode": order_mode,
+        }
+        if stream:
+            return self.opencti.paginate(query, variables, "stixCoreRelationships")
+        result = self.opencti.query(query, variables)
         if get_all:
             final_data = []
             data = self.opencti.process_multiple(
                 result["data"]["stixCoreRelationships"]
             )
-            final_data = final_data + data
+            final_data.extend(data)
             while result["data"]["stixCoreRelationships"]["pageInfo"]["hasNextPage"]:
                 after = result["data"]["stixCoreRelationships"]["pageInfo"]["endCursor"]
                 self.opencti.log("info", "Listing StixCoreRelationships after " + after)
-                result = self.opencti.query(
-                    query,
-                    {
-                        "elementId": element_id,
-                        "fromId": from_id,
-                        "fromTypes": from_types,
-                        "toId": to_id,
-                        "toTypes": to_types,
-                        "relationship_type": relationship_type,
-                        "startTimeStart": start_time_start,
-                        "startTimeStop": start_time_stop,
-                        "stopTimeStart": stop_time_start,
-                        "stopTimeStop": stop_time_stop,
-                        "filters": filters,
-                        "first": first,
-                        "after": after,
-                        "orderBy": order_by,
-                        "orderMode": order_mode,
-                    },
-                )
+                variables["after"] = after
+                result = self.opencti.query(query, variables)
                 data = self.opencti.process_multiple(
                     result["data"]["stixCoreRelationships"]
                 )
-                final_data = final_data + data
+                final_data.extend(data)
             return final_data
         else:
             return self.opencti.process_multiple(
@@ -432,6 +422,7 @@ class StixCoreRelationship:
         stop_time_start = kwargs.get("stopTimeStart", None)
         stop_time_stop = kwargs.get("stopTimeStop", None)
         custom_attributes = kwargs.get("customAttributes", None)
+        projection = kwargs.get("projection", "full")
         if id is not None:
             self.opencti.log("info", "Reading stix_core_relationship {" + id + "}.")
             query = (
@@ -442,7 +433,7 @@ class StixCoreRelationship:
                 + (
                     custom_attributes
                     if custom_attributes is not None
-                    else self.properties
+                    else get_projection(self.properties, projection)
                 )
                 + """
                     }
@@ -463,6 +454,7 @@ class StixCoreRelationship:
                 startTimeStop=start_time_stop,
                 stopTimeStart=stop_time_start,
                 stopTimeStop=stop_time_stop,
+                projection=projection,
             )
             if len(result) > 0:
                 return result[0]
@@ -5,6 +5,248 @@ import os
 
 import magic
 
+from pycti.utils.opencti_projection import get_projection
+
+# Creation argument and input fields of each observable type, a field is read
+# from the observable data key of the same name or given as
+# `(field, observable data key, default value)`
+OBSERVABLE_INPUTS = {
+    "Autonomous-System": ("AutonomousSystem", ["number", "name", "rir"]),
+    "Directory": ("Directory", ["path", "path_enc", "ctime", "mtime", "atime"]),
+    "Domain-Name": ("DomainName", ["value"]),
+    "Email-Addr": ("EmailAddr", ["value", "display_name"]),
+    "Email-Message": (
+        "EmailMessage",
+        [
+            "is_multipart",
+            ("attribute_date", "date", None),
+            "message_id",
+            "subject",
+            "received_lines",
+            "body",
+        ],
+    ),
+    "Email-Mime-Part-Type": (
+        "EmailMimePartType",
+        ["body", "content_type", "content_disposition"],
+    ),
+    "Artifact": (
+        "Artifact",
+        [
+            "hashes",
+            "mime_type",
+            "payload_bin",
+            "url",
+            "encryption_algorithm",
+            "decryption_key",
+        ],
+    ),
+    "StixFile": (
+        "StixFile",
+        [
+            "hashes",
+            "size",
+            "name",
+            "name_enc",
+            "magic_number_hex",
+            "mime_type",
+            "mtime",
+            "ctime",
+            "atime",
+            "x_opencti_additional_names",
+        ],
+    ),
+    "X509-Certificate": (
+        "X509Certificate",
+        [
+            "hashes",
+            ("is_self_signed", "is_self_signed", False),
+            "version",
+            "serial_number",
+            "signature_algorithm",
+            "issuer",
+            "validity_not_before",
+            "validity_not_after",
+            "subject",
+            "subject_public_key_algorithm",
+            "subject_public_key_modulus",
+            "subject_public_key_exponent",
+        ],
+    ),
+    "IPv4-Addr": ("IPv4Addr", ["value"]),
+    "IPv6-Addr": ("IPv6Addr", ["value"]),
+    "Mac-Addr": ("MacAddr", ["value"]),
+    "Mutex": ("Mutex", ["name"]),
+    "Network-Traffic": (
+        "NetworkTraffic",
+        [
+            "start",
+            "end",
+            "is_active",
+            "src_port",
+            "dst_port",
+            "protocols",
+            "src_byte_count",
+            "dst_byte_count",
+            "src_packets",
+            "dst_packets",
+        ],
+    ),
+    "Process": (
+        "Process",
+        [
+            "is_hidden",
+            "pid",
+            "created_time",
+            "cwd",
+            "command_line",
+            "environment_variables",
+        ],
+    ),
+    "Software": (
+        "Software",
+        ["name", "cpe", "swid", "languages", "vendor", "version"],
+    ),
+    "Url": ("Url", ["value"]),
+    "User-Account": (
+        "UserAccount",
+        [
+            "user_id",
+            "credential",
+            "account_login",
+            "account_type",
+            "display_name",
+            "is_service_account",
+            "is_privileged",
+            "can_escalate_privs",
+            "is_disabled",
+            "account_created",
+            "account_expires",
+            "credential_last_changed",
+            "account_first_login",
+            "account_last_login",
+        ],
+    ),
+    "Windows-Registry-Key": (
+        "WindowsRegistryKey",
+        [("attribute_key", "key", None), "modified_time", "number_of_subkeys"],
+    ),
+    "Windows-Registry-Value-Type": (
+        "WindowsRegistryValueType",
+        ["name", "data", "data_type"],
+    ),
+    "X509-V3-Extensions-Type": (
+        "X509V3ExtensionsType",
+        [
+            "basic_constraints",
+            "name_constraints",
+            "policy_constraints",
+            "key_usage",
+            "extended_key_usage",
+            "subject_key_identifier",
+            "authority_key_identifier",
+            "subject_alternative_name",
+            "issuer_alternative_name",
+            "subject_directory_attributes",
+            "crl_distribution_points",
+            "inhibit_any_policy",
+            "private_key_usage_period_not_before",
+            "private_key_usage_period_not_after",
+            "certificate_policies",
+            "policy_mappings",
+        ],
+    ),
+    "X-OpenCTI-Cryptographic-Key": ("XOpenCTICryptographicKey", ["value"]),
+    "X-OpenCTI-Cryptocurrency-Wallet": ("XOpenCTICryptocurrencyWallet", ["value"]),
+    "X-OpenCTI-Hostname": ("XOpenCTIHostname", ["value"]),
+    "X-OpenCTI-Text": ("XOpenCTIText", ["value"]),
+    "X-OpenCTI-User-Agent": ("XOpenCTIUserAgent", ["value"]),
+}
+OBSERVABLE_INPUT_FIELDS = {
+    type: (
+        argument,
+        [
+            field if isinstance(field, tuple) else (field, field, None)
+            for field in fields
+        ],
+    )
+    for type, (argument, fields) in OBSERVABLE_INPUTS.items()
+}
+
+# Observable types indexed by their lower case name
+OBSERVABLE_TYPES = {type.lower(): type for type in OBSERVABLE_INPUTS}
+OBSERVABLE_TYPES["file"] = "StixFile"
+
+
+def observable_add_query(argument=None):
+    """build the creation mutation of an observable type
+
+    :param argument: the creation argument of the observable type
+    :type argument: str, optional
+    :return: the GraphQL mutation only declaring the variables of the type
+    :rtype: str
+    """
+
+    return (
+        """
+        mutation StixCyberObservableAdd(
+            $type: String!,
+            $stix_id: String,
+            $x_opencti_score: Int,
+            $x_opencti_description: String,
+            $createIndicator: Boolean,
+            $createdBy: String,
+            $objectMarking: [String],
+            $objectLabel: [String],
+            $externalReferences: [String]"""
+        + (
+            ""
+            if argument is None
+            else ",\n            $" + argument + ": " + argument + "AddInput"
+        )
+        + """
+        ) {
+            stixCyberObservableAdd(
+                type: $type,
+                stix_id: $stix_id,
+                x_opencti_score: $x_opencti_score,
+                x_opencti_description: $x_opencti_description,
+                createIndicator: $createIndicator,
+                createdBy: $createdBy,
+                objectMarking: $objectMarking,
+                objectLabel: $objectLabel,
+                externalReferences: $externalReferences"""
+        + (
+            ""
+            if argument is None
+            else ",\n                " + argument + ": $" + argument
+        )
+        + """
+            ) {
+                id
+                standard_id
+                entity_type
+                parent_types
+                indicators {
+                    edges {
+                        node {
+                            id
+                            pattern
+                            pattern_type
+                        }
+                    }
+                }
+            }
+        }
+    """
+    )
+
+
+OBSERVABLE_ADD_QUERIES = {
+    type: observable_add_query(argument)
+    for type, (argument, _) in OBSERVABLE_INPUTS.items()
+}
+
 
 class StixCyberObservable:
     def __init__(self, opencti, file):
@@ -340,6 +582,8 @@ class StixCyberObservable:
         custom_attributes = kwargs.get("customAttributes", None)
         get_all = kwargs.get("getAll", False)
         with_pagination = kwargs.get("withPagination", False)
+        stream = kwargs.get("stream", False)
+        projection = kwargs.get("projection", "full")
 
         if get_all:
             first = 100
@@ -355,7 +599,11 @@ class StixCyberObservable:
                         edges {
                             node {
                                 """
-            + (custom_attributes if custom_attributes is not None else self.properties)
+            + (
+                custom_attributes
+                if custom_attributes is not None
+                else get_projection(self.properties, projection)
+            )
             + """
                         }
                     }
@@ -370,42 +618,32 @@ class StixCyberObservable:
             }
         """
         )
-        result = self.opencti.query(
-            query,
-            {
-                "types": types,
-                "filters": filters,
-                "search": search,
-                "first": first,
-                "after": after,
-                "orderBy": order_by,
-                "orderMode": order_mode,
-            },
-        )
+        variables = {
+            "types": types,
+            "filters": filters,
+            "search": search,
+            "first": first,
+            "after": after,
+            "orderBy": order_by,
+            "orderMode": order_mode,
+        }
+        if stream:
+            return self.opencti.paginate(query, variables, "stixCyberObservables")
+        result = self.opencti.query(query, variables)
 
         if get_all:
             final_data = []
             data = self.opencti.process_multiple(result["data"]["stixCyberObservables"])
-            final_data = final_data + data
+            final_data.extend(data)
             while result["data"]["stixCyberObservables"]["pageInfo"]["hasNextPage"]:
                 after = result["data"]["stixCyberObservables"]["pageInfo"]["endCursor"]
                 self.opencti.log("info", "Listing StixCyberObservables after " + after)
-                result = self.opencti.query(
-                    query,
-                    {
-                        "types": types,
-                        "filters": filters,
-                        "search": search,
-                        "first": first,
-                        "after": after,
-                        "orderBy": order_by,
-                        "orderMode": order_mode,
-                    },
-                )
+                variables["after"] = after
+                result = self.opencti.query(query, variables)
                 data = self.opencti.process_multiple(
                     result["data"]["stixCyberObservables"]
                 )
-                final_data = final_data + data
+                final_data.extend(data)
             return final_data
         else:
             return self.opencti.process_multiple(
@@ -424,6 +662,7 @@ class StixCyberObservable:
         id = kwargs.get("id", None)
         filters = kwargs.get("filters", None)
         custom_attributes = kwargs.get("customAttributes", None)
+        projection = kwargs.get("projection", "full")
         if id is not None:
             self.opencti.log("info", "Reading StixCyberObservable {" + id + "}.")
             query = (
@@ -434,7 +673,7 @@ class StixCyberObservable:
                 + (
                     custom_attributes
                     if custom_attributes is not None
-                    else self.properties
+                    else get_projection(self.properties, projection)
                 )
                 + """
                     }
@@ -446,7 +685,11 @@ class StixCyberObservable:
                 result["data"]["stixCyberObservable"]
             )
         elif filters is not None:
-            result = self.list(filters=filters, customAttributes=custom_attributes)
+            result = self.list(
+                filters=filters,
+                customAttributes=custom_attributes,
+                projection=projection,
+            )
             if len(result) > 0:
                 return result[0]
             else:
@@ -517,6 +760,71 @@ class StixCyberObservable:
     """
 
     def create(self, **kwargs):
+        observable = self._prepare_input(**kwargs)
+        if observable is not None:
+            type, input_variables = observable
+            self.opencti.log(
+                "info",
+                "Creating Stix-Cyber-Observable {"
+                + type
+                + "} with indicator at "
+                + str(input_variables["createIndicator"])
+                + ".",
+            )
+            result = self.opencti.query(
+                OBSERVABLE_ADD_QUERIES.get(type, observable_add_query()),
+                input_variables,
+            )
+            return self.opencti.process_multiple_fields(
+                result["data"]["stixCyberObservableAdd"]
+            )
+
+    """
+        Create several Stix-Observable objects, sending them in chunked requests
+
+        :param items: the arguments of create for each Stix-Observable
+        :param chunk_size: the maximum number of Stix-Observables created per request
+        :return the created Stix-Observable objects in the order of the items, the
+            items which failed are replaced by their error
+    """
+
+    def create_many(self, items, chunk_size=100):
+        self.opencti.log(
+            "info", "Creating " + str(len(items)) + " Stix-Cyber-Observables."
+        )
+        results = []
+        operations = []
+        for item in items:
+            observable = self._prepare_input(**item)
+            if observable is None:
+                results.append(ValueError("Missing parameters: type"))
+            else:
+                type, input_variables = observable
+                results.append(None)
+                operations.append(
+                    (
+                        OBSERVABLE_ADD_QUERIES.get(type, observable_add_query()),
+                        input_variables,
+                    )
+                )
+        responses = iter(
+            self.opencti.query_many(
+                operations, return_exceptions=True, max_operations=chunk_size
+            )
+        )
+        for index, result in enumerate(results):
+            if result is None:
+                response = next(responses)
+                results[index] = (
+                    response
+                    if isinstance(response, Exception)
+                    else self.opencti.process_multiple_fields(
+                        response["data"]["stixCyberObservableAdd"]
+                    )
+                )
+        return results
+
+    def _prepare_input(self, **kwargs):
         observable_data = kwargs.get("observableData", {})
         simple_observable_id = kwargs.get("simple_observable_id", None)
         simple_observable_key = kwargs.get("simple_observable_key", None)
@@ -548,23 +856,8 @@ class StixCyberObservable:
                 observable_data["type"].title() if "type" in observable_data else None
             )
         if type is None:
-            return
-        if type.lower() == "file":
-            type = "StixFile"
-        elif type.lower() == "ipv4-addr":
-            type = "IPv4-Addr"
-        elif type.lower() == "ipv6-addr":
-            type = "IPv6-Addr"
-        elif type.lower() == "x-opencti-hostname":
-            type = "X-OpenCTI-Hostname"
-        elif type.lower() == "x-opencti-cryptocurrency-wallet":
-            type = "X-OpenCTI-Cryptocurrency-Wallet"
-        elif type.lower() == "x-opencti-user-agent":
-            type = "X-OpenCTI-User-Agent"
-        elif type.lower() == "x-opencti-cryptographic-key":
-            type = "X-OpenCTI-Cryptographic-Key"
-        elif type.lower() == "x-opencti-text":
-            type = "X-OpenCTI-Text"
+            return None
+        type = OBSERVABLE_TYPES.get(type.lower(), type)
 
         x_opencti_description = (
             observable_data["x_opencti_description"]
@@ -605,548 +898,30 @@ class StixCyberObservable:
             for key, value in observable_data["hashes"].items():
                 hashes.append({"algorithm": key, "hash": value})
 
-        if type is not None:
-            self.opencti.log(
-                "info",
-                "Creating Stix-Cyber-Observable {"
-                + type
-                + "} with indicator at "
-                + str(create_indicator)
-                + ".",
-            )
-            input_variables = {
-                "type": type,
-                "stix_id": stix_id,
-                "x_opencti_score": x_opencti_score,
-                "x_opencti_description": x_opencti_description,
-                "createIndicator": create_indicator,
-                "createdBy": created_by,
-                "objectMarking": object_marking,
-                "objectLabel": object_label,
-                "externalReferences": external_references,
-                "update": update,
-            }
-            query = """
-                mutation StixCyberObservableAdd(
-                    $type: String!,
-                    $stix_id: String,
-                    $x_opencti_score: Int,
-                    $x_opencti_description: String,
-                    $createIndicator: Boolean,
-                    $createdBy: String,
-                    $objectMarking: [String],
-                    $objectLabel: [String],
-                    $externalReferences: [String],
-                    $AutonomousSystem: AutonomousSystemAddInput,
-                    $Directory: DirectoryAddInput,
-                    $DomainName: DomainNameAddInput,
-                    $EmailAddr: EmailAddrAddInput,
-                    $EmailMessage: EmailMessageAddInput,
-                    $EmailMimePartType: EmailMimePartTypeAddInput,
-                    $Artifact: ArtifactAddInput,
-                    $StixFile: StixFileAddInput,
-                    $X509Certificate: X509CertificateAddInput,
-                    $IPv4Addr: IPv4AddrAddInput,
-                    $IPv6Addr: IPv6AddrAddInput,
-                    $MacAddr: MacAddrAddInput,
-                    $Mutex: MutexAddInput,
-                    $NetworkTraffic: NetworkTrafficAddInput,
-                    $Process: ProcessAddInput,
-                    $Software: SoftwareAddInput,
-                    $Url: UrlAddInput,
-                    $UserAccount: UserAccountAddInput,
-                    $WindowsRegistryKey: WindowsRegistryKeyAddInput,
-                    $WindowsRegistryValueType: WindowsRegistryValueTypeAddInput,
-                    $X509V3ExtensionsType: X509V3ExtensionsTypeAddInput,
-                    $XOpenCTICryptographicKey: XOpenCTICryptographicKeyAddInput,
-                    $XOpenCTICryptocurrencyWallet: XOpenCTICryptocurrencyWalletAddInput,
-                    $XOpenCTIHostname: XOpenCTIHostnameAddInput
-                    $XOpenCTIText: XOpenCTITextAddInput,
-                    $XOpenCTIUserAgent: XOpenCTIUserAgentAddInput
-                ) {
-                    stixCyberObservableAdd(
-                        type: $type,
-                        stix_id: $stix_id,
-                        x_opencti_score: $x_opencti_score,
-                        x_opencti_description: $x_opencti_description,
-                        createIndicator: $createIndicator,
-                        createdBy: $createdBy,
-                        objectMarking: $objectMarking,
-                        objectLabel: $objectLabel,
-                        externalReferences: $externalReferences,
-                        AutonomousSystem: $AutonomousSystem,
-                        Directory: $Directory,
-                        DomainName: $DomainName,
-                        EmailAddr: $EmailAddr,
-                        EmailMessage: $EmailMessage,
-                        EmailMimePartType: $EmailMimePartType,
-                        Artifact: $Artifact,
-                        StixFile: $StixFile,
-                        X509Certificate: $X509Certificate,
-                        IPv4Addr: $IPv4Addr,
-                        IPv6Addr: $IPv6Addr,
-                        MacAddr: $MacAddr,
-                        Mutex: $Mutex,
-                        NetworkTraffic: $NetworkTraffic,
-                        Process: $Process,
-                        Software: $Software,
-                        Url: $Url,
-                        UserAccount: $UserAccount,
-                        WindowsRegistryKey: $WindowsRegistryKey,
-                        WindowsRegistryValueType: $WindowsRegistryValueType,
-                        X509V3ExtensionsType: $X509V3ExtensionsType,
-                        XOpenCTICryptographicKey: $XOpenCTICryptographicKey,
-                        XOpenCTICryptocurrencyWallet: $XOpenCTICryptocurrencyWallet,
-                        XOpenCTIHostname: $XOpenCTIHostname,
-                        XOpenCTIText: $XOpenCTIText,
-                        XOpenCTIUserAgent: $XOpenCTIUserAgent
-                    ) {
-                        id
-                        standard_id
-                        entity_type
-                        parent_types
-                        indicators {
-                            edges {
-                                node {
-                                    id
-                                    pattern
-                                    pattern_type
-                                }
-                            }
-                        }
-                    }
-                }
-            """
-            if type == "Autonomous-System":
-                input_variables["AutonomousSystem"] = {
-                    "number": observable_data["number"],
-                    "name": observable_data["name"]
-                    if "name" in observable_data
-                    else None,
-                    "rir": observable_data["rir"] if "rir" in observable_data else None,
-                }
-            elif type == "Directory":
-                input_variables["Directory"] = {
-                    "path": observable_data["path"],
-                    "path_enc": observable_data["path_enc"]
-                    if "path_enc" in observable_data
-                    else None,
-                    "ctime": observable_data["ctime"]
-                    if "ctime" in observable_data
-                    else None,
-                    "mtime": observable_data["mtime"]
-                    if "mtime" in observable_data
-                    else None,
-                    "atime": observable_data["atime"]
-                    if "atime" in observable_data
-                    else None,
-                }
-            elif type == "Domain-Name":
-                input_variables["DomainName"] = {"value": observable_data["value"]}
-                if attribute is not None:
-                    input_variables["DomainName"][attribute] = simple_observable_value
-            elif type == "Email-Addr":
-                input_variables["EmailAddr"] = {
-                    "value": observable_data["value"],
-                    "display_name": observable_data["display_name"]
-                    if "display_name" in observable_data
-                    else None,
-                }
-            elif type == "Email-Message":
-                input_variables["EmailMessage"] = {
-                    "is_multipart": observable_data["is_multipart"]
-                    if "is_multipart" in observable_data
-                    else None,
-                    "attribute_date": observable_data["attribute_date"]
-                    if "date" in observable_data
-                    else None,
-                    "message_id": observable_data["message_id"]
-                    if "message_id" in observable_data
-                    else None,
-                    "subject": observable_data["subject"]
-                    if "subject" in observable_data
-                    else None,
-                    "received_lines": observable_data["received_lines"]
-                    if "received_lines" in observable_data
-                    else None,
-                    "body": observable_data["body"]
-                    if "body" in observable_data
-                    else None,
-                }
-            elif type == "Email-Mime-Part-Type":
-                input_variables["EmailMimePartType"] = {
-                    "body": observable_data["body"]
-                    if "body" in observable_data
-                    else None,
-                    "content_type": observable_data["content_type"]
-                    if "content_type" in observable_data
-                    else None,
-                    "content_disposition": observable_data["content_disposition"]
-                    if "content_disposition" in observable_data
-                    else None,
-                }
-            elif type == "Artifact":
-                input_variables["Artifact"] = {
-                    "hashes": hashes if len(hashes) > 0 else None,
-                    "mime_type": observable_data["mime_type"]
-                    if "mime_type" in observable_data
-                    else None,
-                    "payload_bin": observable_data["payload_bin"]
-                    if "payload_bin" in observable_data
-                    else None,
-                    "url": observable_data["url"] if "url" in observable_data else None,
-                    "encryption_algorithm": observable_data["encryption_algorithm"]
-                    if "encryption_algorithm" in observable_data
-                    else None,
-                    "decryption_key": observable_data["decryption_key"]
-                    if "decryption_key" in observable_data
-                    else None,
-                }
-            elif type == "StixFile":
-                input_variables["StixFile"] = {
-                    "hashes": hashes if len(hashes) > 0 else None,
-                    "size": observable_data["size"]
-                    if "size" in observable_data
-                    else None,
-                    "name": observable_data["name"]
-                    if "name" in observable_data
-                    else None,
-                    "name_enc": observable_data["name_enc"]
-                    if "name_enc" in observable_data
-                    else None,
-                    "magic_number_hex": observable_data["magic_number_hex"]
-                    if "magic_number_hex" in observable_data
-                    else None,
-                    "mime_type": observable_data["mime_type"]
-                    if "mime_type" in observable_data
-                    else None,
-                    "mtime": observable_data["mtime"]
-                    if "mtime" in observable_data
-                    else None,
-                    "ctime": observable_data["ctime"]
-                    if "ctime" in observable_data
-                    else None,
-                    "atime": observable_data["atime"]
-                    if "atime" in observable_data
-                    else None,
-                    "x_opencti_additional_names": observable_data[
-                        "x_opencti_additional_names"
-                    ]
-                    if "x_opencti_additional_names" in observable_data
-                    else None,
-                }
-            elif type == "X509-Certificate":
-                input_variables["X509Certificate"] = {
-                    "hashes": hashes if len(hashes) > 0 else None,
-                    "is_self_signed": observable_data["is_self_signed"]
-                    if "is_self_signed" in observable_data
-                    else False,
-                    "version": observable_data["version"]
-                    if "version" in observable_data
-                    else None,
-                    "serial_number": observable_data["serial_number"]
-                    if "serial_number" in observable_data
-                    else None,
-                    "signature_algorithm": observable_data["signature_algorithm"]
-                    if "signature_algorithm" in observable_data
-                    else None,
-                    "issuer": observable_data["issuer"]
-                    if "issuer" in observable_data
-                    else None,
-                    "validity_not_before": observable_data["validity_not_before"]
-                    if "validity_not_before" in observable_data
-                    else None,
-                    "validity_not_after": observable_data["validity_not_after"]
-                    if "validity_not_after" in observable_data
-                    else None,
-                    "subject": observable_data["subject"]
-                    if "subject" in observable_data
-                    else None,
-                    "subject_public_key_algorithm": observable_data[
-                        "subject_public_key_algorithm"
-                    ]
-                    if "subject_public_key_algorithm" in observable_data
-                    else None,
-                    "subject_public_key_modulus": observable_data[
-                        "subject_public_key_modulus"
-                    ]
-                    if "subject_public_key_modulus" in observable_data
-                    else None,
-                    "subject_public_key_exponent": observable_data[
-                        "subject_public_key_exponent"
-                    ]
-                    if "subject_public_key_exponent" in observable_data
-                    else None,
-                }
-            elif type == "IPv4-Addr":
-                input_variables["IPv4Addr"] = {
-                    "value": observable_data["value"]
-                    if "value" in observable_data
-                    else None,
-                }
-            elif type == "IPv6-Addr":
-                input_variables["IPv6Addr"] = {
-                    "value": observable_data["value"]
-                    if "value" in observable_data
-                    else None,
-                }
-            elif type == "Mac-Addr":
-                input_variables["MacAddr"] = {
-                    "value": observable_data["value"]
-                    if "value" in observable_data
-                    else None,
-                }
-            elif type == "Mutex":
-                input_variables["Mutex"] = {
-                    "name": observable_data["name"]
-                    if "name" in observable_data
-                    else None,
-                }
-            elif type == "Network-Traffic":
-                input_variables["NetworkTraffic"] = {
-                    "start": observable_data["start"]
-                    if "start" in observable_data
-                    else None,
-                    "end": observable_data["end"] if "end" in observable_data else None,
-                    "is_active": observable_data["is_active"]
-                    if "is_active" in observable_data
-                    else None,
-                    "src_port": observable_data["src_port"]
-                    if "src_port" in observable_data
-                    else None,
-                    "dst_port": observable_data["dst_port"]
-                    if "dst_port" in observable_data
-                    else None,
-                    "protocols": observable_data["protocols"]
-                    if "protocols" in observable_data
-                    else None,
-                    "src_byte_count": observable_data["src_byte_count"]
-                    if "src_byte_count" in observable_data
-                    else None,
-                    "dst_byte_count": observable_data["dst_byte_count"]
-                    if "dst_byte_count" in observable_data
-                    else None,
-                    "src_packets": observable_data["src_packets"]
-                    if "src_packets" in observable_data
-                    else None,
-                    "dst_packets": observable_data["dst_packets"]
-                    if "dst_packets" in observable_data
-                    else None,
-                }
-            elif type == "Process":
-                input_variables["Process"] = {
-                    "is_hidden": observable_data["is_hidden"]
-                    if "is_hidden" in observable_data
-                    else None,
-                    "pid": observable_data["pid"] if "pid" in observable_data else None,
-                    "created_time": observable_data["created_time"]
-                    if "created_time" in observable_data
-                    else None,
-                    "cwd": observable_data["cwd"] if "cwd" in observable_data else None,
-                    "command_line": observable_data["command_line"]
-                    if "command_line" in observable_data
-                    else None,
-                    "environment_variables": observable_data["environment_variables"]
-                    if "environment_variables" in observable_data
-                    else None,
-                }
-            elif type == "Software":
-                input_variables["Software"] = {
-                    "name": observable_data["name"]
-                    if "name" in observable_data
-                    else None,
-                    "cpe": observable_data["cpe"] if "cpe" in observable_data else None,
-                    "swid": observable_data["swid"]
-                    if "swid" in observable_data
-                    else None,
-                    "languages": observable_data["languages"]
-                    if "languages" in observable_data
-                    else None,
-                    "vendor": observable_data["vendor"]
-                    if "vendor" in observable_data
-                    else None,
-                    "version": observable_data["version"]
-                    if "version" in observable_data
-                    else None,
-                }
-            elif type == "Url":
-                input_variables["Url"] = {
-                    "value": observable_data["value"]
-                    if "value" in observable_data
-                    else None,
-                }
-            elif type == "User-Account":
-                input_variables["UserAccount"] = {
-                    "user_id": observable_data["user_id"]
-                    if "user_id" in observable_data
-                    else None,
-                    "credential": observable_data["credential"]
-                    if "credential" in observable_data
-                    else None,
-                    "account_login": observable_data["account_login"]
-                    if "account_login" in observable_data
-                    else None,
-                    "account_type": observable_data["account_type"]
-                    if "account_type" in observable_data
-                    else None,
-                    "display_name": observable_data["display_name"]
-                    if "display_name" in observable_data
-                    else None,
-                    "is_service_account": observable_data["is_service_account"]
-                    if "is_service_account" in observable_data
-                    else None,
-                    "is_privileged": observable_data["is_privileged"]
-                    if "is_privileged" in observable_data
-                    else None,
-                    "can_escalate_privs": observable_data["can_escalate_privs"]
-                    if "can_escalate_privs" in observable_data
-                    else None,
-                    "is_disabled": observable_data["is_disabled"]
-                    if "is_disabled" in observable_data
-                    else None,
-                    "account_created": observable_data["account_created"]
-                    if "account_created" in observable_data
-                    else None,
-                    "account_expires": observable_data["account_expires"]
-                    if "account_expires" in observable_data
-                    else None,
-                    "credential_last_changed": observable_data[
-                        "credential_last_changed"
-                    ]
-                    if "credential_last_changed" in observable_data
-                    else None,
-                    "account_first_login": observable_data["account_first_login"]
-                    if "account_first_login" in observable_data
-                    else None,
-                    "account_last_login": observable_data["account_last_login"]
-                    if "account_last_login" in observable_data
-                    else None,
-                }
-            elif type == "Windows-Registry-Key":
-                input_variables["WindowsRegistryKey"] = {
-                    "attribute_key": observable_data["key"]
-                    if "key" in observable_data
-                    else None,
-                    "modified_time": observable_data["modified_time"]
-                    if "modified_time" in observable_data
-                    else None,
-                    "number_of_subkeys": observable_data["number_of_subkeys"]
-                    if "number_of_subkeys" in observable_data
-                    else None,
-                }
-            elif type == "Windows-Registry-Value-Type":
-                input_variables["WindowsRegistryKeyValueType"] = {
-                    "name": observable_data["name"]
-                    if "name" in observable_data
-                    else None,
-                    "data": observable_data["data"]
-                    if "data" in observable_data
-                    else None,
-                    "data_type": observable_data["data_type"]
-                    if "data_type" in observable_data
-                    else None,
-                }
-            elif type == "X509-V3-Extensions-Type":
-                input_variables["X509V3ExtensionsType"] = {
-                    "basic_constraints": observable_data["basic_constraints"]
-                    if "basic_constraints" in observable_data
-                    else None,
-                    "name_constraints": observable_data["name_constraints"]
-                    if "name_constraints" in observable_data
-                    else None,
-                    "policy_constraints": observable_data["policy_constraints"]
-                    if "policy_constraints" in observable_data
-                    else None,
-                    "key_usage": observable_data["key_usage"]
-                    if "key_usage" in observable_data
-                    else None,
-                    "extended_key_usage": observable_data["extended_key_usage"]
-                    if "extended_key_usage" in observable_data
-                    else None,
-                    "subject_key_identifier": observable_data["subject_key_identifier"]
-                    if "subject_key_identifier" in observable_data
-                    else None,
-                    "authority_key_identifier": observable_data[
-                        "authority_key_identifier"
-                    ]
-                    if "authority_key_identifier" in observable_data
-                    else None,
-                    "subject_alternative_name": observable_data[
-                        "subject_alternative_name"
-                    ]
-                    if "subject_alternative_name" in observable_data
-                    else None,
-                    "issuer_alternative_name": observable_data[
-                        "issuer_alternative_name"
-                    ]
-                    if "issuer_alternative_name" in observable_data
-                    else None,
-                    "subject_directory_attributes": observable_data[
-                        "subject_directory_attributes"
-                    ]
-                    if "subject_directory_attributes" in observable_data
-                    else None,
-                    "crl_distribution_points": observable_data[
-                        "crl_distribution_points"
-                    ]
-                    if "crl_distribution_points" in observable_data
-                    else None,
-                    "inhibit_any_policy": observable_data["inhibit_any_policy"]
-                    if "inhibit_any_policy" in observable_data
-                    else None,
-                    "private_key_usage_period_not_before": observable_data[
-                        "private_key_usage_period_not_before"
-                    ]
-                    if "private_key_usage_period_not_before" in observable_data
-                    else None,
-                    "private_key_usage_period_not_after": observable_data[
-                        "private_key_usage_period_not_after"
-                    ]
-                    if "private_key_usage_period_not_after" in observable_data
-                    else None,
-                    "certificate_policies": observable_data["certificate_policies"]
-                    if "certificate_policies" in observable_data
-                    else None,
-                    "policy_mappings": observable_data["policy_mappings"]
-                    if "policy_mappings" in observable_data
-                    else None,
-                }
-            elif type == "X-OpenCTI-Cryptographic-Key":
-                input_variables["XOpenCTICryptographicKey"] = {
-                    "value": observable_data["value"]
-                    if "value" in observable_data
-                    else None,
-                }
-            elif type == "X-OpenCTI-Cryptocurrency-Wallet":
-                input_variables["XOpenCTICryptocurrencyWallet"] = {
-                    "value": observable_data["value"]
-                    if "value" in observable_data
-                    else None,
-                }
-            elif type == "X-OpenCTI-Hostname":
-                input_variables["XOpenCTIHostname"] = {
-                    "value": observable_data["value"]
-                    if "value" in observable_data
-                    else None,
-                }
-            elif type == "X-OpenCTI-Text":
-                input_variables["XOpenCTIText"] = {
-                    "value": observable_data["value"]
-                    if "value" in observable_data
-                    else None,
-                }
-            elif type == "X-OpenCTI-User-Agent":
-                input_variables["XOpenCTIUserAgent"] = {
-                    "value": observable_data["value"]
-                    if "value" in observable_data
-                    else None,
-                }
-            result = self.opencti.query(query, input_variables)
-            return self.opencti.process_multiple_fields(
-                result["data"]["stixCyberObservableAdd"]
-            )
-        else:
-            self.opencti.log("error", "Missing parameters: type")
+        input_variables = {
+            "type": type,
+            "stix_id": stix_id,
+            "x_opencti_score": x_opencti_score,
+            "x_opencti_description": x_opencti_description,
+            "createIndicator": create_indicator,
+            "createdBy": created_by,
+            "objectMarking": object_marking,
+            "objectLabel": object_label,
+            "externalReferences": external_references,
+            "update": update,
+        }
+        if type in OBSERVABLE_INPUT_FIELDS:
+            argument, fields = OBSERVABLE_INPUT_FIELDS[type]
+            observable_input = {}
+            for field, key, default in fields:
+                if field == "hashes":
+                    observable_input[field] = hashes if len(hashes) > 0 else None
+                else:
+                    observable_input[field] = (
+                        observable_data[key] if key in observable_data else default
+                    )
+            input_variables[argument] = observable_input
+        return type, input_variables
 
     """
         Upload an artifact
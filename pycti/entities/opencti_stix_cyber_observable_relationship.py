@@ -1,5 +1,7 @@
 # coding: utf-8
 
+from pycti.utils.opencti_projection import get_projection
+
 
 class StixCyberObservableRelationship:
     def __init__(self, opencti):
@@ -69,6 +71,8 @@ class StixCyberObservableRelationship:
         custom_attributes = kwargs.get("customAttributes", None)
         get_all = kwargs.get("getAll", False)
         with_pagination = kwargs.get("withPagination", False)
+        stream = kwargs.get("stream", False)
+        projection = kwargs.get("projection", "full")
         if get_all:
             first = 500
 
@@ -89,7 +93,11 @@ class StixCyberObservableRelationship:
                     edges {
                         node {
                             """
-            + (custom_attributes if custom_attributes is not None else self.properties)
+            + (
+                custom_attributes
+                if custom_attributes is not None
+                else get_projection(self.properties, projection)
+            )
             + """
                         }
                     }
@@ -105,26 +113,28 @@ class StixCyberObservableRelationship:
          """
         )
 
-        result = self.opencti.query(
-            query,
-            {
-                "elementId": element_id,
-                "fromId": from_id,
-                "fromTypes": from_types,
-                "toId": to_id,
-                "toTypes": to_types,
-                "relationship_type": relationship_type,
-                "startTimeStart": start_time_start,
-                "startTimeStop": start_time_stop,
-                "stopTimeStart": stop_time_start,
-                "stopTimeStop": stop_time_stop,
-                "filters": filters,
-                "first": first,
-                "after": after,
-                "orderBy": order_by,
-                "orderMode": order_mode,
-            },
-        )
+        variables = {
+            "elementId": element_id,
+            "fromId": from_id,
+            "fromTypes": from_types,
+            "toId": to_id,
+            "toTypes": to_types,
+            "relationship_type": relationship_type,
+            "startTimeStart": start_time_start,
+            "startTimeStop": start_time_stop,
+            "stopTimeStart": stop_time_start,
+            "stopTimeStop": stop_time_stop,
+            "filters": filters,
+            "first": first,
+            "after": after,
+            "orderBy": order_by,
+            "orderMode": order_mode,
+        }
+        if stream:
+            return self.opencti.paginate(
+                query, variables, "stixCyberObservableRelationships"
+            )
+        result = self.opencti.query(query, variables)
         return self.opencti.process_multiple(
             result["data"]["stixCyberObservableRelationships"], with_pagination
         )
@@ -155,6 +165,7 @@ class StixCyberObservableRelationship:
         stop_time_start = kwargs.get("stopTimeStart", None)
         stop_time_stop = kwargs.get("stopTimeStop", None)
         custom_attributes = kwargs.get("customAttributes", None)
+        projection = kwargs.get("projection", "full")
         if id is not None:
             self.opencti.log(
                 "info", "Reading stix_observable_relationship {" + id + "}."
@@ -167,7 +178,7 @@ class StixCyberObservableRelationship:
                 + (
                     custom_attributes
                     if custom_attributes is not None
-                    else self.properties
+                    else get_projection(self.properties, projection)
                 )
                 + """
                     }
@@ -188,6 +199,7 @@ class StixCyberObservableRelationship:
                 startTimeStop=start_time_stop,
                 stopTimeStart=stop_time_start,
                 stopTimeStop=stop_time_stop,
+                projection=projection,
             )
             if len(result) > 0:
                 return result[0]
@@ -5,6 +5,8 @@ import os
 
 import magic
 
+from pycti.utils.opencti_projection import get_projection
+
 
 class StixDomainObject:
     def __init__(self, opencti, file):
@@ -423,6 +425,8 @@ class StixDomainObject:
         custom_attributes = kwargs.get("customAttributes", None)
         get_all = kwargs.get("getAll", False)
         with_pagination = kwargs.get("withPagination", False)
+        stream = kwargs.get("stream", False)
+        projection = kwargs.get("projection", "full")
         if get_all:
             first = 100
 
@@ -437,7 +441,11 @@ class StixDomainObject:
                         edges {
                             node {
                                 """
-            + (custom_attributes if custom_attributes is not None else self.properties)
+            + (
+                custom_attributes
+                if custom_attributes is not None
+                else get_projection(self.properties, projection)
+            )
             + """
                         }
                     }
@@ -452,42 +460,32 @@ class StixDomainObject:
             }
         """
         )
-        result = self.opencti.query(
-            query,
-            {
-                "types": types,
-                "filters": filters,
-                "search": search,
-                "first": first,
-                "after": after,
-                "orderBy": order_by,
-                "orderMode": order_mode,
-            },
-        )
+        variables = {
+            "types": types,
+            "filters": filters,
+            "search": search,
+            "first": first,
+            "after": after,
+            "orderBy": order_by,
+            "orderMode": order_mode,
+        }
+        if stream:
+            return self.opencti.paginate(query, variables, "stixDomainObjects")
+        result = self.opencti.query(query, variables)
 
         if get_all:
             final_data = []
             data = self.opencti.process_multiple(result["data"]["stixDomainObjects"])
-            final_data = final_data + data
+            final_data.extend(data)
             while result["data"]["stixDomainObjects"]["pageInfo"]["hasNextPage"]:
                 after = result["data"]["stixDomainObjects"]["pageInfo"]["endCursor"]
                 self.opencti.log("info", "Listing Stix-Domain-Entities after " + after)
-                result = self.opencti.query(
-                    query,
-                    {
-                        "types": types,
-                        "filters": filters,
-                        "search": search,
-                        "first": first,
-                        "after": after,
-                        "orderBy": order_by,
-                        "orderMode": order_mode,
-                    },
-                )
+                variables["after"] = after
+                result = self.opencti.query(query, variables)
                 data = self.opencti.process_multiple(
                     result["data"]["stixDomainObjects"]
                 )
-                final_data = final_data + data
+                final_data.extend(data)
             return final_data
         else:
             return self.opencti.process_multiple(
@@ -508,6 +506,7 @@ class StixDomainObject:
         types = kwargs.get("types", None)
         filters = kwargs.get("filters", None)
         custom_attributes = kwargs.get("customAttributes", None)
+        projection = kwargs.get("projection", "full")
         if id is not None:
             self.opencti.log("info", "Reading Stix-Domain-Object {" + id + "}.")
             query = (
@@ -518,7 +517,7 @@ class StixDomainObject:
                 + (
                     custom_attributes
                     if custom_attributes is not None
-                    else self.properties
+                    else get_projection(self.properties, projection)
                 )
                 + """
                     }
@@ -531,7 +530,10 @@ class StixDomainObject:
             )
         elif filters is not None:
             result = self.list(
-                types=types, filters=filters, customAttributes=custom_attributes
+                types=types,
+                filters=filters,
+                customAttributes=custom_attributes,
+                projection=projection,
             )
             if len(result) > 0:
                 return result[0]
@@ -1,5 +1,7 @@
 # coding: utf-8
 
+from pycti.utils.opencti_projection import get_projection
+
 
 class StixObjectOrStixRelationship:
     def __init__(self, opencti):
@@ -477,6 +479,7 @@ class StixObjectOrStixRelationship:
     def read(self, **kwargs):
         id = kwargs.get("id", None)
         custom_attributes = kwargs.get("customAttributes", None)
+        projection = kwargs.get("projection", "full")
         if id is not None:
             self.opencti.log(
                 "info", "Reading StixObjectOrStixRelationship {" + id + "}."
@@ -489,7 +492,7 @@ class StixObjectOrStixRelationship:
                 + (
                     custom_attributes
                     if custom_attributes is not None
-                    else self.properties
+                    else get_projection(self.properties, projection)
                 )
                 + """
                     }
@@ -1,5 +1,7 @@
 # coding: utf-8
 
+from pycti.utils.opencti_projection import get_projection
+
 
 class StixSightingRelationship:
     def __init__(self, opencti):
@@ -295,6 +297,8 @@ class StixSightingRelationship:
         custom_attributes = kwargs.get("customAttributes", None)
         get_all = kwargs.get("getAll", False)
         with_pagination = kwargs.get("withPagination", False)
+        stream = kwargs.get("stream", False)
+        projection = kwargs.get("projection", "full")
         if get_all:
             first = 100
 
@@ -313,7 +317,11 @@ class StixSightingRelationship:
                         edges {
                             node {
                                 """
-            + (custom_attributes if custom_attributes is not None else self.properties)
+            + (
+                custom_attributes
+                if custom_attributes is not None
+                else get_projection(self.properties, projection)
+            )
             + """
                         }
                     }
@@ -328,31 +336,31 @@ class StixSightingRelationship:
             }
          """
         )
-        result = self.opencti.query(
-            query,
-            {
-                "elementId": element_id,
-                "fromId": from_id,
-                "fromTypes": from_types,
-                "toId": to_id,
-                "toTypes": to_types,
-                "firstSeenStart": first_seen_start,
-                "firstSeenStop": first_seen_stop,
-                "lastSeenStart": last_seen_start,
-                "lastSeenStop": last_seen_stop,
-                "filters": filters,
-                "first": first,
-                "after": after,
-                "orderBy": order_by,
-                "orderMode": order_mode,
-            },
-        )
+        variables = {
+            "elementId": element_id,
+            "fromId": from_id,
+            "fromTypes": from_types,
+            "toId": to_id,
+            "toTypes": to_types,
+            "firstSeenStart": first_seen_start,
+            "firstSeenStop": first_seen_stop,
+            "lastSeenStart": last_seen_start,
+            "lastSeenStop": last_seen_stop,
+            "filters": filters,
+            "first": first,
+            "after": after,
+            "orderBy": order_by,
+            "orderMode": order_mode,
+        }
+        if stream:
+            return self.opencti.paginate(query, variables, "stixSightingRelationships")
+        result = self.opencti.query(query, variables)
         if get_all:
             final_data = []
             data = self.opencti.process_multiple(
                 result["data"]["stixSightingRelationships"]
             )
-            final_data = final_data + data
+            final_data.extend(data)
             while result["data"]["stixSightingRelationships"]["pageInfo"][
                 "hasNextPage"
             ]:
@@ -362,29 +370,12 @@ class StixSightingRelationship:
                 self.opencti.log(
                     "info", "Listing StixSightingRelationships after " + after
                 )
-                result = self.opencti.query(
-                    query,
-                    {
-                        "elementId": element_id,
-                        "fromId": from_id,
-                        "fromTypes": from_types,
-                        "toId": to_id,
-                        "toTypes": to_types,
-                        "firstSeenStart": first_seen_start,
-                        "firstSeenStop": first_seen_stop,
-                        "lastSeenStart": last_seen_start,
-                        "lastSeenStop": last_seen_stop,
-                        "filters": filters,
-                        "first": first,
-                        "after": after,
-                        "orderBy": order_by,
-                        "orderMode": order_mode,
-                    },
-                )
+                variables["after"] = after
+                result = self.opencti.query(query, variables)
                 data = self.opencti.process_multiple(
                     result["data"]["stixSightingRelationships"]
                 )
-                final_data = final_data + data
+                final_data.extend(data)
             return final_data
         else:
             return self.opencti.process_multiple(
@@ -414,6 +405,7 @@ class StixSightingRelationship:
         last_seen_start = kwargs.get("lastSeenStart", None)
         last_seen_stop = kwargs.get("lastSeenStop", None)
         custom_attributes = kwargs.get("customAttributes", None)
+        projection = kwargs.get("projection", "full")
         if id is not None:
             self.opencti.log("info", "Reading stix_sighting {" + id + "}.")
             query = (
@@ -424,7 +416,7 @@ class StixSightingRelationship:
                 + (
                     custom_attributes
                     if custom_attributes is not None
-                    else self.properties
+                    else get_projection(self.properties, projection)
                 )
                 + """
                     }
@@ -444,6 +436,7 @@ class StixSightingRelationship:
                 firstSeenStop=first_seen_stop,
                 lastSeenStart=last_seen_start,
                 lastSeenStop=last_seen_stop,
+                projection=projection,
             )
             if len(result) > 0:
                 return result[0]
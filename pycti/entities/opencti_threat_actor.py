@@ -3,6 +3,8 @@
 import json
 from typing import Union
 
+from pycti.utils.opencti_projection import get_projection
+
 
 class ThreatActor:
     """Main ThreatActor class for OpenCTI
@@ -155,6 +157,8 @@ class ThreatActor:
         :param bool orderMode: (optional) either "`asc`" or "`desc`"
         :param bool getAll: (optional) switch to return all entries (be careful to use this without any other filters)
         :param bool withPagination: (optional) switch to use pagination
+        :param bool stream: (optional) switch to return a generator iterating over all entries page by page
+        :param str projection: (optional) the projection of the returned fields: "`minimal`", "`standard`" or "`full`" (default)
         """
 
         filters = kwargs.get("filters", None)
@@ -166,6 +170,8 @@ class ThreatActor:
         custom_attributes = kwargs.get("customAttributes", None)
         get_all = kwargs.get("getAll", False)
         with_pagination = kwargs.get("withPagination", False)
+        stream = kwargs.get("stream", False)
+        projection = kwargs.get("projection", "full")
         if get_all:
             first = 500
 
@@ -179,7 +185,11 @@ class ThreatActor:
                     edges {
                         node {
                             """
-            + (custom_attributes if custom_attributes is not None else self.properties)
+            + (
+                custom_attributes
+                if custom_attributes is not None
+                else get_projection(self.properties, projection)
+            )
             + """
                         }
                     }
@@ -194,17 +204,17 @@ class ThreatActor:
             }
         """
         )
-        result = self.opencti.query(
-            query,
-            {
-                "filters": filters,
-                "search": search,
-                "first": first,
-                "after": after,
-                "orderBy": order_by,
-                "orderMode": order_mode,
-            },
-        )
+        variables = {
+            "filters": filters,
+            "search": search,
+            "first": first,
+            "after": after,
+            "orderBy": order_by,
+            "orderMode": order_mode,
+        }
+        if stream:
+            return self.opencti.paginate(query, variables, "threatActors")
+        result = self.opencti.query(query, variables)
         return self.opencti.process_multiple(
             result["data"]["threatActors"], with_pagination
         )
@@ -226,6 +236,7 @@ class ThreatActor:
         id = kwargs.get("id", None)
         filters = kwargs.get("filters", None)
         custom_attributes = kwargs.get("customAttributes", None)
+        projection = kwargs.get("projection", "full")
         if id is not None:
             self.opencti.log("info", "Reading Threat-Actor {" + id + "}.")
             query = (
@@ -236,7 +247,7 @@ class ThreatActor:
                 + (
                     custom_attributes
                     if custom_attributes is not None
-                    else self.properties
+                    else get_projection(self.properties, projection)
                 )
                 + """
                     }
@@ -246,7 +257,7 @@ class ThreatActor:
             result = self.opencti.query(query, {"id": id})
             return self.opencti.process_multiple_fields(result["data"]["threatActor"])
         elif filters is not None:
-            result = self.list(filters=filters)
+            result = self.list(filters=filters, projection=projection)
             if len(result) > 0:
                 return result[0]
             else:
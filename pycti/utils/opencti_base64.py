@@ -0,0 +1,39 @@
+# coding: utf-8
+
+import base64
+
+
+class Base64Writer:
+    """Writable buffer encoding the written bytes in base64
+
+    The bytes are encoded as they are written, the raw content is never held
+    in memory as a whole.
+    """
+
+    def __init__(self):
+        self._pending = b""
+        self._encoded = []
+
+    def write(self, data):
+        """encode written bytes
+
+        :param data: the written bytes
+        :type data: bytes
+        :return: the number of written bytes
+        :rtype: int
+        """
+
+        # Only whole groups of 3 bytes are encoded, the rest waits
+        pending = self._pending + data
+        end = len(pending) - len(pending) % 3
+        self._encoded.append(base64.b64encode(pending[:end]).decode("ascii"))
+        self._pending = pending[end:]
+        return len(data)
+
+    def getvalue(self):
+        """get the base64 encoding of the written bytes
+
+        :rtype: str
+        """
+
+        return "".join(self._encoded) + base64.b64encode(self._pending).decode("ascii")
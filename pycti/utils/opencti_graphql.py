@@ -0,0 +1,83 @@
+# coding: utf-8
+import re
+
+NAME = re.compile(r"[_A-Za-z][_0-9A-Za-z]*")
+# Strings and comments are matched first so that `$` inside them is kept as is
+VARIABLE = re.compile(
+    r'"""(?:\\"""|[^"]|"(?!""))*"""|"(?:\\.|[^"\\])*"|#[^\n]*|\$([_A-Za-z][_0-9A-Za-z]*)'
+)
+IGNORED = " \t\r\n,\ufeff"
+
+
+def skip_ignored(document, index):
+    """return the index of the next GraphQL token from `index`
+
+    Whitespaces, commas and comments are skipped.
+
+    :param document: the GraphQL document
+    :type document: str
+    :param index: the position to start from
+    :type index: int
+    :return: the position of the next token, or the document length
+    :rtype: int
+    """
+
+    while index < len(document):
+        if document[index] in IGNORED:
+            index += 1
+        elif document[index] == "#":
+            end = document.find("\n", index)
+            index = len(document) if end == -1 else end
+        else:
+            break
+    return index
+
+
+def skip_block(document, index):
+    """return the index following the bracket block opening at `index`
+
+    :param document: the GraphQL document
+    :type document: str
+    :param index: the position of the opening bracket
+    :type index: int
+    :return: the position after the matching closing bracket
+    :rtype: int
+    """
+
+    depth = 0
+    while index < len(document):
+        char = document[index]
+        if char == '"':
+            match = VARIABLE.match(document, index)
+            if match is None:
+                raise ValueError("Unterminated string in GraphQL document")
+            index = match.end()
+            continue
+        if char == "#":
+            index = skip_ignored(document, index)
+            continue
+        if char in "({[":
+            depth += 1
+        elif char in ")}]":
+            depth -= 1
+            if depth == 0:
+                return index + 1
+        index += 1
+    raise ValueError("Unbalanced GraphQL document")
+
+
+def read_name(document, index):
+    """read the GraphQL name starting at `index`
+
+    :param document: the GraphQL document
+    :type document: str
+    :param index: the position of the name
+    :type index: int
+    :return: the name and the position following it
+    :rtype: tuple
+    """
+
+    match = NAME.match(document, index)
+    if match is None:
+        raise ValueError("Unexpected GraphQL token at position " + str(index))
+    return match.group(0), match.end()
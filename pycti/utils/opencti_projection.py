@@ -0,0 +1,236 @@
+# coding: utf-8
+import functools
+
+from pycti.utils.opencti_graphql import read_name, skip_block, skip_ignored
+
+PROJECTIONS = ["minimal", "standard", "full"]
+
+# Fields identifying any OpenCTI object, kept by the minimal projection
+MINIMAL_FIELDS = ["id", "standard_id", "entity_type", "parent_types"]
+
+CREATED_BY_FRAGMENT = """
+    createdBy {
+        ... on Identity {
+            id
+            standard_id
+            entity_type
+            parent_types
+            identity_class
+            name
+        }
+    }
+"""
+
+OBJECT_MARKING_FRAGMENT = """
+    objectMarking {
+        edges {
+            node {
+                id
+                standard_id
+                entity_type
+                definition_type
+                definition
+                x_opencti_order
+                x_opencti_color
+            }
+        }
+    }
+"""
+
+OBJECT_LABEL_FRAGMENT = """
+    objectLabel {
+        edges {
+            node {
+                id
+                value
+                color
+            }
+        }
+    }
+"""
+
+EXTERNAL_REFERENCES_FRAGMENT = """
+    externalReferences {
+        edges {
+            node {
+                id
+                standard_id
+                entity_type
+                source_name
+                description
+                url
+                hash
+                external_id
+            }
+        }
+    }
+"""
+
+KILL_CHAIN_PHASES_FRAGMENT = """
+    killChainPhases {
+        edges {
+            node {
+                id
+                standard_id
+                entity_type
+                kill_chain_name
+                phase_name
+                x_opencti_order
+            }
+        }
+    }
+"""
+
+# Selection set of a related object, only referencing it
+REFERENCE_SELECTION = """{
+        ... on BasicObject {
+            id
+            standard_id
+            entity_type
+            parent_types
+        }
+        ... on BasicRelationship {
+            id
+            standard_id
+            entity_type
+            parent_types
+        }
+    }"""
+
+# Selection set of a connection of related objects, only referencing them
+REFERENCES_SELECTION = "{ edges { node " + REFERENCE_SELECTION + " } }"
+
+# Nested fields replaced by a shared fragment in the standard projection
+STANDARD_FRAGMENTS = {
+    "createdBy": CREATED_BY_FRAGMENT,
+    "objectMarking": OBJECT_MARKING_FRAGMENT,
+    "objectLabel": OBJECT_LABEL_FRAGMENT,
+    "externalReferences": EXTERNAL_REFERENCES_FRAGMENT,
+    "killChainPhases": KILL_CHAIN_PHASES_FRAGMENT,
+}
+
+# Related objects reduced to references in the standard projection
+STANDARD_REFERENCE = ["from", "to"]
+
+# Connections processed by `process_multiple_fields`, reduced to references
+STANDARD_REFERENCES = [
+    "objects",
+    "observables",
+    "indicators",
+    "reports",
+    "notes",
+    "opinions",
+    "stixCoreRelationships",
+]
+
+# Nested fields left out of the standard projection
+STANDARD_EXCLUDED = ["importFiles"]
+
+
+def _selections(selection):
+    """split a selection set into its `(name, head, selection set)` selections
+
+    The name of an inline fragment is `...`, the selection set is None for
+    a leaf field.
+    """
+
+    selections = []
+    index = skip_ignored(selection, 0)
+    while index < len(selection):
+        start = index
+        if selection.startswith("...", index):
+            name = "..."
+            index = skip_ignored(selection, index + 3)
+            if selection.startswith("on", index):
+                _, index = read_name(selection, index)
+                index = skip_ignored(selection, index)
+                _, index = read_name(selection, index)
+        else:
+            name, index = read_name(selection, index)
+            index = skip_ignored(selection, index)
+            if selection.startswith(":", index):
+                index = skip_ignored(selection, index + 1)
+                name, index = read_name(selection, index)
+        index = skip_ignored(selection, index)
+        if selection.startswith("(", index):
+            index = skip_ignored(selection, skip_block(selection, index))
+        while selection.startswith("@", index):
+            _, index = read_name(selection, index + 1)
+            index = skip_ignored(selection, index)
+            if selection.startswith("(", index):
+                index = skip_ignored(selection, skip_block(selection, index))
+        head = selection[start:index].strip()
+        body = None
+        if selection.startswith("{", index):
+            end = skip_block(selection, index)
+            body = selection[index + 1 : end - 1]
+            index = end
+        selections.append((name, head, body))
+        index = skip_ignored(selection, index)
+    return selections
+
+
+def _minimal(selection):
+    fields = []
+    for name, head, body in _selections(selection):
+        if name == "...":
+            fragment = _minimal(body)
+            if len(fragment.strip()) > 0:
+                fields.append(head + " {" + fragment + "}")
+        elif name in MINIMAL_FIELDS and body is None:
+            fields.append(head)
+    return "\n" + "\n".join(fields) + "\n"
+
+
+def _standard(selection):
+    fields = []
+    for name, head, body in _selections(selection):
+        if name == "...":
+            fields.append(head + " {" + _standard(body) + "}")
+        elif name in STANDARD_EXCLUDED:
+            continue
+        elif name in STANDARD_FRAGMENTS:
+            fields.append(STANDARD_FRAGMENTS[name].strip())
+        elif name in STANDARD_REFERENCE:
+            fields.append(head + " " + REFERENCE_SELECTION)
+        elif name in STANDARD_REFERENCES:
+            fields.append(head + " " + REFERENCES_SELECTION)
+        elif body is not None:
+            fields.append(head + " {" + body + "}")
+        else:
+            fields.append(head)
+    return "\n" + "\n".join(fields) + "\n"
+
+
+@functools.lru_cache(maxsize=256)
+def get_projection(properties, projection="full"):
+    """derive a projection level from the properties of an entity
+
+    - `minimal`: only the fields identifying the objects (`id`, `standard_id`,
+      `entity_type`, `parent_types`)
+    - `standard`: the fields of the entity, with compact shared fragments for
+      the nested creator, markings, labels, external references and kill chain
+      phases, only the references of the related objects and without files
+    - `full`: all the properties
+
+    :param properties: the GraphQL selection set of the entity
+    :type properties: str
+    :param projection: the projection level, defaults to `full`
+    :type projection: str, optional
+    :raises ValueError: if the projection level is unknown
+    :return: the GraphQL selection set of the projection
+    :rtype: str
+    """
+
+    if projection is None or projection == "full":
+        return properties
+    if projection == "minimal":
+        return _minimal(properties)
+    if projection == "standard":
+        return _standard(properties)
+    raise ValueError(
+        "Unknown projection: "
+        + str(projection)
+        + ", expected one of "
+        + ", ".join(PROJECTIONS)
+    )
@@ -1,11 +1,16 @@
 # coding: utf-8
 
 import base64
+import contextvars
 import datetime
+import functools
+import gzip
+import io
 import json
 import os
 import uuid
-from typing import Any, Dict, List, Optional, Union
+from concurrent.futures import ThreadPoolExecutor
+from typing import IO, Any, Dict, Iterator, List, Optional, TextIO, Union
 
 import datefinder
 import dateutil.parser
@@ -13,7 +18,16 @@ import pytz
 
 from pycti.entities.opencti_identity import Identity
 from pycti.utils.constants import IdentityTypes, LocationTypes, StixCyberObservableTypes
+from pycti.utils.opencti_base64 import Base64Writer
+from pycti.utils.opencti_stix2_cache import OpenCTIStix2MemoryCache
+from pycti.utils.opencti_stix2_export import (
+    OpenCTIStix2ExportIndex,
+    export_memo,
+    memoize,
+)
+from pycti.utils.opencti_stix2_scheduler import OpenCTIStix2Scheduler
 from pycti.utils.opencti_stix2_splitter import OpenCTIStix2Splitter
+from pycti.utils.opencti_stix2_stream import OpenCTIStix2BundleIndex, iter_bundle
 from pycti.utils.opencti_stix2_update import OpenCTIStix2Update
 from pycti.utils.opencti_stix2_utils import OBSERVABLES_VALUE_INT
 
@@ -28,12 +42,31 @@ class OpenCTIStix2:
     """Python API for Stix2 in OpenCTI
 
     :param opencti: OpenCTI instance
+    :param mapping_cache: cache of the imported objects, defaults to an
+        :py:class:`~pycti.utils.opencti_stix2_cache.OpenCTIStix2MemoryCache`,
+        an :py:class:`~pycti.utils.opencti_stix2_cache.OpenCTIStix2SqliteCache`
+        keeps it across restarts
+    :param export_file_max_size: size in bytes above which the exported files
+        are referenced by their download URI instead of inlined, defaults to
+        None (always inlined)
+    :param export_file_workers: number of files downloaded at once during an
+        export, defaults to 4
     """
 
-    def __init__(self, opencti):
+    def __init__(
+        self,
+        opencti,
+        mapping_cache=None,
+        export_file_max_size=None,
+        export_file_workers=4,
+    ):
         self.opencti = opencti
+        self.export_file_max_size = export_file_max_size
+        self.export_file_workers = export_file_workers
         self.stix2_update = OpenCTIStix2Update(opencti)
-        self.mapping_cache = {}
+        self.mapping_cache = (
+            mapping_cache if mapping_cache is not None else OpenCTIStix2MemoryCache()
+        )
 
     ######### UTILS
     # region utils
@@ -80,11 +113,12 @@ class OpenCTIStix2:
 
         return date_value.isoformat(timespec="milliseconds").replace("+00:00", "Z")
 
-    def filter_objects(self, uuids: List, objects: List) -> List:
+    def filter_objects(self, uuids: Any, objects: List) -> List:
         """filters objects based on UUIDs
 
-        :param uuids: list of UUIDs
-        :type uuids: list
+        :param uuids: UUIDs to exclude, preferably a set or an
+            :py:class:`~pycti.utils.opencti_stix2_export.OpenCTIStix2ExportIndex`
+        :type uuids: Any
         :param objects: list of objects to filter
         :type objects: list
         :return: list of filtered objects
@@ -156,8 +190,13 @@ class OpenCTIStix2:
         return False
 
     def import_bundle_from_file(
-        self, file_path: str, update: bool = False, types: List = None
-    ) -> Optional[List]:
+        self,
+        file_path: str,
+        update: bool = False,
+        types: List = None,
+        max_workers: int = 1,
+        stream: bool = False,
+    ) -> Optional[Union[List, int]]:
         """import a stix2 bundle from a file
 
         :param file_path: valid path to the file
@@ -166,15 +205,23 @@ class OpenCTIStix2:
         :type update: bool, optional
         :param types: list of stix2 types, defaults to None
         :type types: list, optional
-        :return: list of imported stix2 objects
+        :param max_workers: number of objects imported concurrently, defaults to 1
+        :type max_workers: int, optional
+        :param stream: import the file without loading it in memory, see
+            :py:meth:`import_bundle_stream`, defaults to False
+        :type stream: bool, optional
+        :return: list of imported stix2 objects, their number when streaming
         :rtype: List
         """
         if not os.path.isfile(file_path):
             self.opencti.log("error", "The bundle file does not exists")
             return None
+        if stream:
+            with open(file_path, encoding="utf-8") as file:
+                return self.import_bundle_stream(file, update, types, max_workers)
         with open(os.path.join(file_path)) as file:
             data = json.load(file)
-        return self.import_bundle(data, update, types)
+        return self.import_bundle(data, update, types, max_workers)
 
     def import_bundle_from_json(
         self,
@@ -182,6 +229,8 @@ class OpenCTIStix2:
         update: bool = False,
         types: List = None,
         retry_number: int = None,
+        max_workers: int = 1,
+        content_encoding: str = None,
     ) -> List:
         """import a stix2 bundle from JSON data
 
@@ -191,16 +240,28 @@ class OpenCTIStix2:
         :type update: bool, optional
         :param types: list of stix2 types, defaults to None
         :type types: list, optional
+        :param max_workers: number of objects imported concurrently, defaults to 1
+        :type max_workers: int, optional
+        :param content_encoding: compression of the JSON data, `gzip` or None,
+            defaults to None
+        :type content_encoding: str, optional
+        :raises ValueError: if the content encoding is unknown
         :return: list of imported stix2 objects
         :rtype: List
         """
-        self.opencti.set_retry_number(retry_number)
+        if content_encoding == "gzip":
+            json_data = gzip.decompress(json_data)
+        elif content_encoding is not None:
+            raise ValueError("Unknown content encoding: " + content_encoding)
         data = json.loads(json_data)
-        return self.import_bundle(
-            data,
-            update,
-            types,
-        )
+        # Local to the import, concurrent imports may share the client
+        with self.opencti.request_context(retry_number=retry_number):
+            return self.import_bundle(
+                data,
+                update,
+                types,
+                max_workers,
+            )
 
     def resolve_author(self, title: str) -> Optional[Identity]:
         if "fireeye" in title.lower() or "mandiant" in title.lower():
@@ -244,16 +305,140 @@ class OpenCTIStix2:
         return None
 
     def get_author(self, name: str) -> Identity:
-        if name in self.mapping_cache:
-            return self.mapping_cache[name]
-        else:
+        author = self.mapping_cache.get(name)
+        if author is None:
             author = self.opencti.identity.create(
                 type="Organization",
                 name=name,
                 description="",
             )
             self.mapping_cache[name] = author
-            return author
+        return author
+
+    def get_label_id(self, value: str, color: str = None) -> Optional[str]:
+        """get the id of a label, created if needed and cached
+
+        :param value: value of the label
+        :type value: str
+        :param color: color of the label if it is created, defaults to None
+        :type color: str, optional
+        :return: the id of the label or None if it could not be created
+        :rtype: str
+        """
+
+        label_key = "label_" + value
+        cached_label = self.mapping_cache.get(label_key)
+        if cached_label is not None:
+            return cached_label["id"]
+        label = self.opencti.label.create(value=value, color=color)
+        if label is None:
+            return None
+        self.mapping_cache[label_key] = {"id": label["id"]}
+        return label["id"]
+
+    def prefetch_vocabulary(
+        self, objects: List, types: List = None, event_version: str = None
+    ) -> None:
+        """create the labels, kill chain phases and external references of
+        objects once
+
+        The distinct values of the objects that will be imported are created
+        in batches and put in the mapping cache, so the import of each object
+        finds them there.
+
+        :param objects: valid stix2 objects
+        :type objects: list
+        :param types: the types to import, defaults to all
+        :type types: list, optional
+        :param event_version: the OpenCTI event version of the bundle
+        :type event_version: str, optional
+        """
+
+        labels = {}
+        kill_chain_phases = {}
+        external_references = {}
+        for item in objects:
+            if not self.is_imported(item, types, event_version):
+                continue
+            for label in item.get("labels", item.get("x_opencti_labels", [])):
+                labels.setdefault(label, None)
+            if "labels" not in item and "x_opencti_labels" not in item:
+                for tag in item.get("x_opencti_tags", []):
+                    labels.setdefault(tag["value"], tag.get("color"))
+            for kill_chain_phase in item.get("kill_chain_phases", []):
+                kill_chain_phases.setdefault(
+                    kill_chain_phase["kill_chain_name"]
+                    + kill_chain_phase["phase_name"],
+                    kill_chain_phase,
+                )
+            for external_reference in item.get("external_references", []):
+                if "url" in external_reference and "source_name" in external_reference:
+                    external_references.setdefault(
+                        external_reference["url"], external_reference
+                    )
+
+        operations = {}
+        for label, color in labels.items():
+            if "label_" + label not in self.mapping_cache:
+                operations["label_" + label] = (
+                    self.opencti.label.create,
+                    {"value": label, "color": color},
+                    False,
+                )
+        for key, kill_chain_phase in kill_chain_phases.items():
+            if key not in self.mapping_cache:
+                operations[key] = (
+                    self.opencti.kill_chain_phase.create,
+                    {
+                        "stix_id": kill_chain_phase.get("id"),
+                        "kill_chain_name": kill_chain_phase["kill_chain_name"],
+                        "phase_name": kill_chain_phase["phase_name"],
+                        "x_opencti_order": kill_chain_phase.get("x_opencti_order", 0),
+                    },
+                    True,
+                )
+        for url, external_reference in external_references.items():
+            if url not in self.mapping_cache:
+                operations[url] = (
+                    self.opencti.external_reference.create,
+                    {
+                        "source_name": external_reference["source_name"],
+                        "url": url,
+                        "external_id": external_reference.get("external_id"),
+                        "description": external_reference.get("description"),
+                    },
+                    True,
+                )
+        if len(operations) == 0:
+            return
+
+        # Run together, the creations are merged in few requests
+        with self.opencti.batch() as batch:
+            futures = batch.submit_many(
+                [
+                    functools.partial(function, **kwargs)
+                    for function, kwargs, _ in operations.values()
+                ]
+            )
+        # The labels are cached without their type, as in get_label_id
+        for (key, (_, _, typed)), future in zip(operations.items(), futures):
+            if future.exception() is not None:
+                # Resolved again while importing the object
+                self.opencti.log(
+                    "warning",
+                    "Prefetch of " + key + " failed: " + str(future.exception()),
+                )
+                continue
+            result = future.result()
+            if result is None:
+                continue
+            if typed:
+                self.mapping_cache[key] = {
+                    "id": result["id"],
+                    "type": result["entity_type"],
+                }
+            else:
+                self.mapping_cache[key] = {"id": result["id"]}
 
     def extract_embedded_relationships(
         self, stix_object: Dict, types: List = None
@@ -284,42 +469,31 @@ class OpenCTIStix2:
         object_label_ids = []
         if "labels" in stix_object:
             for label in stix_object["labels"]:
-                if "label_" + label in self.mapping_cache:
-                    label_id = self.mapping_cache["label_" + label]
-                else:
-                    label_id = self.opencti.label.create(value=label)["id"]
+                label_id = self.get_label_id(label)
                 if label_id is not None:
                     object_label_ids.append(label_id)
         elif "x_opencti_labels" in stix_object:
             for label in stix_object["x_opencti_labels"]:
-                if "label_" + label in self.mapping_cache:
-                    label_id = self.mapping_cache["label_" + label]
-                else:
-                    label_id = self.opencti.label.create(value=label)["id"]
+                label_id = self.get_label_id(label)
                 if label_id is not None:
                     object_label_ids.append(label_id)
         elif "x_opencti_tags" in stix_object:
             for tag in stix_object["x_opencti_tags"]:
                 label = tag["value"]
                 color = tag["color"] if "color" in tag else None
-                if "label_" + label in self.mapping_cache:
-                    label_id = self.mapping_cache["label_" + label]
-                else:
-                    label_id = self.opencti.label.create(value=label, color=color)["id"]
+                label_id = self.get_label_id(label, color)
                 if label_id is not None:
                     object_label_ids.append(label_id)
         # Kill Chain Phases
         kill_chain_phases_ids = []
         if "kill_chain_phases" in stix_object:
             for kill_chain_phase in stix_object["kill_chain_phases"]:
-                if (
+                kill_chain_phase_key = (
                     kill_chain_phase["kill_chain_name"] + kill_chain_phase["phase_name"]
-                    in self.mapping_cache
-                ):
-                    kill_chain_phase = self.mapping_cache[
-                        kill_chain_phase["kill_chain_name"]
-                        + kill_chain_phase["phase_name"]
-                    ]
+                )
+                cached_kill_chain_phase = self.mapping_cache.get(kill_chain_phase_key)
+                if cached_kill_chain_phase is not None:
+                    kill_chain_phase = cached_kill_chain_phase
                 else:
                     kill_chain_phase = self.opencti.kill_chain_phase.create(
                         kill_chain_name=kill_chain_phase["kill_chain_name"],
@@ -331,10 +505,7 @@ class OpenCTIStix2:
                         if "id" in kill_chain_phase
                         else None,
                     )
-                    self.mapping_cache[
-                        kill_chain_phase["kill_chain_name"]
-                        + kill_chain_phase["phase_name"]
-                    ] = {
+                    self.mapping_cache[kill_chain_phase_key] = {
                         "id": kill_chain_phase["id"],
                         "type": kill_chain_phase["entity_type"],
                     }
@@ -353,8 +524,9 @@ class OpenCTIStix2:
                     source_name = external_reference["source_name"]
                 else:
                     continue
-                if url in self.mapping_cache:
-                    external_reference_id = self.mapping_cache[url]["id"]
+                cached_external_reference = self.mapping_cache.get(url)
+                if cached_external_reference is not None:
+                    external_reference_id = cached_external_reference["id"]
                 else:
                     external_reference_id = self.opencti.external_reference.create(
                         source_name=source_name,
@@ -368,6 +540,9 @@ class OpenCTIStix2:
                     )["id"]
                 if "x_opencti_files" in external_reference:
                     for file in external_reference["x_opencti_files"]:
+                        # Files too large to be inlined are only referenced
+                        if "data" not in file:
+                            continue
                         self.opencti.external_reference.add_file(
                             id=external_reference_id,
                             file_name=file["name"],
@@ -432,11 +607,10 @@ class OpenCTIStix2:
                             title + " (" + str(external_reference["external_id"]) + ")"
                         )
 
-                    if "marking_tlpwhite" in self.mapping_cache:
-                        object_marking_ref_result = self.mapping_cache[
-                            "marking_tlpwhite"
-                        ]
-                    else:
+                    object_marking_ref_result = self.mapping_cache.get(
+                        "marking_tlpwhite"
+                    )
+                    if object_marking_ref_result is None:
                         object_marking_ref_result = (
                             self.opencti.marking_definition.read(
                                 filters=[
@@ -586,6 +760,8 @@ class OpenCTIStix2:
             # Add files
             if "x_opencti_files" in stix_object:
                 for file in stix_object["x_opencti_files"]:
+                    if "data" not in file:
+                        continue
                     self.opencti.stix_domain_object.add_file(
                         id=stix_object_result["id"],
                         file_name=file["name"],
@@ -669,6 +845,8 @@ class OpenCTIStix2:
             # Add files
             if "x_opencti_files" in stix_object:
                 for file in stix_object["x_opencti_files"]:
+                    if "data" not in file:
+                        continue
                     self.opencti.stix_cyber_observable.add_file(
                         id=stix_observable_result["id"],
                         file_name=file["name"],
@@ -807,8 +985,9 @@ class OpenCTIStix2:
         # Create the sighting
 
         ### Get the FROM
-        if from_id in self.mapping_cache:
-            final_from_id = self.mapping_cache[from_id]["id"]
+        cached_from = self.mapping_cache.get(from_id)
+        if cached_from is not None:
+            final_from_id = cached_from["id"]
         else:
             stix_object_result = (
                 self.opencti.opencti_stix_object_or_stix_relationship.read(id=from_id)
@@ -825,8 +1004,9 @@ class OpenCTIStix2:
         ### Get the TO
         final_to_id = None
         if to_id:
-            if to_id in self.mapping_cache:
-                final_to_id = self.mapping_cache[to_id]["id"]
+            cached_to = self.mapping_cache.get(to_id)
+            if cached_to is not None:
+                final_to_id = cached_to["id"]
             else:
                 stix_object_result = (
                     self.opencti.opencti_stix_object_or_stix_relationship.read(id=to_id)
@@ -888,6 +1068,76 @@ class OpenCTIStix2:
     # endregion
 
     # region export
+    def fetch_export_file(self, file_id: str) -> str:
+        """download a file and encode it in base64 while it is received
+
+        :param file_id: id of the file
+        :type file_id: str
+        :return: the base64 encoded content
+        :rtype: str
+        """
+
+        url = self.opencti.api_url.replace("graphql", "storage/get/") + file_id
+        writer = Base64Writer()
+        self.opencti.download_opencti_file(url, writer)
+        return writer.getvalue()
+
+    def export_files(self, files: List) -> List:
+        """generate the `x_opencti_files` of the imported files of an entity
+
+        The files are downloaded concurrently. During an export, a file is
+        downloaded once however many entities it is attached to, and a single
+        pool of `export_file_workers` threads downloads the files of all the
+        entities. The files
+        larger than `export_file_max_size` are not downloaded, their download
+        URI is given in place of their data.
+
+        :param files: the `importFiles` of the entity
+        :type files: list
+        :return: the exported files
+        :rtype: list
+        """
+
+        exported = []
+        # One pool per export, shared by the entities exported concurrently
+        with export_memo():
+            for file in files:
+                exported_file = {
+                    "name": file["name"],
+                    "mime_type": file["metaData"]["mimetype"],
+                    "version": file["metaData"]["version"],
+                }
+                if (
+                    self.export_file_max_size is not None
+                    and file.get("size") is not None
+                    and file["size"] > self.export_file_max_size
+                ):
+                    exported_file["uri"] = (
+                        self.opencti.api_url.replace("graphql", "storage/get/")
+                        + file["id"]
+                    )
+                    exported.append((exported_file, None))
+                    continue
+                executor = memoize(
+                    ("executor", "file"),
+                    ThreadPoolExecutor,
+                    self.export_file_workers,
+                    "opencti-export-file",
+                )
+                # The downloads run with the request context of the caller
+                download = memoize(
+                    ("file", file["id"]),
+                    executor.submit,
+                    contextvars.copy_context().run,
+                    self.fetch_export_file,
+                    file["id"],
+                )
+                exported.append((exported_file, download))
+            for exported_file, download in exported:
+                if download is not None:
+                    exported_file["data"] = download.result()
+        return [exported_file for exported_file, _ in exported]
+
     def generate_export(self, entity: Dict) -> Dict:
         # Handle model deviation
         # Identities
@@ -959,23 +1209,9 @@ class OpenCTIStix2:
                     "importFiles" in entity_external_reference
                     and len(entity_external_reference["importFiles"]) > 0
                 ):
-                    external_reference["x_opencti_files"] = []
-                    for file in entity_external_reference["importFiles"]:
-                        url = (
-                            self.opencti.api_url.replace("graphql", "storage/get/")
-                            + file["id"]
-                        )
-                        data = self.opencti.fetch_opencti_file(
-                            url, binary=True, serialize=True
-                        )
-                        external_reference["x_opencti_files"].append(
-                            {
-                                "name": file["name"],
-                                "data": data,
-                                "mime_type": file["metaData"]["mimetype"],
-                                "version": file["metaData"]["version"],
-                            }
-                        )
+                    external_reference["x_opencti_files"] = self.export_files(
+                        entity_external_reference["importFiles"]
+                    )
                 entity["external_references"].append(external_reference)
         if "externalReferences" in entity:
             del entity["externalReferences"]
@@ -1003,6 +1239,34 @@ class OpenCTIStix2:
 
         return {k: v for k, v in entity.items() if self.opencti.not_empty(v)}
 
+    def generate_export_marking_definition(self, marking_definition: Dict) -> Dict:
+        """generate the STIX2 object of a marking definition
+
+        :param marking_definition: the `objectMarking` entry of an entity
+        :type marking_definition: Dict
+        :return: the marking definition STIX2 object
+        :rtype: Dict
+        """
+
+        if marking_definition["definition_type"] == "TLP":
+            created = "2017-01-20T00:00:00.000Z"
+        else:
+            created = marking_definition["created"]
+        return {
+            "type": "marking-definition",
+            "spec_version": SPEC_VERSION,
+            "id": marking_definition["standard_id"],
+            "created": created,
+            "definition_type": marking_definition["definition_type"].lower(),
+            "name": marking_definition["definition"],
+            "definition": {
+                marking_definition["definition_type"]
+                .lower(): marking_definition["definition"]
+                .lower()
+                .replace("tlp:", "")
+            },
+        }
+
     def prepare_export(
         self,
         entity: Dict,
@@ -1033,7 +1297,12 @@ class OpenCTIStix2:
             and "createdBy" in entity
             and entity["createdBy"] is not None
         ):
-            created_by = self.generate_export(entity["createdBy"])
+            # Authors and markings recur across the entities of an export
+            created_by = memoize(
+                ("createdBy", entity["createdBy"]["id"]),
+                self.generate_export,
+                entity["createdBy"],
+            )
             entity["created_by_ref"] = created_by["id"]
             result.append(created_by)
         if "createdBy" in entity:
@@ -1059,26 +1328,11 @@ class OpenCTIStix2:
         ):
             entity["object_marking_refs"] = []
             for entity_marking_definition in entity["objectMarking"]:
-                if entity_marking_definition["definition_type"] == "TLP":
-                    created = "2017-01-20T00:00:00.000Z"
-                else:
-                    created = entity_marking_definition["created"]
-                marking_definition = {
-                    "type": "marking-definition",
-                    "spec_version": SPEC_VERSION,
-                    "id": entity_marking_definition["standard_id"],
-                    "created": created,
-                    "definition_type": entity_marking_definition[
-                        "definition_type"
-                    ].lower(),
-                    "name": entity_marking_definition["definition"],
-                    "definition": {
-                        entity_marking_definition["definition_type"]
-                        .lower(): entity_marking_definition["definition"]
-                        .lower()
-                        .replace("tlp:", "")
-                    },
-                }
+                marking_definition = memoize(
+                    ("objectMarking", entity_marking_definition["standard_id"]),
+                    self.generate_export_marking_definition,
+                    entity_marking_definition,
+                )
                 result.append(marking_definition)
                 entity["object_marking_refs"].append(marking_definition["id"])
         if "objectMarking" in entity:
@@ -1148,29 +1402,16 @@ class OpenCTIStix2:
         if "attribute_date" in entity:
             entity["date"] = entity["attribute_date"]
             del entity["attribute_date"]
-        # Artifact
-        if entity["type"] == "artifact" and "importFiles" in entity:
-            first_file = entity["importFiles"][0]["id"]
-            url = self.opencti.api_url.replace("graphql", "storage/get/") + first_file
-            file = self.opencti.fetch_opencti_file(url, binary=True, serialize=True)
-            if file:
-                entity["payload_bin"] = file
         # Files
         if "importFiles" in entity and len(entity["importFiles"]) > 0:
-            entity["x_opencti_files"] = []
-            for file in entity["importFiles"]:
-                url = (
-                    self.opencti.api_url.replace("graphql", "storage/get/") + file["id"]
-                )
-                data = self.opencti.fetch_opencti_file(url, binary=True, serialize=True)
-                entity["x_opencti_files"].append(
-                    {
-                        "name": file["name"],
-                        "data": data,
-                        "mime_type": file["metaData"]["mimetype"],
-                        "version": file["metaData"]["version"],
-                    }
-                )
+            files = self.export_files(entity["importFiles"])
+            # Artifact
+            if entity["type"] == "artifact":
+                if "uri" in files[0]:
+                    entity["url"] = files[0]["uri"]
+                elif files[0]["data"]:
+                    entity["payload_bin"] = files[0]["data"]
+            entity["x_opencti_files"] = files
             del entity["importFiles"]
             del entity["importFilesIds"]
 
@@ -1179,13 +1420,20 @@ class OpenCTIStix2:
         if mode == "simple":
             return result
         elif mode == "full":
-            uuids = [entity["id"]]
-            for x in result:
-                uuids.append(x["id"])
+            # Ordered exported objects, indexed by id
+            uuids = OpenCTIStix2ExportIndex(result)
+            # List the relations and the sightings at once
+            with self.opencti.data_loader() as loader:
+                stix_core_relationships_future = loader.submit(
+                    self.opencti.stix_core_relationship.list,
+                    elementId=entity["x_opencti_id"],
+                )
+                stix_sighting_relationships_future = loader.submit(
+                    self.opencti.stix_sighting_relationship.list,
+                    elementId=entity["x_opencti_id"],
+                )
             # Get extra relations (from)
-            stix_core_relationships = self.opencti.stix_core_relationship.list(
-                elementId=entity["x_opencti_id"]
-            )
+            stix_core_relationships = stix_core_relationships_future.result()
             for stix_core_relationship in stix_core_relationships:
                 if self.check_max_marking_definition(
                     max_marking_definition_entity,
@@ -1206,8 +1454,7 @@ class OpenCTIStix2:
                     relation_object_bundle = self.filter_objects(
                         uuids, relation_object_data
                     )
-                    uuids = uuids + [x["id"] for x in relation_object_bundle]
-                    result = result + relation_object_bundle
+                    uuids.extend(relation_object_bundle)
                 else:
                     self.opencti.log(
                         "info",
@@ -1218,9 +1465,7 @@ class OpenCTIStix2:
                         + '" are less than max definition, not exporting the relation AND the target entity.',
                     )
             # Get sighting
-            stix_sighting_relationships = self.opencti.stix_sighting_relationship.list(
-                elementId=entity["x_opencti_id"]
-            )
+            stix_sighting_relationships = stix_sighting_relationships_future.result()
             for stix_sighting_relationship in stix_sighting_relationships:
                 if self.check_max_marking_definition(
                     max_marking_definition_entity,
@@ -1242,8 +1487,7 @@ class OpenCTIStix2:
                     relation_object_bundle = self.filter_objects(
                         uuids, relation_object_data
                     )
-                    uuids = uuids + [x["id"] for x in relation_object_bundle]
-                    result = result + relation_object_bundle
+                    uuids.extend(relation_object_bundle)
                 else:
                     self.opencti.log(
                         "info",
@@ -1275,26 +1519,39 @@ class OpenCTIStix2:
                 "Stix-Cyber-Observable": self.opencti.stix_cyber_observable.read,
                 "stix_core_relationship": self.opencti.stix_core_relationship.read,
             }
-            # Get extra objects
-            for entity_object in objects_to_get:
-                # Map types
-                if entity_object["entity_type"] == "StixFile":
-                    entity_object["entity_type"] = "File"
-                if IdentityTypes.has_value(entity_object["entity_type"]):
-                    entity_object["entity_type"] = "Identity"
-                if LocationTypes.has_value(entity_object["entity_type"]):
-                    entity_object["entity_type"] = "Location"
-                if StixCyberObservableTypes.has_value(entity_object["entity_type"]):
-                    entity_object["entity_type"] = "Stix-Cyber-Observable"
-                if "relationship_type" in entity_object:
-                    entity_object["entity_type"] = "stix_core_relationship"
-                do_read = reader.get(
-                    entity_object["entity_type"],
-                    lambda **kwargs: self.unknown_type(
-                        {"type": entity_object["entity_type"]}
-                    ),
-                )
-                entity_object_data = do_read(id=entity_object["id"])
+            # Get extra objects, the reads are run concurrently and merged in
+            # aliased queries by the data loader. A merged query mixes the
+            # entity types and holds up to max_operations reads, chunked list
+            # queries filtered by ids and grouped by type would not take fewer
+            # round trips, and the list filters of this client are never
+            # given ids.
+            reads = []
+            read_ids = set()
+            with self.opencti.data_loader() as loader:
+                for entity_object in objects_to_get:
+                    if entity_object["id"] in read_ids:
+                        continue
+                    read_ids.add(entity_object["id"])
+                    # Map types
+                    if entity_object["entity_type"] == "StixFile":
+                        entity_object["entity_type"] = "File"
+                    if IdentityTypes.has_value(entity_object["entity_type"]):
+                        entity_object["entity_type"] = "Identity"
+                    if LocationTypes.has_value(entity_object["entity_type"]):
+                        entity_object["entity_type"] = "Location"
+                    if StixCyberObservableTypes.has_value(entity_object["entity_type"]):
+                        entity_object["entity_type"] = "Stix-Cyber-Observable"
+                    if "relationship_type" in entity_object:
+                        entity_object["entity_type"] = "stix_core_relationship"
+                    do_read = reader.get(
+                        entity_object["entity_type"],
+                        lambda entity_type=entity_object["entity_type"], **kwargs: (
+                            self.unknown_type({"type": entity_type})
+                        ),
+                    )
+                    reads.append(loader.submit(do_read, id=entity_object["id"]))
+            for read in reads:
+                entity_object_data = read.result()
                 stix_entity_object = self.prepare_export(
                     self.generate_export(entity_object_data),
                     "simple",
@@ -1302,8 +1559,7 @@ class OpenCTIStix2:
                 )
                 # Add to result
                 entity_object_bundle = self.filter_objects(uuids, stix_entity_object)
-                uuids = uuids + [x["id"] for x in entity_object_bundle]
-                result = result + entity_object_bundle
+                uuids.extend(entity_object_bundle)
             for relation_object in relations_to_get:
                 relation_object_data = self.prepare_export(
                     self.opencti.stix_core_relationship.read(id=relation_object["id"])
@@ -1311,8 +1567,7 @@ class OpenCTIStix2:
                 relation_object_bundle = self.filter_objects(
                     uuids, relation_object_data
                 )
-                uuids = uuids + [x["id"] for x in relation_object_bundle]
-                result = result + relation_object_bundle
+                uuids.extend(relation_object_bundle)
 
             # Get extra reports
             """
@@ -1328,8 +1583,7 @@ class OpenCTIStix2:
                         report_object_bundle = self.filter_objects(
                             uuids, report_object_data
                         )
-                        uuids = uuids + [x["id"] for x in report_object_bundle]
-                        result = result + report_object_bundle
+                        uuids.extend(report_object_bundle)
             """
 
             # Get notes
@@ -1347,12 +1601,11 @@ class OpenCTIStix2:
             #            note_object_bundle = self.filter_objects(
             #                uuids, note_object_data
             #            )
-            #            uuids = uuids + [x["id"] for x in note_object_bundle]
-            #            result = result + note_object_bundle
+            #            uuids.extend(note_object_bundle)
 
             # Refilter all the reports object refs
             final_result = []
-            for entity in result:
+            for entity in uuids:
                 if entity["type"] == "report" or entity["type"] == "note":
                     if "object_refs" in entity:
                         entity["object_refs"] = [
@@ -1415,40 +1668,43 @@ class OpenCTIStix2:
         do_read = reader.get(
             entity_type, lambda **kwargs: self.unknown_type({"type": entity_type})
         )
-        entity = do_read(id=entity_id)
-        if entity is None:
-            self.opencti.log("error", "Cannot export entity (not found)")
-            return bundle
-        stix_objects = self.prepare_export(
-            self.generate_export(entity),
-            mode,
-            max_marking_definition_entity,
-            no_custom_attributes,
-        )
+        # Related objects of a full export share many reads by id
+        with self.opencti.data_loader(), export_memo():
+            entity = do_read(id=entity_id)
+            if entity is None:
+                self.opencti.log("error", "Cannot export entity (not found)")
+                return bundle
+            stix_objects = self.prepare_export(
+                self.generate_export(entity),
+                mode,
+                max_marking_definition_entity,
+                no_custom_attributes,
+            )
         if stix_objects is not None:
             bundle["objects"].extend(stix_objects)
         return bundle
 
-    def export_list(
+    def list_export_entities(
         self,
         entity_type: str,
         search: Dict = None,
         filters: List = None,
         order_by: str = None,
         order_mode: str = None,
-        max_marking_definition: Dict = None,
         types: List = None,
-    ) -> Dict:
-        max_marking_definition_entity = (
-            self.opencti.marking_definition.read(id=max_marking_definition)
-            if max_marking_definition is not None
-            else None
-        )
-        bundle = {
-            "type": "bundle",
-            "id": "bundle--" + str(uuid.uuid4()),
-            "objects": [],
-        }
+        stream: bool = False,
+    ) -> Optional[Iterator[Dict]]:
+        """list the entities of a list export
+
+        :param entity_type: type of the exported entities
+        :type entity_type: str
+        :param stream: fetch the entities page by page while they are
+            consumed, defaults to False
+        :type stream: bool, optional
+        :return: the listed entities
+        :rtype: Iterator[Dict]
+        """
+
         if entity_type == "StixFile":
             entity_type = "File"
 
@@ -1499,32 +1755,241 @@ class OpenCTIStix2:
         do_list = lister.get(
             entity_type, lambda **kwargs: self.unknown_type({"type": entity_type})
         )
-        entities_list = do_list(
+        return do_list(
             search=search,
             filters=filters,
             orderBy=order_by,
             orderMode=order_mode,
             types=types,
             getAll=True,
+            stream=stream,
+        )
+
+    def export_list(
+        self,
+        entity_type: str,
+        search: Dict = None,
+        filters: List = None,
+        order_by: str = None,
+        order_mode: str = None,
+        max_marking_definition: Dict = None,
+        types: List = None,
+    ) -> Dict:
+        max_marking_definition_entity = (
+            self.opencti.marking_definition.read(id=max_marking_definition)
+            if max_marking_definition is not None
+            else None
+        )
+        bundle = {
+            "type": "bundle",
+            "id": "bundle--" + str(uuid.uuid4()),
+            "objects": [],
+        }
+        entities_list = self.list_export_entities(
+            entity_type, search, filters, order_by, order_mode, types
         )
         if entities_list is not None:
-            uuids = []
-            for entity in entities_list:
-                entity_bundle = self.prepare_export(
-                    self.generate_export(entity),
-                    "simple",
-                    max_marking_definition_entity,
-                )
-                if entity_bundle is not None:
-                    entity_bundle_filtered = self.filter_objects(uuids, entity_bundle)
-                    for x in entity_bundle_filtered:
-                        uuids.append(x["id"])
-                    bundle["objects"] = bundle["objects"] + entity_bundle_filtered
+            uuids = OpenCTIStix2ExportIndex()
+            with export_memo():
+                for entity in entities_list:
+                    entity_bundle = self.prepare_export(
+                        self.generate_export(entity),
+                        "simple",
+                        max_marking_definition_entity,
+                    )
+                    if entity_bundle is not None:
+                        uuids.extend(entity_bundle)
+            bundle["objects"] = uuids.objects
         return bundle
 
+    def export_list_to(
+        self,
+        stream: IO,
+        entity_type: str,
+        search: Dict = None,
+        filters: List = None,
+        order_by: str = None,
+        order_mode: str = None,
+        max_marking_definition: Dict = None,
+        types: List = None,
+    ) -> int:
+        """write the bundle of a list export to a file or a socket
+
+        The entities are fetched page by page and their objects are written as
+        soon as they are generated, only the ids of the written objects are
+        kept to skip the objects shared by several entities (authors,
+        markings...). The written bundle is the one of :py:meth:`export_list`.
+
+        Usage::
+
+            with open("indicators.json", "w") as file:
+                api.stix2.export_list_to(file, "Indicator")
+
+        :param stream: the destination, opened in text or binary mode, e.g. a
+            file or the `makefile("wb")` of a socket
+        :type stream: IO
+        :param entity_type: type of the exported entities
+        :type entity_type: str
+        :return: the number of written objects
+        :rtype: int
+        """
+
+        max_marking_definition_entity = (
+            self.opencti.marking_definition.read(id=max_marking_definition)
+            if max_marking_definition is not None
+            else None
+        )
+        binary = isinstance(stream, (io.RawIOBase, io.BufferedIOBase))
+
+        def write(text):
+            stream.write(text.encode("utf-8") if binary else text)
+
+        write('{"type": "bundle", "id": "bundle--' + str(uuid.uuid4()) + '"')
+        write(', "objects": [')
+        uuids = set()
+        entities_list = self.list_export_entities(
+            entity_type, search, filters, order_by, order_mode, types, stream=True
+        )
+        if entities_list is not None:
+            with export_memo():
+                for entity in entities_list:
+                    entity_bundle = self.prepare_export(
+                        self.generate_export(entity),
+                        "simple",
+                        max_marking_definition_entity,
+                    )
+                    for item in entity_bundle:
+                        if item["id"] in uuids:
+                            continue
+                        write((",\n" if len(uuids) > 0 else "\n") + json.dumps(item))
+                        uuids.add(item["id"])
+        write("\n]}\n")
+        return len(uuids)
+
+    def is_imported(
+        self, item: Dict, types: List = None, event_version: str = None
+    ) -> bool:
+        """check if :py:meth:`import_item` imports an object as a STIX2 object
+
+        The patches of the OpenCTI events are applied as updates instead.
+
+        :param item: the STIX2 object
+        :type item: Dict
+        :param types: the types to import, defaults to all
+        :type types: List, optional
+        :param event_version: the OpenCTI event version of the bundle
+        :type event_version: str, optional
+        :rtype: bool
+        """
+
+        if event_version == "3" and "x_opencti_patch" in item:
+            return False
+        if item["type"] in [
+            "relationship",
+            "sighting",
+            "label",
+            "external-reference",
+            "kill-chain-phase",
+        ]:
+            return True
+        if types is None or len(types) == 0:
+            return True
+        if StixCyberObservableTypes.has_value(item["type"]):
+            return item["type"] in types or "observable" in types
+        # Check the scope
+        if item["type"] == "marking-definition" or item["type"] in types:
+            return True
+        # Specific OpenCTI scopes
+        if item["type"] == "identity" and "identity_class" in item:
+            if ("class" in types or "sector" in types) and item[
+                "identity_class"
+            ] == "class":
+                return True
+            return item["identity_class"] in types
+        if item["type"] == "location" and "x_opencti_location_type" in item:
+            return item["x_opencti_location_type"].lower() in types
+        return False
+
+    def import_item(
+        self,
+        item: Dict,
+        update: bool = False,
+        types: List = None,
+        event_version: str = None,
+    ) -> None:
+        """import a single object of a bundle
+
+        :param item: the STIX2 object
+        :type item: Dict
+        :param update: whether to update the existing data
+        :type update: bool, optional
+        :param types: the types to import, defaults to all
+        :type types: List, optional
+        :param event_version: the OpenCTI event version of the bundle
+        :type event_version: str, optional
+        """
+
+        if event_version == "3" and "x_opencti_patch" in item:
+            self.stix2_update.process_update(item)
+            return
+        if not self.is_imported(item, types, event_version):
+            return
+        if item["type"] == "relationship":
+            self.import_relationship(item, update, types)
+        elif item["type"] == "sighting":
+            # Resolve the to
+            to_ids = []
+            if "where_sighted_refs" in item:
+                for where_sighted_ref in item["where_sighted_refs"]:
+                    to_ids.append(where_sighted_ref)
+            # Import sighting_of_ref
+            from_id = item["sighting_of_ref"]
+            if len(to_ids) > 0:
+                for to_id in to_ids:
+                    self.import_sighting(item, from_id, to_id, update)
+            # Import observed_data_refs
+            if "observed_data_refs" in item:
+                for observed_data_ref in item["observed_data_refs"]:
+                    if len(to_ids) > 0:
+                        for to_id in to_ids:
+                            self.import_sighting(item, observed_data_ref, to_id, update)
+        elif item["type"] == "label":
+            self.opencti.label.create(**item)
+        elif item["type"] == "external-reference":
+            self.opencti.external_reference.create(**item)
+        elif item["type"] == "kill-chain-phase":
+            self.opencti.kill_chain_phase.create(**item)
+        elif StixCyberObservableTypes.has_value(item["type"]):
+            self.import_observable(item, update, types)
+        else:
+            self.import_object(item, update, types)
+
     def import_bundle(
-        self, stix_bundle: Dict, update: bool = False, types: List = None
+        self,
+        stix_bundle: Dict,
+        update: bool = False,
+        types: List = None,
+        max_workers: int = 1,
     ) -> List:
+        """import a STIX2 bundle
+
+        The objects are imported level by level, an object is never imported
+        before the objects it references, see
+        :py:class:`~pycti.utils.opencti_stix2_scheduler.OpenCTIStix2Scheduler`.
+
+        :param stix_bundle: the STIX2 bundle
+        :type stix_bundle: Dict
+        :param update: whether to update the existing data
+        :type update: bool, optional
+        :param types: the types to import, defaults to all
+        :type types: List, optional
+        :param max_workers: number of objects of a level imported concurrently,
+            defaults to 1
+        :type max_workers: int, optional
+        :return: the id and type of the imported objects
+        :rtype: List
+        """
+
         # Check if the bundle is correctly formatted
         if "type" not in stix_bundle or stix_bundle["type"] != "bundle":
             raise ValueError("JSON data type is not a STIX2 bundle")
@@ -1538,74 +2003,117 @@ class OpenCTIStix2:
 
         stix2_splitter = OpenCTIStix2Splitter()
         bundles = stix2_splitter.split_bundle(stix_bundle, False, event_version)
-        # Import every elements in a specific order
+        objects = [item for bundle in bundles for item in bundle["objects"]]
+        levels = OpenCTIStix2Scheduler(objects).levels()
         imported_elements = []
 
-        # Marking definitions
-        for bundle in bundles:
-            for item in bundle["objects"]:
-                if "x_opencti_event_version" in bundle:
-                    if bundle["x_opencti_event_version"] == "3":
-                        if "x_opencti_patch" in item:
-                            self.stix2_update.process_update(item)
-                            continue
-                if item["type"] == "relationship":
-                    self.import_relationship(item, update, types)
-                elif item["type"] == "sighting":
-                    # Resolve the to
-                    to_ids = []
-                    if "where_sighted_refs" in item:
-                        for where_sighted_ref in item["where_sighted_refs"]:
-                            to_ids.append(where_sighted_ref)
-                    # Import sighting_of_ref
-                    from_id = item["sighting_of_ref"]
-                    if len(to_ids) > 0:
-                        for to_id in to_ids:
-                            self.import_sighting(item, from_id, to_id, update)
-                    # Import observed_data_refs
-                    if "observed_data_refs" in item:
-                        for observed_data_ref in item["observed_data_refs"]:
-                            if len(to_ids) > 0:
-                                for to_id in to_ids:
-                                    self.import_sighting(
-                                        item, observed_data_ref, to_id, update
-                                    )
-                elif item["type"] == "label":
-                    self.opencti.label.create(**item)
-                elif item["type"] == "external-reference":
-                    self.opencti.external_reference.create(**item)
-                elif item["type"] == "kill-chain-phase":
-                    self.opencti.kill_chain_phase.create(**item)
-                elif StixCyberObservableTypes.has_value(item["type"]):
-                    if types is None or len(types) == 0:
-                        self.import_observable(item, update, types)
-                    elif item["type"] in types or "observable" in types:
-                        self.import_observable(item, update, types)
-                else:
-                    # Check the scope
-                    if (
-                        item["type"] == "marking-definition"
-                        or types is None
-                        or len(types) == 0
-                    ):
-                        self.import_object(item, update, types)
-                    # Handle identity & location if part of the scope
-                    elif item["type"] in types:
-                        self.import_object(item, update, types)
-                    else:
-                        # Specific OpenCTI scopes
-                        if item["type"] == "identity":
-                            if "identity_class" in item:
-                                if ("class" in types or "sector" in types) and item[
-                                    "identity_class"
-                                ] == "class":
-                                    self.import_object(item, update, types)
-                                elif item["identity_class"] in types:
-                                    self.import_object(item, update, types)
-                        elif item["type"] == "location":
-                            if "x_opencti_location_type" in item:
-                                if item["x_opencti_location_type"].lower() in types:
-                                    self.import_object(item, update, types)
-                imported_elements.append({"id": item["id"], "type": item["type"]})
+        # Sightings resolve their refs with reads by id
+        with self.opencti.data_loader(max_workers=max_workers) as loader:
+            self.prefetch_vocabulary(objects, types, event_version)
+            for level in levels:
+                self.import_level(
+                    loader, level, update, types, event_version, max_workers
+                )
+                for item in level:
+                    imported_elements.append({"id": item["id"], "type": item["type"]})
 
         return imported_elements
+
+    def import_level(
+        self,
+        loader,
+        level: List,
+        update: bool = False,
+        types: List = None,
+        event_version: str = None,
+        max_workers: int = 1,
+    ) -> None:
+        """import independent objects, concurrently with several workers
+
+        :param loader: the data loader running the imports
+        :type loader: OpenCTIApiDataLoader
+        :param level: the objects
+        :type level: List
+        :param update: whether to update the existing data
+        :type update: bool, optional
+        :param types: the types to import, defaults to all
+        :type types: List, optional
+        :param event_version: the event version of the bundle, defaults to None
+        :type event_version: str, optional
+        :param max_workers: number of objects imported concurrently, defaults to 1
+        :type max_workers: int, optional
+        """
+
+        if max_workers > 1 and len(level) > 1:
+            futures = [
+                loader.submit(self.import_item, item, update, types, event_version)
+                for item in level
+            ]
+            # Wait for the whole level before raising the first error
+            errors = [future.exception() for future in futures]
+            for error in errors:
+                if error is not None:
+                    raise error
+        else:
+            for item in level:
+                self.import_item(item, update, types, event_version)
+
+    def import_bundle_stream(
+        self,
+        file: TextIO,
+        update: bool = False,
+        types: List = None,
+        max_workers: int = 1,
+        chunk_size: int = 1000,
+        directory: str = None,
+    ) -> int:
+        """import a STIX2 bundle file of any size
+
+        The objects are decoded one at a time and spilled to a temporary
+        on-disk index, see
+        :py:class:`~pycti.utils.opencti_stix2_stream.OpenCTIStix2BundleIndex`,
+        then imported level by level as in :py:meth:`import_bundle`, at most
+        `chunk_size` objects in memory at once.
+
+        :param file: the bundle file, opened in text mode
+        :type file: TextIO
+        :param update: whether to update the existing data
+        :type update: bool, optional
+        :param types: the types to import, defaults to all
+        :type types: List, optional
+        :param max_workers: number of objects of a level imported concurrently,
+            defaults to 1
+        :type max_workers: int, optional
+        :param chunk_size: number of objects read from the index at once,
+            defaults to 1000
+        :type chunk_size: int, optional
+        :param directory: directory of the temporary index, defaults to the
+            system temporary directory
+        :type directory: str, optional
+        :return: the number of imported objects
+        :rtype: int
+        """
+
+        with OpenCTIStix2BundleIndex(directory) as index:
+            bundle_type = None
+            event_version = None
+            for key, value in iter_bundle(file):
+                if key == "objects":
+                    index.add(value)
+                elif key == "type":
+                    bundle_type = value
+                elif key == "x_opencti_event_version":
+                    event_version = value
+            # Check if the bundle is correctly formatted
+            if bundle_type != "bundle":
+                raise ValueError("JSON data type is not a STIX2 bundle")
+            if len(index) == 0:
+                raise ValueError("JSON data objects is empty")
+
+            with self.opencti.data_loader(max_workers=max_workers) as loader:
+                for objects in index.levels(chunk_size):
+                    self.prefetch_vocabulary(objects, types, event_version)
+                    self.import_level(
+                        loader, objects, update, types, event_version, max_workers
+                    )
+            return len(index)
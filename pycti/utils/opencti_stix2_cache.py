@@ -0,0 +1,215 @@
+# coding: utf-8
+
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import MutableMapping
+
+_MISSING = object()
+
+
+class OpenCTIStix2MemoryCache(MutableMapping):
+    """In-memory LRU cache for the mapping between STIX ids and OpenCTI objects
+
+    The least recently used entries are evicted beyond `max_size` entries and
+    the entries expire `ttl` seconds after being set. Membership tests and
+    :py:meth:`get` count the hits and the misses.
+
+    :param max_size: maximum number of entries, defaults to 100000
+    :type max_size: int, optional
+    :param ttl: lifetime of the entries in seconds, defaults to None (no expiry)
+    :type ttl: float, optional
+    """
+
+    def __init__(self, max_size=100000, ttl=None):
+        if max_size is not None and max_size < 1:
+            raise ValueError("max_size must be greater than 0")
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._data = OrderedDict()
+        self._lock = threading.RLock()
+
+    def _lookup(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and entry[1] is not None and entry[1] <= time.time():
+                del self._data[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return _MISSING
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def __contains__(self, key):
+        return self._lookup(key) is not _MISSING
+
+    def get(self, key, default=None):
+        """get an entry with a single lookup, safe when entries are evicted
+        by other threads
+
+        :param key: key of the entry
+        :type key: str
+        :param default: value returned for a missing entry, defaults to None
+        :return: the value of the entry or `default`
+        """
+
+        value = self._lookup(key)
+        return default if value is _MISSING else value
+
+    def __getitem__(self, key):
+        # An expired entry not purged yet is still returned, use get to
+        # check and read an entry at once
+        with self._lock:
+            return self._data[key][0]
+
+    def __setitem__(self, key, value):
+        expires = None if self.ttl is None else time.time() + self.ttl
+        with self._lock:
+            self._data[key] = (value, expires)
+            self._data.move_to_end(key)
+            while self.max_size is not None and len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def __delitem__(self, key):
+        with self._lock:
+            del self._data[key]
+
+    def __iter__(self):
+        with self._lock:
+            return iter(list(self._data.keys()))
+
+    def __len__(self):
+        return len(self._data)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+class OpenCTIStix2SqliteCache(MutableMapping):
+    """SQLite cache for the mapping between STIX ids and OpenCTI objects
+
+    The entries survive restarts and the database can be shared by several
+    worker processes of the same host. The values must be JSON serializable.
+
+    :param path: path of the SQLite database file
+    :type path: str
+    :param ttl: lifetime of the entries in seconds, defaults to None (no expiry)
+    :type ttl: float, optional
+    :param timeout: seconds to wait for a database lock, defaults to 30
+    :type timeout: float, optional
+    """
+
+    def __init__(self, path, ttl=None, timeout=30):
+        self.path = path
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.RLock()
+        self._connection = sqlite3.connect(
+            path, timeout=timeout, isolation_level=None, check_same_thread=False
+        )
+        with self._lock:
+            # Readers of other processes do not block the writers
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS mapping_cache "
+                "(key TEXT PRIMARY KEY, value TEXT NOT NULL, expires REAL)"
+            )
+        self.purge()
+
+    def _lookup(self, key, check=True):
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT value, expires FROM mapping_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if (
+                row is not None
+                and check
+                and row[1] is not None
+                and row[1] <= time.time()
+            ):
+                row = None
+            if check:
+                if row is None:
+                    self.misses += 1
+                else:
+                    self.hits += 1
+        return _MISSING if row is None else json.loads(row[0])
+
+    def __contains__(self, key):
+        return self._lookup(key) is not _MISSING
+
+    def get(self, key, default=None):
+        """get an entry with a single lookup, safe when entries are evicted
+        by other threads
+
+        :param key: key of the entry
+        :type key: str
+        :param default: value returned for a missing entry, defaults to None
+        :return: the value of the entry or `default`
+        """
+
+        value = self._lookup(key)
+        return default if value is _MISSING else value
+
+    def __getitem__(self, key):
+        value = self._lookup(key, check=False)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key, value):
+        expires = None if self.ttl is None else time.time() + self.ttl
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO mapping_cache (key, value, expires) "
+                "VALUES (?, ?, ?)",
+                (key, json.dumps(value), expires),
+            )
+
+    def __delitem__(self, key):
+        with self._lock:
+            cursor = self._connection.execute(
+                "DELETE FROM mapping_cache WHERE key = ?", (key,)
+            )
+        if cursor.rowcount == 0:
+            raise KeyError(key)
+
+    def __iter__(self):
+        with self._lock:
+            rows = self._connection.execute("SELECT key FROM mapping_cache").fetchall()
+        return iter([row[0] for row in rows])
+
+    def __len__(self):
+        with self._lock:
+            return self._connection.execute(
+                "SELECT COUNT(*) FROM mapping_cache"
+            ).fetchone()[0]
+
+    def clear(self):
+        with self._lock:
+            self._connection.execute("DELETE FROM mapping_cache")
+
+    def purge(self):
+        """delete the expired entries"""
+
+        with self._lock:
+            self._connection.execute(
+                "DELETE FROM mapping_cache WHERE expires IS NOT NULL AND expires <= ?",
+                (time.time(),),
+            )
+
+    def close(self):
+        """close the database connection"""
+
+        with self._lock:
+            self._connection.close()
@@ -0,0 +1,125 @@
+# coding: utf-8
+
+import contextlib
+import contextvars
+import threading
+from concurrent.futures import Executor
+
+# Objects generated during the current export, by key
+_export_memo = contextvars.ContextVar("opencti_export_memo", default=None)
+# The entities of an export may be generated by several threads
+_export_memo_lock = threading.Lock()
+
+
+class OpenCTIStix2ExportIndex:
+    """Ordered objects of an export, indexed by id
+
+    The ids of the objects are kept in a set next to the append-only list of
+    the objects, checking if an object is already exported takes a constant
+    time whatever the size of the export.
+
+    :param objects: objects to add, defaults to None
+    :type objects: list, optional
+    """
+
+    def __init__(self, objects=None):
+        self.ids = set()
+        self.objects = []
+        if objects is not None:
+            self.extend(objects)
+
+    def __contains__(self, item_id):
+        return item_id in self.ids
+
+    def __iter__(self):
+        return iter(self.objects)
+
+    def __len__(self):
+        return len(self.objects)
+
+    def add(self, item):
+        """add an object unless an object with the same id was already added
+
+        :param item: a STIX2 object
+        :type item: dict
+        :return: `True` if the object was added
+        :rtype: bool
+        """
+
+        if "id" not in item or item["id"] in self.ids:
+            return False
+        self.ids.add(item["id"])
+        self.objects.append(item)
+        return True
+
+    def extend(self, objects):
+        """add the objects not already added
+
+        :param objects: STIX2 objects
+        :type objects: list
+        :return: the added objects
+        :rtype: list
+        """
+
+        return [item for item in objects if self.add(item)]
+
+
+class _MemoEntry:
+    """object generated once, the other threads wait for it"""
+
+    def __init__(self):
+        # Reentrant, an object may be generated while generating another
+        self.lock = threading.RLock()
+        self.generated = False
+        self.value = None
+
+    def get(self, generate, args):
+        with self.lock:
+            if not self.generated:
+                self.value = generate(*args)
+                self.generated = True
+            return self.value
+
+
+@contextlib.contextmanager
+def export_memo():
+    """memoize the objects generated by :py:func:`memoize` until the block
+    exits, nested blocks share the memo of the outermost one
+
+    The executors memoized, e.g. the pool downloading the files of the export,
+    are shut down when the outermost block exits.
+    """
+
+    if _export_memo.get() is not None:
+        yield
+        return
+    memo = {}
+    token = _export_memo.set(memo)
+    try:
+        yield
+    finally:
+        _export_memo.reset(token)
+        for entry in memo.values():
+            if isinstance(entry.value, Executor):
+                entry.value.shutdown(wait=False)
+
+
+def memoize(key, generate, *args):
+    """get an object generated once per export
+
+    :param key: key of the object, e.g. its type and OpenCTI id
+    :type key: tuple
+    :param generate: function generating the object from `args`
+    :type generate: callable
+    :return: the generated object
+    :rtype: dict
+    """
+
+    memo = _export_memo.get()
+    if memo is None:
+        return generate(*args)
+    with _export_memo_lock:
+        entry = memo.get(key)
+        if entry is None:
+            entry = memo[key] = _MemoEntry()
+    return entry.get(generate, args)
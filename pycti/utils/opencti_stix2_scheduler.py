@@ -0,0 +1,331 @@
+# coding: utf-8
+
+import heapq
+from array import array
+
+# Objects referenced by most of the others, imported first
+VOCABULARY_TYPES = [
+    "marking-definition",
+    "identity",
+    "label",
+    "external-reference",
+    "kill-chain-phase",
+]
+# Objects linking the others, imported last
+RELATIONSHIP_TYPES = ["relationship", "sighting"]
+
+# Kind of the property names seen, 2 for `_refs`, 1 for `_ref`, 0 otherwise
+_KEY_KINDS = {}
+_KEY_KINDS_MAX_SIZE = 10000
+
+
+def _components(offsets, dependents, levels):
+    """number the strongly connected components of the objects without a
+    level, with an iterative Tarjan walk of the dependents
+
+    :return: the component of each object, -1 for the objects with a level,
+        and the number of components
+    :rtype: tuple
+    """
+
+    count = len(levels)
+    component = array("i", [-1]) * count
+    order = array("i", [-1]) * count
+    low = array("i", [0]) * count
+    on_stack = bytearray(count)
+    stack = []
+    components = 0
+    counter = 0
+    for root in range(count):
+        if levels[root] >= 0 or order[root] >= 0:
+            continue
+        order[root] = low[root] = counter
+        counter += 1
+        stack.append(root)
+        on_stack[root] = 1
+        walk = [(root, offsets[root])]
+        while len(walk) > 0:
+            node, edge = walk[-1]
+            end = offsets[node + 1]
+            while edge < end:
+                target = dependents[edge]
+                edge += 1
+                if levels[target] >= 0:
+                    continue
+                if order[target] < 0:
+                    break
+                if on_stack[target] and order[target] < low[node]:
+                    low[node] = order[target]
+            else:
+                # All the dependents are walked, close the component
+                walk.pop()
+                if len(walk) > 0 and low[node] < low[walk[-1][0]]:
+                    low[walk[-1][0]] = low[node]
+                if low[node] == order[node]:
+                    while True:
+                        member = stack.pop()
+                        on_stack[member] = 0
+                        component[member] = components
+                        if member == node:
+                            break
+                    components += 1
+                continue
+            walk[-1] = (node, edge)
+            order[target] = low[target] = counter
+            counter += 1
+            stack.append(target)
+            on_stack[target] = 1
+            walk.append((target, offsets[target]))
+    return component, components
+
+
+class _Cycles:
+    """reference cycles of the objects without a level
+
+    A cycle is broken by giving a level to its object with the fewest pending
+    references. The cycles referencing no other unresolved object are
+    independent, one object of each of them is broken at once.
+    """
+
+    def __init__(self, phases, pending, offsets, dependents, levels):
+        self.phases = phases
+        self.pending = pending
+        self.component, count = _components(offsets, dependents, levels)
+        self.unresolved = array("i", [0]) * count
+        # References of the objects of each component to the other components
+        self.external = array("i", [0]) * count
+        for index in range(len(levels)):
+            if self.component[index] < 0:
+                continue
+            self.unresolved[self.component[index]] += 1
+            for dependent in dependents[offsets[index] : offsets[index + 1]]:
+                if self.component[dependent] not in (-1, self.component[index]):
+                    self.external[self.component[dependent]] += 1
+        # Objects of each cycle by (pending, phase, index), the stale entries
+        # are skipped when popped
+        self.heaps = {}
+        for index in range(len(levels)):
+            current = self.component[index]
+            if current >= 0 and self.unresolved[current] > 1:
+                self.heaps.setdefault(current, []).append(
+                    (pending[index], phases[index], index)
+                )
+        for heap in self.heaps.values():
+            heapq.heapify(heap)
+        self.independent = set(
+            current for current in self.heaps if self.external[current] == 0
+        )
+
+    def referenced(self, index, dependent):
+        """update the cycles when a dependent of an object got a level"""
+
+        current = self.component[dependent]
+        if current < 0:
+            return
+        if current != self.component[index]:
+            self.external[current] -= 1
+            if self.external[current] == 0 and current in self.heaps:
+                self.independent.add(current)
+        if self.pending[dependent] > 0 and current in self.heaps:
+            heapq.heappush(
+                self.heaps[current],
+                (self.pending[dependent], self.phases[dependent], dependent),
+            )
+
+    def resolved(self, index):
+        """update the cycles when an object got a level"""
+
+        current = self.component[index]
+        if current >= 0:
+            self.unresolved[current] -= 1
+
+    def break_cycles(self, levels):
+        """choose one object of each independent cycle
+
+        :return: the objects to give a level to, in index order
+        :rtype: list
+        """
+
+        level = []
+        for current in list(self.independent):
+            if self.unresolved[current] == 0:
+                self.independent.discard(current)
+                continue
+            heap = self.heaps[current]
+            while len(heap) > 0:
+                count, _, index = heapq.heappop(heap)
+                if levels[index] < 0 and count == self.pending[index]:
+                    level.append(index)
+                    break
+        if len(level) == 0:
+            raise ValueError("Unable to break the reference cycles")
+        return sorted(level)
+
+
+def import_levels(phases, pending, offsets, dependents):
+    """number the import levels of the objects of a dependency graph
+
+    The objects without pending references of the lowest phase form the next
+    level. When only reference cycles are left, the next level is made of one
+    object of each cycle not waiting for another one, the object with the
+    fewest pending references.
+
+    :param phases: the import phase of each object, see
+        :py:meth:`OpenCTIStix2Scheduler.phase`
+    :type phases: array
+    :param pending: the number of references of each object, updated in place
+    :type pending: array
+    :param offsets: the referencing objects of the object `index` are
+        `dependents[offsets[index]:offsets[index + 1]]`
+    :type offsets: array
+    :param dependents: the referencing objects, stored contiguously
+    :type dependents: array
+    :return: the level of each object
+    :rtype: array
+    """
+
+    count = len(phases)
+    levels = array("i", [-1]) * count
+    ready = [array("i"), array("i"), array("i")]
+    for index in range(count):
+        if pending[index] == 0:
+            ready[phases[index]].append(index)
+    remaining = count
+    level_number = 0
+    # Built on the first cycle
+    cycles = None
+    while remaining > 0:
+        phase = next((p for p in range(len(ready)) if len(ready[p]) > 0), None)
+        if phase is not None:
+            level = ready[phase]
+            ready[phase] = array("i")
+        else:
+            if cycles is None:
+                cycles = _Cycles(phases, pending, offsets, dependents, levels)
+            level = cycles.break_cycles(levels)
+        for index in level:
+            levels[index] = level_number
+            remaining -= 1
+            if cycles is not None:
+                cycles.resolved(index)
+            for dependent in dependents[offsets[index] : offsets[index + 1]]:
+                pending[dependent] -= 1
+                if levels[dependent] >= 0:
+                    continue
+                if pending[dependent] == 0:
+                    ready[phases[dependent]].append(dependent)
+                if cycles is not None:
+                    cycles.referenced(index, dependent)
+        level_number += 1
+    return levels
+
+
+class OpenCTIStix2Scheduler:
+    """Dependency aware import order of the objects of a bundle
+
+    The `_ref` and `_refs` properties of the objects are the edges of a graph,
+    the objects are grouped in levels so that every object comes in a later
+    level than the objects it references. The objects of a level are
+    independent and can be imported concurrently. When several objects are
+    ready, markings and identities go first, then the domain objects and the
+    observables, then the relationships and the sightings.
+
+    Reference cycles (e.g. an identity marked by a marking it created) are
+    broken by importing the object with the fewest pending references first,
+    one object of each independent cycle at once.
+
+    :param objects: the STIX2 objects, e.g. the objects of the bundles of
+        :py:meth:`~pycti.utils.opencti_stix2_splitter.OpenCTIStix2Splitter.split_bundle`
+    :type objects: list
+    """
+
+    def __init__(self, objects):
+        self.objects = objects
+        # Number of pending references and referencing objects of each object
+        self.pending = []
+        self.dependents = [[] for _ in objects]
+        indexes = {}
+        for index, item in enumerate(objects):
+            indexes.setdefault(item["id"], index)
+        for index, item in enumerate(objects):
+            references = set()
+            for reference in self.references(item):
+                target = indexes.get(reference)
+                if target is not None and target != index:
+                    references.add(target)
+            for target in references:
+                self.dependents[target].append(index)
+            self.pending.append(len(references))
+
+    @staticmethod
+    def references(item):
+        """list the ids referenced by an object
+
+        :param item: a STIX2 object
+        :type item: dict
+        :return: the referenced ids
+        :rtype: list
+        """
+
+        references = []
+        for key, value in item.items():
+            kind = _KEY_KINDS.get(key)
+            if kind is None:
+                kind = 2 if key.endswith("_refs") else 1 if key.endswith("_ref") else 0
+                if len(_KEY_KINDS) < _KEY_KINDS_MAX_SIZE:
+                    _KEY_KINDS[key] = kind
+            if kind == 0:
+                continue
+            if kind == 2 and isinstance(value, list):
+                references.extend(value)
+            elif kind == 1 and isinstance(value, str):
+                # A marking created by an identity it marks is not a dependency
+                if key == "created_by_ref" and item["id"].startswith(
+                    "marking-definition--"
+                ):
+                    continue
+                references.append(value)
+        return references
+
+    @staticmethod
+    def phase(item):
+        """get the import phase of an object, used to order the ready objects
+
+        :param item: a STIX2 object
+        :type item: dict
+        :return: 0 for markings and identities, 1 for domain objects and
+            observables, 2 for relationships and sightings
+        :rtype: int
+        """
+
+        if item["type"] in VOCABULARY_TYPES:
+            return 0
+        if item["type"] in RELATIONSHIP_TYPES:
+            return 2
+        return 1
+
+    def levels(self):
+        """group the objects in import levels, see :py:func:`import_levels`
+
+        :return: the list of levels, each level is a list of objects
+        :rtype: list
+        """
+
+        offsets = array("q", [0])
+        dependents = array("i")
+        for index_dependents in self.dependents:
+            dependents.extend(index_dependents)
+            offsets.append(len(dependents))
+        levels = []
+        for index, level_number in enumerate(
+            import_levels(
+                array("b", [self.phase(item) for item in self.objects]),
+                array("i", self.pending),
+                offsets,
+                dependents,
+            )
+        ):
+            while len(levels) <= level_number:
+                levels.append([])
+            levels[level_number].append(self.objects[index])
+        return levels
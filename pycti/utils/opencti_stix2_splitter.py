@@ -1,49 +1,193 @@
 import json
 import uuid
+from array import array
+from typing import Iterator
+
+from pycti.utils.opencti_stix2_scheduler import OpenCTIStix2Scheduler
 
 
 class OpenCTIStix2Splitter:
     def __init__(self):
         self.cache_index = {}
         self.elements = []
+        self.nb_bundles = 0
 
     def enlist_element(self, item_id, raw_data):
-        nb_deps = 1
+        """count the dependencies of an element and enlist it after them
+
+        The references are followed depth first with an explicit stack, a
+        reference to an element being enlisted (a cycle) is not counted. The
+        elements are not modified, the counts are kept in `cache_index`.
+
+        :param item_id: id of the element
+        :type item_id: str
+        :param raw_data: elements of the bundle by id
+        :type raw_data: dict
+        :return: the number of dependencies of the element, itself included
+        :rtype: int
+        """
+
         if item_id not in raw_data:
             return 0
-        existing_item = self.cache_index.get(item_id)
-        if existing_item is not None:
-            return existing_item["nb_deps"]
-        # Recursive enlist for every refs
-        item = raw_data[item_id]
-        for key, value in item.items():
-            if key.endswith("_refs"):
-                for element_ref in item[key]:
-                    nb_deps += self.enlist_element(element_ref, raw_data)
-            elif key.endswith("_ref"):
-                # Need to handle the special case of recursive ref for created by ref
-                is_created_by_ref = key == "created_by_ref"
-                if is_created_by_ref:
-                    is_marking = item["id"].startswith("marking-definition--")
-                    if is_marking is False:
-                        nb_deps += self.enlist_element(value, raw_data)
+        existing_nb_deps = self.cache_index.get(item_id)
+        if existing_nb_deps is not None:
+            return existing_nb_deps
+        cache_index = self.cache_index
+        references = OpenCTIStix2Scheduler.references
+        in_progress = {item_id}
+        # Elements being enlisted, with their pending refs and dep counting
+        ids = [item_id]
+        pending_refs = [iter(references(raw_data[item_id]))]
+        nb_deps = [1]
+        while len(ids) > 0:
+            for reference in pending_refs[-1]:
+                existing_nb_deps = cache_index.get(reference)
+                if existing_nb_deps is not None:
+                    nb_deps[-1] += existing_nb_deps
+                elif reference in raw_data and reference not in in_progress:
+                    in_progress.add(reference)
+                    ids.append(reference)
+                    pending_refs.append(iter(references(raw_data[reference])))
+                    nb_deps.append(1)
+                    break
+            else:
+                # All refs are enlisted, get the final dep counting
+                current_id = ids.pop()
+                pending_refs.pop()
+                current_nb_deps = nb_deps.pop()
+                in_progress.discard(current_id)
+                cache_index[current_id] = current_nb_deps
+                self.elements.append(raw_data[current_id])
+                if len(nb_deps) > 0:
+                    nb_deps[-1] += current_nb_deps
+        return self.cache_index[item_id]
+
+    def _enlist_elements(self, objects):
+        """enlist all the elements of a bundle, sorted by dependency count
+
+        Same walk as :py:meth:`enlist_element` on interned ids: the elements
+        and their references are numbered once, the walk then only handles
+        integers in arrays.
+
+        :param objects: the objects of the bundle
+        :type objects: list
+        """
+
+        # Intern the ids, the last element of an id is the enlisted one
+        positions = {}
+        items = []
+        for item in objects:
+            position = positions.setdefault(item["id"], len(items))
+            if position == len(items):
+                items.append(item)
+            else:
+                items[position] = item
+        # References to the elements of the bundle, stored contiguously
+        references = OpenCTIStix2Scheduler.references
+        offsets = array("q", [0])
+        targets = array("q")
+        for item in items:
+            for reference in references(item):
+                target = positions.get(reference)
+                if target is not None:
+                    targets.append(target)
+            offsets.append(len(targets))
+        count = len(items)
+        # 0 not enlisted, 1 being enlisted, 2 enlisted
+        states = bytearray(count)
+        nb_deps = array("q", bytes(8 * count))
+        if len(self.cache_index) > 0:
+            # Elements enlisted by a previous split
+            for position, item in enumerate(items):
+                existing_nb_deps = self.cache_index.get(item["id"])
+                if existing_nb_deps is not None:
+                    states[position] = 2
+                    nb_deps[position] = existing_nb_deps
+        enlisted = array("q")
+        for position in range(count):
+            if states[position] != 0:
+                continue
+            states[position] = 1
+            nb_deps[position] = 1
+            stack = [position]
+            next_refs = [offsets[position]]
+            while len(stack) > 0:
+                current = stack[-1]
+                index = next_refs[-1]
+                end = offsets[current + 1]
+                while index < end:
+                    target = targets[index]
+                    index += 1
+                    state = states[target]
+                    if state == 2:
+                        nb_deps[current] += nb_deps[target]
+                    elif state == 0:
+                        break
                 else:
-                    nb_deps += self.enlist_element(value, raw_data)
-        # Get the final dep counting and add in cache
-        item["nb_deps"] = nb_deps
-        self.elements.append(item)
-        self.cache_index[item_id] = item  # Put in cache
-        return nb_deps
-
-    def split_bundle(self, bundle, use_json=True, event_version=None) -> list:
+                    # All refs are enlisted, get the final dep counting
+                    stack.pop()
+                    next_refs.pop()
+                    states[current] = 2
+                    enlisted.append(current)
+                    if len(stack) > 0:
+                        nb_deps[stack[-1]] += nb_deps[current]
+                    continue
+                next_refs[-1] = index
+                states[target] = 1
+                nb_deps[target] = 1
+                stack.append(target)
+                next_refs.append(offsets[target])
+        self.cache_index.update(
+            (items[position]["id"], nb_deps[position]) for position in enlisted
+        )
+        # Stable sort, the elements with the same count stay in enlisting order
+        if len(self.elements) == 0:
+            self.elements.extend(
+                items[position]
+                for position in sorted(enlisted, key=nb_deps.__getitem__)
+            )
+        else:
+            self.elements.extend(items[position] for position in enlisted)
+            self.elements.sort(key=lambda elem: self.cache_index[elem["id"]])
+
+    def split_bundle(
+        self, bundle, use_json=True, event_version=None, max_objects=1, max_size=None
+    ) -> list:
         """splits a valid stix2 bundle into a list of bundles
+
+        See :py:meth:`iter_bundles` for the arguments.
+
+        :return: returns a list of bundles
+        :rtype: list
+        """
+        return list(
+            self.iter_bundles(bundle, use_json, event_version, max_objects, max_size)
+        )
+
+    def iter_bundles(
+        self, bundle, use_json=True, event_version=None, max_objects=1, max_size=None
+    ) -> Iterator:
+        """splits a valid stix2 bundle, generating the bundles one at a time
+
+        The elements are packed in their dependency order, the references of
+        the elements of a bundle are in the same bundle or in a previous one.
+        The bundle is split right away and their number set in `nb_bundles`,
+        a bundle is only built and serialized when generated.
+
         :param bundle: valid stix2 bundle
         :type bundle:
         :param use_json: is JSON?
         :type use_json:
+        :param event_version: event version of the bundles, defaults to None
+        :type event_version: str, optional
+        :param max_objects: maximum number of elements per bundle, defaults to 1
+        :type max_objects: int, optional
+        :param max_size: maximum size in bytes of the JSON of a bundle, an element
+            larger than it is alone in its bundle, defaults to None (no limit)
+        :type max_size: int, optional
         :raises Exception: if data is not valid JSON
-        :return: returns a list of bundles
-        :rtype: list
+        :return: a generator of bundles
+        :rtype: Iterator
         """
         if use_json:
             try:
@@ -56,23 +200,42 @@ class OpenCTIStix2Splitter:
         if "objects" not in bundle_data:
             raise Exception("File data is not a valid bundle")
 
-        raw_data = {}
-        # Build flat list of elements
-        for item in bundle_data["objects"]:
-            raw_data[item["id"]] = item
-        for item in bundle_data["objects"]:
-            self.enlist_element(item["id"], raw_data)
-
-        # Build the bundles
-        bundles = []
+        self._enlist_elements(bundle_data["objects"])
 
-        def by_dep_size(elem):
-            return elem["nb_deps"]
+        # Pack the elements, a bundle ends before each boundary
+        boundaries = []
+        if max_objects == 1:
+            boundaries = range(1, len(self.elements) + 1)
+        else:
+            # Size of the JSON of a bundle without elements
+            empty_size = len(
+                json.dumps(self.stix2_create_bundle([], False, event_version))
+            )
+            start = 0
+            size = empty_size
+            for index, entity in enumerate(self.elements):
+                # Separator included, JSON is ASCII encoded
+                entity_size = len(json.dumps(entity)) + 2 if max_size is not None else 0
+                if index > start and (
+                    (max_objects is not None and index - start >= max_objects)
+                    or (max_size is not None and size + entity_size > max_size)
+                ):
+                    boundaries.append(index)
+                    start = index
+                    size = empty_size
+                size += entity_size
+            if len(self.elements) > start:
+                boundaries.append(len(self.elements))
+        self.nb_bundles = len(boundaries)
+        return self._create_bundles(
+            list(self.elements), boundaries, use_json, event_version
+        )
 
-        self.elements.sort(key=by_dep_size)
-        for entity in self.elements:
-            bundles.append(self.stix2_create_bundle([entity], use_json, event_version))
-        return bundles
+    def _create_bundles(self, elements, boundaries, use_json, event_version):
+        start = 0
+        for end in boundaries:
+            yield self.stix2_create_bundle(elements[start:end], use_json, event_version)
+            start = end
 
     @staticmethod
     def stix2_create_bundle(items, use_json, event_version=None):
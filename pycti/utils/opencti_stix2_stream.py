@@ -0,0 +1,271 @@
+# coding: utf-8
+
+import json
+import os
+import sqlite3
+import tempfile
+from array import array
+
+from pycti.utils.opencti_stix2_scheduler import OpenCTIStix2Scheduler, import_levels
+
+_DECODER = json.JSONDecoder()
+_WHITESPACE = " \t\n\r"
+# Longest incomplete token reported before the end of the buffer, "Infinit"
+_TOKEN_SIZE = 8
+
+
+class _BundleReader:
+    """Incremental decoding of the JSON values of a file"""
+
+    def __init__(self, file, chunk_size, max_value_size):
+        self.file = file
+        self.chunk_size = chunk_size
+        self.max_value_size = max_value_size
+        self.buffer = ""
+        self.index = 0
+        self.eof = False
+
+    def _fill(self):
+        # Read at least as much as buffered, a large value is decoded again
+        # a logarithmic number of times
+        chunk = self.file.read(max(self.chunk_size, len(self.buffer) - self.index))
+        if not chunk:
+            self.eof = True
+            return
+        self.buffer = self.buffer[self.index :] + chunk
+        self.index = 0
+
+    def peek(self):
+        while True:
+            while (
+                self.index < len(self.buffer) and self.buffer[self.index] in _WHITESPACE
+            ):
+                self.index += 1
+            if self.index < len(self.buffer) or self.eof:
+                return self.buffer[self.index : self.index + 1]
+            self._fill()
+
+    def expect(self, char):
+        if self.peek() != char:
+            raise ValueError(
+                "File data is not a valid bundle, expected " + char + " not found"
+            )
+        self.index += 1
+
+    def value(self):
+        self.peek()
+        while True:
+            try:
+                value, end = _DECODER.raw_decode(self.buffer, self.index)
+                # A number may continue in the next chunk
+                if end < len(self.buffer) or self.eof:
+                    self.index = end
+                    return value
+            except json.JSONDecodeError as e:
+                # Only a value cut at the end of the buffer can be completed
+                if self.eof or (
+                    e.pos < len(self.buffer) - _TOKEN_SIZE
+                    and not e.msg.startswith("Unterminated string")
+                ):
+                    raise
+            if len(self.buffer) - self.index > self.max_value_size:
+                raise ValueError(
+                    "File data is not a valid bundle, a value is larger than "
+                    + str(self.max_value_size)
+                    + " characters"
+                )
+            self._fill()
+
+
+def iter_bundle(file, chunk_size=1 << 16, max_value_size=1 << 28):
+    """decode a STIX2 bundle file incrementally
+
+    Only one object of the bundle is decoded at a time, the memory used does
+    not depend on the size of the bundle.
+
+    :param file: the bundle file, opened in text mode
+    :type file: io.TextIOBase
+    :param chunk_size: number of characters read at once, defaults to 65536
+    :type chunk_size: int, optional
+    :param max_value_size: maximum number of characters of an object,
+        defaults to 268435456
+    :type max_value_size: int, optional
+    :raises ValueError: if the file is not a valid JSON object or an object
+        is larger than `max_value_size`
+    :return: a generator of the `(key, value)` properties of the bundle, the
+        `objects` property is generated once per object
+    :rtype: Iterator[tuple]
+    """
+
+    reader = _BundleReader(file, chunk_size, max_value_size)
+    reader.expect("{")
+    if reader.peek() == "}":
+        return
+    while True:
+        key = reader.value()
+        reader.expect(":")
+        if key == "objects":
+            reader.expect("[")
+            if reader.peek() == "]":
+                reader.index += 1
+            else:
+                while True:
+                    yield key, reader.value()
+                    if reader.peek() != ",":
+                        break
+                    reader.index += 1
+                reader.expect("]")
+        else:
+            yield key, reader.value()
+        if reader.peek() != ",":
+            break
+        reader.index += 1
+    reader.expect("}")
+
+
+class OpenCTIStix2BundleIndex:
+    """On-disk index of the objects of a bundle, read in dependency order
+
+    The objects and their references are spilled to a temporary SQLite
+    database. Only the dependency graph is kept in memory, in arrays of a few
+    bytes per object and per reference, to group the objects in the import
+    levels of :py:class:`~pycti.utils.opencti_stix2_scheduler.OpenCTIStix2Scheduler`.
+    As in :py:class:`~pycti.utils.opencti_stix2_splitter.OpenCTIStix2Splitter`,
+    the last object of an id replaces the previous ones, at the position of
+    the first one.
+
+    :param directory: directory of the temporary database, defaults to the
+        system temporary directory
+    :type directory: str, optional
+    """
+
+    def __init__(self, directory=None):
+        fd, self.path = tempfile.mkstemp(
+            prefix="opencti-bundle-", suffix=".db", dir=directory
+        )
+        os.close(fd)
+        self.count = 0
+        # Number of added objects, the references of a replaced object are
+        # those of its last copy
+        self._copies = 0
+        self._connection = sqlite3.connect(self.path)
+        # Scratch database, deleted when closed
+        self._connection.execute("PRAGMA journal_mode=OFF")
+        self._connection.execute("PRAGMA synchronous=OFF")
+        self._connection.execute(
+            "CREATE TABLE objects (position INTEGER PRIMARY KEY, "
+            "id TEXT NOT NULL UNIQUE, phase INTEGER NOT NULL, copy INTEGER NOT NULL, "
+            "level INTEGER, data TEXT NOT NULL)"
+        )
+        self._connection.execute(
+            "CREATE TABLE refs (source INTEGER NOT NULL, copy INTEGER NOT NULL, "
+            "target TEXT NOT NULL)"
+        )
+
+    def __len__(self):
+        return self.count
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def add(self, item):
+        """add an object to the index
+
+        :param item: a STIX2 object
+        :type item: dict
+        """
+
+        self._copies += 1
+        phase = OpenCTIStix2Scheduler.phase(item)
+        data = json.dumps(item)
+        cursor = self._connection.execute(
+            "INSERT OR IGNORE INTO objects (position, id, phase, copy, data) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (self.count, item["id"], phase, self._copies, data),
+        )
+        if cursor.rowcount == 1:
+            position = self.count
+            self.count += 1
+        else:
+            # Already added, replaced by this copy
+            self._connection.execute(
+                "UPDATE objects SET phase = ?, copy = ?, data = ? WHERE id = ?",
+                (phase, self._copies, data, item["id"]),
+            )
+            (position,) = self._connection.execute(
+                "SELECT position FROM objects WHERE id = ?", (item["id"],)
+            ).fetchone()
+        references = set(OpenCTIStix2Scheduler.references(item))
+        references.discard(item["id"])
+        self._connection.executemany(
+            "INSERT INTO refs (source, copy, target) VALUES (?, ?, ?)",
+            [(position, self._copies, reference) for reference in references],
+        )
+
+    def _graph(self):
+        """load the dependency graph, the referencing objects of an object are
+        stored contiguously in `dependents`"""
+
+        phases = array("b")
+        for (phase,) in self._connection.execute(
+            "SELECT phase FROM objects ORDER BY position"
+        ):
+            phases.append(phase)
+        pending = array("i", bytes(4 * self.count))
+        offsets = array("q", bytes(8 * (self.count + 1)))
+        dependents = array("i")
+        # Only the references of the last copy of an object are kept
+        for target, source in self._connection.execute(
+            "SELECT targets.position, refs.source FROM refs "
+            "JOIN objects AS sources "
+            "ON sources.position = refs.source AND sources.copy = refs.copy "
+            "JOIN objects AS targets ON targets.id = refs.target "
+            "WHERE targets.position != refs.source ORDER BY targets.position"
+        ):
+            dependents.append(source)
+            offsets[target + 1] += 1
+            pending[source] += 1
+        for index in range(self.count):
+            offsets[index + 1] += offsets[index]
+        return phases, pending, offsets, dependents
+
+    def levels(self, chunk_size=1000):
+        """read the objects level by level
+
+        :param chunk_size: maximum number of objects read at once, defaults to 1000
+        :type chunk_size: int, optional
+        :return: a generator of lists of objects of the same level, in the
+            order of the levels
+        :rtype: Iterator[list]
+        """
+
+        levels = import_levels(*self._graph())
+        self._connection.executemany(
+            "UPDATE objects SET level = ? WHERE position = ?",
+            ((levels[index], index) for index in range(self.count)),
+        )
+        del levels
+        self._connection.execute("CREATE INDEX objects_level ON objects (level)")
+        self._connection.commit()
+        chunk = []
+        current_level = None
+        for level, data in self._connection.execute(
+            "SELECT level, data FROM objects ORDER BY level, position"
+        ):
+            if len(chunk) > 0 and (level != current_level or len(chunk) >= chunk_size):
+                yield chunk
+                chunk = []
+            current_level = level
+            chunk.append(json.loads(data))
+        if len(chunk) > 0:
+            yield chunk
+
+    def close(self):
+        """close and delete the temporary database"""
+
+        self._connection.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
@@ -0,0 +1,230 @@
+import json
+
+import pytest
+
+from pycti import OpenCTIApiClient
+from pycti.api.opencti_api_batch import (
+    OpenCTIApiBatch,
+    merge_operations,
+    parse_operation,
+)
+from pycti.api.opencti_api_data_loader import OpenCTIApiDataLoader
+
+LABEL_ADD = """
+    mutation LabelAdd($input: LabelAddInput) {
+        labelAdd(input: $input) {
+            id
+            value
+        }
+    }
+"""
+
+LABEL_READ = """
+    query Label($id: String!) {
+        label(id: $id) {
+            id
+            value
+        }
+    }
+"""
+
+
+class FakeResponse:
+    status_code = 200
+
+    def __init__(self, result):
+        self.result = result
+        self.text = json.dumps(result)
+
+    def json(self):
+        return self.result
+
+
+class FakeApi:
+    """Answers merged label operations like the GraphQL API would"""
+
+    get_request_context = OpenCTIApiClient.get_request_context
+    _check_request_context = OpenCTIApiClient._check_request_context
+    request_context = OpenCTIApiClient.request_context
+
+    def __init__(self):
+        self.documents = []
+        self.contexts = []
+
+    @staticmethod
+    def is_file_variable(value):
+        return False
+
+    def query_error(self, error):
+        return ValueError({"name": error["message"], "message": error["message"]})
+
+    def query(self, query, variables):
+        document, merged_variables, aliases = merge_operations([(query, variables)])
+        result = self.post_query(document, merged_variables).json()
+        if "errors" in result:
+            raise self.query_error(result["errors"][0])
+        return {"data": {key: result["data"][alias] for alias, key in aliases[0]}}
+
+    def post_query(self, query, variables):
+        self.documents.append(query)
+        self.contexts.append(self.get_request_context())
+        data = {}
+        errors = []
+        for name, value in variables.items():
+            alias = (
+                name.split("_")[0] + "_" + ("labelAdd" if "input" in name else "label")
+            )
+            if "input" in name and value["value"] == "error":
+                errors.append({"message": "Invalid value", "path": [alias]})
+                data[alias] = None
+            else:
+                label = value["value"] if "input" in name else value
+                data[alias] = {"id": "label--" + label, "value": label}
+        return FakeResponse(
+            {"data": data, "errors": errors} if errors else {"data": data}
+        )
+
+
+def test_parse_operation():
+    operation_type, definitions, declared, fields = parse_operation(LABEL_ADD)
+    assert operation_type == "mutation"
+    assert definitions == "$input: LabelAddInput"
+    assert declared == ("input",)
+    assert [key for key, _ in fields] == ["labelAdd"]
+    with pytest.raises(ValueError):
+        parse_operation("subscription Test { test }")
+
+
+def test_merge_operations():
+    document, variables, aliases = merge_operations(
+        [
+            (LABEL_ADD, {"input": {"value": "a"}, "unused": 1}),
+            (LABEL_ADD, {"input": {"value": "b"}}),
+        ]
+    )
+    assert document.startswith(
+        "mutation Batch($b0_input: LabelAddInput, $b1_input: LabelAddInput)"
+    )
+    assert "b1_labelAdd: labelAdd(input: $b1_input)" in document
+    assert variables == {"b0_input": {"value": "a"}, "b1_input": {"value": "b"}}
+    assert aliases == [[("b0_labelAdd", "labelAdd")], [("b1_labelAdd", "labelAdd")]]
+    with pytest.raises(ValueError):
+        merge_operations([(LABEL_ADD, {}), (LABEL_READ, {})])
+
+
+def test_batch_fans_out_results_and_errors():
+    api = FakeApi()
+    with OpenCTIApiBatch(api, max_operations=10) as batch:
+        futures = [
+            batch.query(LABEL_ADD, {"input": {"value": value}})
+            for value in ["a", "error", "c"]
+        ]
+        futures.append(batch.query(LABEL_READ, {"id": "d"}))
+    assert futures[0].result()["data"]["labelAdd"]["value"] == "a"
+    with pytest.raises(ValueError):
+        futures[1].result()
+    assert futures[2].result()["data"]["labelAdd"]["id"] == "label--c"
+    assert futures[3].result()["data"]["label"]["value"] == "d"
+    # Mutations and the query are sent in two separate requests
+    assert len(api.documents) == 2
+
+
+def test_batch_max_operations():
+    api = FakeApi()
+    with OpenCTIApiBatch(api, max_operations=2, linger=10) as batch:
+        futures = [
+            batch.query(LABEL_ADD, {"input": {"value": str(value)}})
+            for value in range(5)
+        ]
+    assert [f.result()["data"]["labelAdd"]["value"] for f in futures] == [
+        "0",
+        "1",
+        "2",
+        "3",
+        "4",
+    ]
+    assert len(api.documents) == 3
+
+
+def test_batch_query_many_sends_at_once():
+    api = FakeApi()
+    # Without linger, only the operations queued at once are merged
+    with OpenCTIApiBatch(api, max_operations=10, linger=0) as batch:
+        futures = batch.query_many(
+            [(LABEL_ADD, {"input": {"value": str(value)}}) for value in range(5)]
+        )
+        assert [f.result()["data"]["labelAdd"]["value"] for f in futures] == [
+            "0",
+            "1",
+            "2",
+            "3",
+            "4",
+        ]
+    assert len(api.documents) == 1
+
+
+def test_data_loader_deduplicates_and_memoizes_reads():
+    api = FakeApi()
+    with OpenCTIApiDataLoader(api, linger=10) as loader:
+        assert loader.accepts(LABEL_READ, {"id": "a"})
+        assert not loader.accepts(LABEL_ADD, {"input": {"value": "a"}})
+        futures = [loader.query(LABEL_READ, {"id": id}) for id in ["a", "b", "a"]]
+        loader.flush()
+        assert [f.result()["data"]["label"]["id"] for f in futures] == [
+            "label--a",
+            "label--b",
+            "label--a",
+        ]
+        # Every caller gets its own copy of the memoized result
+        futures[0].result()["data"]["label"]["value"] = "changed"
+        result = loader.query(LABEL_READ, {"id": "a"}, blocking=True).result()
+        assert result["data"]["label"]["value"] == "a"
+    assert len(api.documents) == 1
+    assert (loader.hits, loader.misses) == (2, 2)
+
+
+def test_data_loader_forgets_mutated_reads():
+    api = FakeApi()
+    with OpenCTIApiDataLoader(api, linger=10) as loader:
+        futures = [loader.query(LABEL_READ, {"id": id}) for id in ["a", "b", "c"]]
+        loader.flush()
+        assert all(future.result() for future in futures)
+        loader.executed(LABEL_READ, {"id": "a"}, {"data": {"label": None}})
+        # Forgotten by the id of the input and by the id of the result
+        loader.executed(
+            LABEL_ADD,
+            {"input": {"value": "x", "stix_id": "a"}},
+            {"data": {"labelAdd": {"id": "label--b"}}},
+        )
+        for id in ["a", "b", "c"]:
+            loader.query(LABEL_READ, {"id": id}, blocking=True).result()
+    assert (loader.hits, loader.misses) == (1, 5)
+
+
+def test_data_loader_forgets_least_recently_used_reads():
+    api = FakeApi()
+    with OpenCTIApiDataLoader(api, linger=0, max_size=2) as loader:
+        for id in ["a", "b", "a", "c", "b", "a"]:
+            loader.query(LABEL_READ, {"id": id}, blocking=True).result()
+        # b was forgotten for c, then a for b
+        assert (loader.hits, loader.misses) == (1, 5)
+        assert list(loader._memo) == [(LABEL_READ, "b"), (LABEL_READ, "a")]
+        assert set(loader._index) == {"a", "b", "label--a", "label--b"}
+
+
+def test_batch_keeps_request_context():
+    api = FakeApi()
+    with OpenCTIApiBatch(api, max_operations=10, linger=1) as batch:
+        futures = []
+        for applicant_id in ["user-1", "user-2", "user-1"]:
+            with api.request_context(applicant_id=applicant_id):
+                for value in ["a", "b"]:
+                    futures.append(batch.query(LABEL_ADD, {"input": {"value": value}}))
+    assert all(future.result() for future in futures)
+    # Operations of different applicants are never merged together
+    assert api.contexts == [
+        {"applicant_id": "user-1"},
+        {"applicant_id": "user-2"},
+        {"applicant_id": "user-1"},
+    ]
+    assert api.get_request_context() == {}
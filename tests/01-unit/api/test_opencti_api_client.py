@@ -0,0 +1,251 @@
+import base64
+import hashlib
+import http.server
+import io
+import threading
+
+import pytest
+import requests
+
+from pycti import OpenCTIApiClient
+
+LABELS = """
+    query Labels($first: Int, $after: ID) {
+        labels(first: $first, after: $after) {
+            edges {
+                node {
+                    id
+                }
+            }
+            pageInfo {
+                endCursor
+                hasNextPage
+            }
+        }
+    }
+"""
+
+
+class FakeLabelsClient(OpenCTIApiClient):
+    """Serves a paginated list of labels without a server"""
+
+    def __init__(self, count):
+        self.count = count
+        self.cursors = []
+        self.threads = set()
+
+    def log(self, level, message):
+        pass
+
+    def query(self, query, variables={}):
+        self.cursors.append(variables["after"])
+        self.threads.add(threading.current_thread().name)
+        start = int(variables["after"] or 0)
+        stop = min(start + variables["first"], self.count)
+        return {
+            "data": {
+                "labels": {
+                    "edges": [
+                        {"node": {"id": "label--" + str(i)}} for i in range(start, stop)
+                    ],
+                    "pageInfo": {
+                        "endCursor": str(stop),
+                        "hasNextPage": stop < self.count,
+                    },
+                }
+            }
+        }
+
+
+def test_paginate_yields_all_pages():
+    api = FakeLabelsClient(25)
+    labels = api.paginate(LABELS, {"first": 10, "after": None}, "labels")
+    assert [label["id"] for label in labels] == ["label--" + str(i) for i in range(25)]
+    assert api.cursors == [None, "10", "20"]
+    assert any(name.startswith("opencti-paginate") for name in api.threads)
+
+
+def test_paginate_is_lazy():
+    api = FakeLabelsClient(25)
+    labels = api.paginate(LABELS, {"first": 10}, "labels", prefetch=False)
+    assert api.cursors == []
+    assert next(labels)["id"] == "label--0"
+    assert api.cursors == [None]
+    labels.close()
+    assert api.cursors == [None]
+
+
+def test_request_context_is_local():
+    api = FakeLabelsClient(0)
+    api.request_headers = {"Authorization": "Bearer token"}
+    headers = {}
+
+    def worker(applicant_id):
+        with api.request_context(applicant_id=applicant_id, retry_number=2):
+            barrier.wait()
+            headers[applicant_id] = api.get_request_headers()
+
+    barrier = threading.Barrier(2, timeout=5)
+    threads = [
+        threading.Thread(target=worker, args=(applicant_id,))
+        for applicant_id in ["user-1", "user-2"]
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert headers["user-1"]["opencti-applicant-id"] == "user-1"
+    assert headers["user-2"]["opencti-applicant-id"] == "user-2"
+    assert headers["user-2"]["opencti-retry-number"] == "2"
+    assert api.get_request_headers() == {"Authorization": "Bearer token"}
+
+
+def test_client_headers_are_shared_by_threads():
+    api = FakeLabelsClient(0)
+    api.request_headers = {"Authorization": "Bearer token"}
+    api.set_applicant_id_header("user-1")
+    headers = {}
+
+    def worker():
+        headers["thread"] = api.get_request_headers()
+        with api.request_context(applicant_id="user-2"):
+            headers["context"] = api.get_request_headers()
+
+    thread = threading.Thread(target=worker)
+    thread.start()
+    thread.join()
+    # A thread starts with an empty context, the client headers apply
+    assert headers["thread"]["opencti-applicant-id"] == "user-1"
+    assert headers["context"]["opencti-applicant-id"] == "user-2"
+    with api.request_context(applicant_id=None):
+        assert "opencti-applicant-id" not in api.get_request_headers()
+
+
+CONTENT = bytes(range(256)) * 400
+
+
+class FileHandler(http.server.BaseHTTPRequestHandler):
+    """Serves CONTENT, the first response is cut in the middle"""
+
+    protocol_version = "HTTP/1.1"
+    ranges = []
+
+    def do_GET(self):
+        if self.path.endswith("/missing"):
+            self.send_response(404)
+            self.send_header("Content-Type", "text/plain; charset=iso-8859-1")
+            self.send_header("Content-Length", "10")
+            self.end_headers()
+            self.wfile.write("Not found\xe9".encode("iso-8859-1"))
+            return
+        header = self.headers.get("Range")
+        FileHandler.ranges.append(header)
+        start = int(header[len("bytes=") : -1]) if header else 0
+        if start >= len(CONTENT):
+            self.send_response(416)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        self.send_response(206 if header else 200)
+        self.send_header("Content-Length", str(len(CONTENT) - start))
+        self.end_headers()
+        if len(FileHandler.ranges) == 1:
+            self.wfile.write(CONTENT[: len(CONTENT) // 2])
+            self.wfile.flush()
+            self.close_connection = True
+            return
+        self.wfile.write(CONTENT[start:])
+
+    def log_message(self, format, *args):
+        pass
+
+
+class FakeFilesClient(OpenCTIApiClient):
+    def __init__(self):
+        self.request_headers = {}
+        self.ssl_verify = False
+        self.proxies = None
+        self.session = requests.Session()
+
+    def log(self, level, message):
+        pass
+
+
+@pytest.fixture
+def file_uri(monkeypatch):
+    monkeypatch.setattr("pycti.api.opencti_api_client.time.sleep", lambda delay: None)
+    FileHandler.ranges = []
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), FileHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield "http://127.0.0.1:%d/storage/get/file" % server.server_address[1]
+    server.shutdown()
+    server.server_close()
+
+
+def test_download_resumes(file_uri):
+    api = FakeFilesClient()
+    buffer = io.BytesIO()
+    written = api.download_opencti_file(
+        file_uri,
+        buffer,
+        size=len(CONTENT),
+        expected_hash=hashlib.sha256(CONTENT).hexdigest(),
+        chunk_size=4096,
+    )
+    assert written == len(CONTENT)
+    assert buffer.getvalue() == CONTENT
+    # Resumed after the last chunk fully received before the cut
+    assert FileHandler.ranges == [
+        None,
+        "bytes=%d-" % (len(CONTENT) // 2 // 4096 * 4096),
+    ]
+
+
+def test_download_completes_file(file_uri, tmp_path):
+    api = FakeFilesClient()
+    FileHandler.ranges = [None]
+    path = tmp_path / "file"
+    path.write_bytes(CONTENT[:1000])
+    digest = hashlib.sha256(CONTENT).hexdigest()
+    written = api.download_opencti_file(
+        file_uri, str(path), expected_hash=digest, resume=True
+    )
+    assert written == len(CONTENT)
+    assert path.read_bytes() == CONTENT
+    written = api.download_opencti_file(
+        file_uri, str(path), expected_hash=digest, resume=True
+    )
+    assert written == len(CONTENT)
+    assert FileHandler.ranges[1:] == ["bytes=1000-", "bytes=%d-" % len(CONTENT)]
+    # A corrupted file is removed
+    path.write_bytes(b"corrupted")
+    with pytest.raises(ValueError):
+        api.download_opencti_file(
+            file_uri, str(path), expected_hash=digest, resume=True
+        )
+    assert not path.exists()
+
+
+def test_download_overwrites_file(file_uri, tmp_path):
+    api = FakeFilesClient()
+    FileHandler.ranges = [None]
+    path = tmp_path / "file"
+    path.write_bytes(b"stale content" * 10000)
+    assert api.download_opencti_file(file_uri, str(path)) == len(CONTENT)
+    assert path.read_bytes() == CONTENT
+    assert FileHandler.ranges[1:] == [None]
+
+
+def test_fetch_opencti_file(file_uri):
+    api = FakeFilesClient()
+    FileHandler.ranges = [None]
+    assert api.fetch_opencti_file(file_uri, binary=True) == CONTENT
+    assert api.fetch_opencti_file(file_uri, serialize=True) == (
+        base64.b64encode(CONTENT).decode()
+    )
+    # The body is returned whatever the status, decoded with its charset
+    missing_uri = file_uri.replace("/file", "/missing")
+    assert api.fetch_opencti_file(missing_uri) == "Not found\xe9"
+    with pytest.raises(ValueError):
+        api.download_opencti_file(missing_uri, io.BytesIO())
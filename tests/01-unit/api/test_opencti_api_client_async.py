@@ -0,0 +1,56 @@
+import asyncio
+import copy
+import threading
+
+import requests
+
+from pycti import AsyncOpenCTIApiClient
+from pycti.api import opencti_api_client_async
+
+
+class FakeNamespace:
+    def __init__(self, opencti):
+        self.opencti = opencti
+
+    def read(self, id):
+        return {"id": id, "thread": threading.get_ident()}
+
+
+class FakeClient:
+    """Records the thread running the blocking constructor"""
+
+    instances = []
+
+    def __init__(self, url, token, **kwargs):
+        self.url = url
+        self.thread = threading.get_ident()
+        self.session = requests.session()
+        self.label = FakeNamespace(self)
+        FakeClient.instances.append(self)
+
+
+def test_async_client_opens_off_the_loop(monkeypatch):
+    monkeypatch.setattr(opencti_api_client_async, "OpenCTIApiClient", FakeClient)
+    FakeClient.instances = []
+
+    async def read_labels():
+        client = AsyncOpenCTIApiClient("http://opencti", "token", max_workers=2)
+        assert FakeClient.instances == []
+        assert not hasattr(client, "label")
+        assert getattr(client, "label", None) is None
+        copy.copy(client)
+        # Opened once by concurrent callers
+        await asyncio.gather(client.open(), client.open())
+        async with client:
+            assert await client.open() is client
+            assert isinstance(client.session, requests.Session)
+            labels = await asyncio.gather(
+                *[client.label.read(id=str(index)) for index in range(4)]
+            )
+        return threading.get_ident(), labels
+
+    loop_thread, labels = asyncio.run(read_labels())
+    assert len(FakeClient.instances) == 1
+    assert FakeClient.instances[0].thread != loop_thread
+    assert [label["id"] for label in labels] == ["0", "1", "2", "3"]
+    assert all(label["thread"] != loop_thread for label in labels)
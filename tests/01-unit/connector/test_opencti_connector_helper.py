@@ -0,0 +1,429 @@
+import gzip
+import http.server
+import json
+import threading
+from concurrent.futures import Future
+
+import pika
+import pytest
+
+from pycti import OpenCTIApiClient
+from pycti.connector.opencti_connector_helper import (
+    ListenQueue,
+    ListenStream,
+    OpenCTIConnectorHelper,
+    PushQueue,
+    RetryPolicy,
+    SSEReader,
+    _iter_lines,
+    _parse_messages,
+    decode_push_message,
+)
+
+CONFIG = {
+    "connection": {
+        "host": "localhost",
+        "use_ssl": False,
+        "port": 5672,
+        "user": "guest",
+        "pass": "guest",
+    },
+    "push_exchange": "amqp.worker.exchange",
+}
+
+
+class FakeChannel:
+    is_open = True
+
+    def __init__(self):
+        self.bodies = []
+
+    def basic_publish(self, exchange, routing_key, body, properties):
+        self.bodies.append(body)
+
+
+class FakeFrame:
+    def __init__(self, method):
+        self.method = method
+
+
+class FakeIOLoop:
+    def __init__(self):
+        self.timers = []
+
+    def call_later(self, delay, callback):
+        self.timers.append((delay, callback))
+
+
+class FakeConnection:
+    def __init__(self):
+        self.ioloop = FakeIOLoop()
+
+
+def test_push_queue_confirms():
+    push_queue = PushQueue(
+        None, CONFIG, window=3, retry_policy=RetryPolicy(backoff=2, jitter=0)
+    )
+    push_queue.pika_connection = FakeConnection()
+    futures = [push_queue.publish("push_routing_1", str(i)) for i in range(3)]
+    # Published once the channel is in confirm mode
+    channel = FakeChannel()
+    push_queue._on_confirm_delivery_ok(channel)
+    assert channel.bodies == ["0", "1", "2"]
+    push_queue._on_delivery_confirmation(
+        FakeFrame(pika.spec.Basic.Ack(delivery_tag=2, multiple=True))
+    )
+    assert futures[0].done() and futures[1].done()
+    assert not futures[2].done()
+    push_queue._on_delivery_confirmation(
+        FakeFrame(pika.spec.Basic.Nack(delivery_tag=3))
+    )
+    # Published again after the backoff
+    delay, callback = push_queue.pika_connection.ioloop.timers.pop()
+    assert delay == 2
+    assert channel.bodies == ["0", "1", "2"]
+    callback()
+    assert channel.bodies == ["0", "1", "2", "2"]
+    push_queue._on_delivery_confirmation(FakeFrame(pika.spec.Basic.Ack(delivery_tag=4)))
+    assert futures[2].done()
+    metrics = push_queue.get_metrics()
+    assert metrics["published"] == 4
+    assert metrics["confirmed"] == 3
+    assert metrics["nacked"] == 1
+    assert metrics["unconfirmed"] == 0
+    assert metrics["latency_max"] >= metrics["latency_avg"] > 0
+
+
+def test_push_queue_dead_letter():
+    dead_letters = []
+    retry_policy = RetryPolicy(
+        max_attempts=2,
+        dead_letter=lambda routing_key, body, properties: dead_letters.append(body),
+    )
+    push_queue = PushQueue(None, CONFIG, retry_policy=retry_policy)
+    push_queue.pika_connection = FakeConnection()
+    push_queue._on_confirm_delivery_ok(FakeChannel())
+    future = push_queue.publish("push_routing_1", "bundle")
+    push_queue._publish_messages()
+    for delivery_tag in [1, 2]:
+        push_queue._on_delivery_confirmation(
+            FakeFrame(pika.spec.Basic.Nack(delivery_tag=delivery_tag))
+        )
+        for _, callback in push_queue.pika_connection.ioloop.timers:
+            callback()
+    assert dead_letters == ["bundle"]
+    with pytest.raises(ValueError):
+        future.result()
+    assert push_queue.get_metrics()["dead_lettered"] == 1
+
+
+class FakeHelper:
+    def __init__(self):
+        self.errors = []
+
+    def log_error(self, message):
+        self.errors.append(message)
+
+
+def test_push_queue_gives_up_connecting():
+    config = dict(CONFIG, connection=dict(CONFIG["connection"], port=1))
+    push_queue = PushQueue(
+        FakeHelper(), config, retry_policy=RetryPolicy(max_attempts=2, backoff=0.01)
+    )
+    future = push_queue.publish("push_routing_1", "bundle")
+    push_queue.start()
+    with pytest.raises(ValueError, match="after 2 attempts"):
+        future.result(timeout=30)
+    push_queue.join(timeout=30)
+    assert not push_queue.is_alive()
+    with pytest.raises(ValueError, match="after 2 attempts"):
+        push_queue.publish("push_routing_1", "bundle")
+
+
+def test_push_queue_window_timeout():
+    push_queue = PushQueue(None, CONFIG, window=1, timeout=0.5)
+    push_queue.publish("push_routing_1", "bundle")
+    with pytest.raises(ValueError, match="in time"):
+        push_queue.publish("push_routing_1", "bundle")
+
+
+def test_retry_policy_delay():
+    retry_policy = RetryPolicy(backoff=1, max_backoff=10, jitter=0.5)
+    for attempt, delay in [(1, 1), (2, 2), (3, 4), (10, 10)]:
+        assert delay / 2 <= retry_policy.delay(attempt) <= delay
+
+
+class FakePushQueue:
+    def __init__(self):
+        self.messages = []
+
+    def publish(self, routing_key, body, properties=None):
+        self.messages.append((body, pika.BasicProperties(**(properties or {}))))
+
+
+@pytest.mark.parametrize("push_encoding", ["json", "raw", "gzip"])
+def test_push_encodings(push_encoding):
+    helper = OpenCTIConnectorHelper.__new__(OpenCTIConnectorHelper)
+    helper.api = FakeApi()
+    helper._applicant_id = "applicant"
+    helper.connector_id = "connector"
+    push_queue = FakePushQueue()
+    objects = [{"id": "malware--" + str(i), "type": "malware"} for i in range(10)]
+    bundle = json.dumps({"type": "bundle", "id": "bundle--1", "objects": objects})
+    helper._send_bundle(
+        push_queue,
+        bundle,
+        work_id="work",
+        sequence=2,
+        push_encoding=push_encoding,
+    )
+    body, properties = push_queue.messages[0]
+    message = decode_push_message(body, properties)
+    assert message["applicant_id"] == "applicant"
+    assert message["work_id"] == "work"
+    assert message["action_sequence"] == 2
+    if push_encoding == "gzip":
+        assert message["content_encoding"] == "gzip"
+        assert len(body) < len(bundle)
+        assert gzip.decompress(message["content"]) == bundle.encode("utf-8")
+    else:
+        assert message["content_encoding"] is None
+        assert message["content"] == bundle.encode("utf-8")
+
+
+class ConfirmingPushQueue(FakePushQueue):
+    timeout = 1
+
+    def publish(self, routing_key, body, properties=None):
+        super().publish(routing_key, body, properties)
+        future = Future()
+        future.set_result(None)
+        return future
+
+
+def test_send_stix2_bundle_returns_bundles():
+    helper = OpenCTIConnectorHelper.__new__(OpenCTIConnectorHelper)
+    helper.api = FakeApi()
+    helper._work_id = None
+    helper._applicant_id = "applicant"
+    helper.connector_id = "connector"
+    helper.connect_bundle_max_objects = 1
+    helper.connect_bundle_max_size = None
+    helper.connect_push_encoding = "json"
+    helper.connect_validate_before_import = False
+    push_queue = ConfirmingPushQueue()
+    helper.get_push_queue = lambda: push_queue
+    objects = [{"id": "malware--" + str(i), "type": "malware"} for i in range(3)]
+    bundle = json.dumps({"type": "bundle", "id": "bundle--1", "objects": objects})
+    bundles = helper.send_stix2_bundle(bundle)
+    assert len(bundles) == 3
+    assert [json.loads(b)["objects"][0]["id"] for b in bundles] == [
+        "malware--0",
+        "malware--1",
+        "malware--2",
+    ]
+    assert helper.send_stix2_bundle(bundle, keep_bundles=False) == []
+    assert len(push_queue.messages) == 6
+
+
+class FakeWork:
+    def __init__(self):
+        self.processed = []
+
+    def to_received(self, work_id, message):
+        pass
+
+    def to_processed(self, work_id, message, in_error=False):
+        self.processed.append((work_id, message))
+
+
+class FakeApi(OpenCTIApiClient):
+    def __init__(self):
+        self.work = FakeWork()
+
+
+class FakeBlockingConnection:
+    def __init__(self):
+        self.callbacks = []
+
+    def add_callback_threadsafe(self, callback):
+        self.callbacks.append(callback)
+
+
+def test_listen_queue_concurrency():
+    helper = OpenCTIConnectorHelper.__new__(OpenCTIConnectorHelper)
+    helper._work_id = None
+    helper._applicant_id = None
+    helper.api = FakeApi()
+    barrier = threading.Barrier(3, timeout=5)
+
+    def callback(event):
+        # The messages are processed at once, each with its own work id
+        barrier.wait()
+        return event + " " + helper.work_id
+
+    config = dict(CONFIG, listen="listen_queue")
+    listen_queue = ListenQueue(helper, config, callback, concurrency=3)
+    listen_queue.pika_connection = FakeBlockingConnection()
+    channel = FakeChannel()
+    channel.acks = []
+    channel.basic_ack = lambda delivery_tag: channel.acks.append(delivery_tag)
+    for index in range(3):
+        body = json.dumps(
+            {
+                "internal": {"work_id": "work" + str(index), "applicant_id": None},
+                "event": "event" + str(index),
+            }
+        )
+        method = pika.spec.Basic.Deliver(delivery_tag=index + 1)
+        listen_queue._process_message(channel, method, None, body)
+    listen_queue.executor.shutdown(wait=True)
+    assert sorted(helper.api.work.processed) == [
+        ("work" + str(index), "event" + str(index) + " work" + str(index))
+        for index in range(3)
+    ]
+    for callback in listen_queue.pika_connection.callbacks:
+        callback()
+    assert sorted(channel.acks) == [1, 2, 3]
+    assert listen_queue.processing == {}
+
+
+class FakeMessage:
+    def __init__(self, event, id=None):
+        self.event = event
+        self.id = id
+
+
+class FakeStateHelper:
+    def __init__(self):
+        self.state = {"connectorLastEventId": "-"}
+        self.saved = []
+
+    def get_state(self):
+        return dict(self.state)
+
+    def set_state(self, state):
+        self.state = state
+        self.saved.append(state["connectorLastEventId"])
+
+
+def listen_stream(helper, callback, **kwargs):
+    return ListenStream(
+        helper, callback, None, None, None, None, None, None, None, **kwargs
+    )
+
+
+def test_listen_stream_batches():
+    helper = FakeStateHelper()
+    batches = []
+
+    def callback(batch):
+        batches.append([msg.id for msg in batch])
+        # The checkpoint is only saved after the batch is processed
+        assert helper.state["connectorLastEventId"] != batch[-1].id
+
+    messages = [
+        FakeMessage("connected"),
+        FakeMessage("create", "1-0"),
+        FakeMessage("update", "2-0"),
+        FakeMessage("heartbeat"),
+        FakeMessage("delete", "3-0"),
+        FakeMessage("sync", "4-0"),
+        FakeMessage("create", "5-0"),
+    ]
+    listen_stream(helper, callback, batch_size=2)._consume_batches(iter(messages))
+    assert batches == [["1-0", "2-0"], ["3-0", "5-0"]]
+    assert helper.saved == ["2-0", "5-0"]
+
+
+def test_listen_stream_batch_timeout():
+    helper = FakeStateHelper()
+    batches = []
+    messages = [FakeMessage("create", "1-0"), FakeMessage("sync", "2-0")]
+    stream = listen_stream(helper, batches.append, batch_size=10, batch_timeout=0)
+    stream._consume_batches(iter(messages))
+    assert [[msg.id for msg in batch] for batch in batches] == [["1-0"]]
+    assert helper.saved == ["1-0", "2-0"]
+
+
+def test_listen_stream_batch_failure():
+    helper = FakeStateHelper()
+
+    def callback(batch):
+        raise ValueError("Unavailable")
+
+    messages = [FakeMessage("create", "1-0"), FakeMessage("create", "2-0")]
+    with pytest.raises(ValueError):
+        listen_stream(helper, callback, batch_size=2)._consume_batches(iter(messages))
+    assert helper.saved == []
+
+
+def test_parse_sse_messages():
+    chunks = [
+        b': comment\r\nevent: create\r\nid: 1-0\r\ndata: {"a":',
+        b" 1}\r\ndata: \xc3",
+        b"\xa9\r\n\r\nevent: heartbeat\n\ndata: last\n\n",
+    ]
+    messages = list(_parse_messages(_iter_lines(iter(chunks))))
+    assert [(msg.event, msg.id, msg.data) for msg in messages] == [
+        ("create", "1-0", '{"a": 1}\n\u00e9'),
+        ("heartbeat", None, ""),
+        ("message", None, "last"),
+    ]
+
+
+class StreamHandler(http.server.BaseHTTPRequestHandler):
+    """Streams two events per connection, then closes the connection"""
+
+    requests = []
+
+    def do_GET(self):
+        StreamHandler.requests.append((self.path, self.headers.get("Last-Event-ID")))
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.end_headers()
+        start = len(StreamHandler.requests) * 2
+        for index in range(start, start + 2):
+            self.wfile.write(
+                ("id: %d-0\nevent: create\ndata: %d\n\n" % (index, index)).encode()
+            )
+            self.wfile.flush()
+
+    def log_message(self, format, *args):
+        pass
+
+
+def test_sse_reader_reconnects():
+    StreamHandler.requests = []
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), StreamHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        url = "http://127.0.0.1:%d/stream?from=0" % server.server_address[1]
+        reader = SSEReader(url, retry_policy=RetryPolicy(backoff=0.01))
+        messages = []
+        for message in reader:
+            messages.append(message.data)
+            if len(messages) == 6:
+                reader.close()
+    finally:
+        server.shutdown()
+        server.server_close()
+    assert messages == ["2", "3", "4", "5", "6", "7"]
+    assert reader.reconnections == 2
+    # Every reconnection resumes after the last received event
+    assert StreamHandler.requests == [
+        ("/stream?from=0", None),
+        ("/stream?from=3-0", "3-0"),
+        ("/stream?from=5-0", "5-0"),
+    ]
+
+
+def test_sse_reader_gives_up():
+    reader = SSEReader(
+        "http://127.0.0.1:9/stream",
+        heartbeat_timeout=1,
+        retry_policy=RetryPolicy(max_attempts=2, backoff=0.01),
+    )
+    with pytest.raises(ValueError):
+        list(reader)
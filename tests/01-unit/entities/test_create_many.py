@@ -0,0 +1,110 @@
+import json
+
+from pycti import OpenCTIApiClient
+from pycti.api.opencti_api_batch import parse_operation
+from pycti.entities.opencti_indicator import Indicator
+from pycti.entities.opencti_stix_cyber_observable import StixCyberObservable
+
+
+class FakeResponse:
+    status_code = 200
+
+    def __init__(self, result):
+        self.result = result
+        self.text = json.dumps(result)
+
+    def json(self):
+        return self.result
+
+
+class FakeCreationClient(OpenCTIApiClient):
+    """Answers indicator and observable creations without a server"""
+
+    def __init__(self):
+        self.documents = []
+        self.variables = []
+
+    def log(self, level, message):
+        pass
+
+    def post_query(self, query, variables={}):
+        self.documents.append(query)
+        self.variables.append(variables)
+        data = {}
+        errors = []
+        for key, _ in parse_operation(query)[3]:
+            prefix = key.split("_")[0] + "_" if key.startswith("b") else ""
+            if key.endswith("indicatorAdd"):
+                value = variables[prefix + "input"]["pattern"]
+            else:
+                argument = variables[prefix + "type"].replace("-", "")
+                observable_input = variables[prefix + argument]
+                value = observable_input["value"]
+            if value == "invalid":
+                errors.append({"message": "Invalid value", "path": [key]})
+                data[key] = None
+            else:
+                data[key] = {"id": value}
+        return FakeResponse(
+            {"data": data, "errors": errors} if errors else {"data": data}
+        )
+
+
+def test_observables_create_many():
+    api = FakeCreationClient()
+    items = [
+        {"observableData": {"type": "ipv4-addr", "value": "10.0.0." + str(i)}}
+        for i in range(5)
+    ]
+    items[1]["observableData"]["value"] = "invalid"
+    items.append({"observableData": {}})
+    results = StixCyberObservable(api, None).create_many(items, chunk_size=2)
+    assert [r["id"] for r in results if isinstance(r, dict)] == [
+        "10.0.0.0",
+        "10.0.0.2",
+        "10.0.0.3",
+        "10.0.0.4",
+    ]
+    assert isinstance(results[1], ValueError)
+    assert isinstance(results[5], ValueError)
+    assert len(api.documents) == 3
+    assert "$b0_IPv4Addr: IPv4AddrAddInput" in api.documents[0]
+    assert "StixFile" not in api.documents[0]
+
+
+def test_observables_input_fields():
+    observable = StixCyberObservable(None, None)
+    type, input_variables = observable._prepare_input(
+        observableData={"type": "x509-certificate", "hashes": {"MD5": "abc"}}
+    )
+    assert type == "X509-Certificate"
+    assert input_variables["X509Certificate"]["is_self_signed"] is False
+    assert input_variables["X509Certificate"]["hashes"] == [
+        {"algorithm": "MD5", "hash": "abc"}
+    ]
+    _, input_variables = observable._prepare_input(
+        simple_observable_key="Email-Message.date", simple_observable_value="now"
+    )
+    assert input_variables["EmailMessage"]["attribute_date"] == "now"
+    type, _ = observable._prepare_input(observableData={"type": "file"})
+    assert type == "StixFile"
+
+
+def test_indicators_create_many():
+    api = FakeCreationClient()
+    items = [
+        {
+            "name": "indicator",
+            "pattern": pattern,
+            "x_opencti_main_observable_type": "File",
+        }
+        for pattern in ["a", "invalid", "c"]
+    ]
+    items.append({"name": "indicator"})
+    results = Indicator(api).create_many(items)
+    assert results[0]["id"] == "a"
+    assert isinstance(results[1], ValueError)
+    assert results[2]["id"] == "c"
+    assert isinstance(results[3], ValueError)
+    assert len(api.documents) == 1
+    assert api.variables[0]["b0_input"]["x_opencti_main_observable_type"] == "StixFile"
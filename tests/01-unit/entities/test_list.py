@@ -0,0 +1,61 @@
+import pytest
+
+from pycti import OpenCTIApiClient
+from pycti.entities.opencti_malware import Malware
+from pycti.entities.opencti_stix_sighting_relationship import (
+    StixSightingRelationship,
+)
+
+
+class FakeListClient(OpenCTIApiClient):
+    """Serves 3 pages of 2 entities of any list query without a server"""
+
+    def __init__(self, field):
+        self.field = field
+        self.variables = []
+
+    def log(self, level, message):
+        pass
+
+    def query(self, query, variables={}):
+        self.variables.append(dict(variables))
+        start = int(variables["after"] or 0)
+        return {
+            "data": {
+                self.field: {
+                    "edges": [
+                        {"node": {"id": str(index)}} for index in [start, start + 1]
+                    ],
+                    "pageInfo": {
+                        "endCursor": str(start + 2),
+                        "hasNextPage": start + 2 < 6,
+                    },
+                }
+            }
+        }
+
+
+@pytest.mark.parametrize(
+    "entity_class, field",
+    [
+        (Malware, "malwares"),
+        (StixSightingRelationship, "stixSightingRelationships"),
+    ],
+)
+def test_list_paths_send_the_same_variables(entity_class, field):
+    api = FakeListClient(field)
+    entity = entity_class(api)
+    filters = [{"key": "name", "values": ["x"]}]
+    all_entities = entity.list(filters=filters, getAll=True)
+    assert [item["id"] for item in all_entities] == [str(i) for i in range(6)]
+    assert [variables["after"] for variables in api.variables] == [None, "2", "4"]
+    streamed = list(entity.list(filters=filters, stream=True))
+    assert [item["id"] for item in streamed] == [str(i) for i in range(6)]
+    entity.list(filters=filters)
+    # Only the cursor differs between the paths
+    sent = [
+        {key: value for key, value in variables.items() if key not in ["after"]}
+        for variables in api.variables
+    ]
+    assert all(variables == sent[0] for variables in sent)
+    assert sent[0]["filters"] == filters
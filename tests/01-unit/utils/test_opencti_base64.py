@@ -0,0 +1,13 @@
+import base64
+
+from pycti.utils.opencti_base64 import Base64Writer
+
+
+def test_base64_writer():
+    content = bytes(range(256)) * 10
+    writer = Base64Writer()
+    for start in range(0, len(content), 7):
+        chunk = content[start : start + 7]
+        assert writer.write(chunk) == len(chunk)
+    assert writer.getvalue() == base64.b64encode(content).decode()
+    assert Base64Writer().getvalue() == ""
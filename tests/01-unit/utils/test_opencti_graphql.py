@@ -0,0 +1,18 @@
+import pytest
+
+from pycti.utils.opencti_graphql import read_name, skip_block, skip_ignored
+
+
+def test_graphql_tokens():
+    document = ' # comment\n  label(id: "}#") { id } ,'
+    index = skip_ignored(document, 0)
+    name, index = read_name(document, index)
+    assert name == "label"
+    index = skip_block(document, index)
+    assert document[index:] == " { id } ,"
+    index = skip_block(document, skip_ignored(document, index))
+    assert skip_ignored(document, index) == len(document)
+    with pytest.raises(ValueError):
+        read_name(document, len(document) - 1)
+    with pytest.raises(ValueError):
+        skip_block("{ id", 0)
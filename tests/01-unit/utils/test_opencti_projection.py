@@ -0,0 +1,42 @@
+import pytest
+
+from pycti.entities.opencti_report import Report
+from pycti.entities.opencti_stix_object_or_stix_relationship import (
+    StixObjectOrStixRelationship,
+)
+from pycti.utils.opencti_projection import _selections, get_projection
+
+
+def fields(selection):
+    return [name for name, _, _ in _selections(selection)]
+
+
+def test_minimal_projection():
+    properties = Report(None).properties
+    assert get_projection(properties, "minimal").split() == [
+        "id",
+        "standard_id",
+        "entity_type",
+        "parent_types",
+    ]
+    # Without root identifiers, the identifiers of the inline fragments are kept
+    properties = StixObjectOrStixRelationship(None).properties
+    assert "... on" in get_projection(properties, "minimal")
+
+
+def test_standard_projection():
+    properties = Report(None).properties
+    standard = get_projection(properties, "standard")
+    assert len(standard) < len(properties) / 2
+    assert "importFiles" not in standard
+    assert fields(standard) == [
+        key for key in fields(properties) if key != "importFiles"
+    ]
+
+
+def test_full_and_unknown_projections():
+    properties = Report(None).properties
+    assert get_projection(properties) == properties
+    assert get_projection(properties, "full") == properties
+    with pytest.raises(ValueError):
+        get_projection(properties, "everything")
@@ -0,0 +1,81 @@
+import threading
+import time
+
+import pytest
+
+from pycti.utils.opencti_stix2_cache import (
+    OpenCTIStix2MemoryCache,
+    OpenCTIStix2SqliteCache,
+)
+
+
+def test_memory_cache_lru_and_counters():
+    cache = OpenCTIStix2MemoryCache(max_size=2)
+    cache["a"] = {"id": "1"}
+    cache["b"] = {"id": "2"}
+    assert "a" in cache
+    cache["c"] = {"id": "3"}
+    assert "b" not in cache
+    assert cache["a"] == {"id": "1"}
+    assert cache.get("c") == {"id": "3"}
+    assert len(cache) == 2
+    assert (cache.hits, cache.misses, cache.evictions) == (2, 1, 1)
+
+
+def test_memory_cache_ttl():
+    cache = OpenCTIStix2MemoryCache(ttl=0.01)
+    cache["a"] = {"id": "1"}
+    assert "a" in cache
+    time.sleep(0.02)
+    assert "a" not in cache
+    assert cache.get("a") is None
+
+
+def test_sqlite_cache_persists(tmp_path):
+    path = str(tmp_path / "mapping_cache.db")
+    cache = OpenCTIStix2SqliteCache(path)
+    cache["indicator--1"] = {"id": "1", "type": "indicator"}
+    cache.close()
+    cache = OpenCTIStix2SqliteCache(path)
+    assert "indicator--1" in cache
+    assert cache["indicator--1"] == {"id": "1", "type": "indicator"}
+    assert "indicator--2" not in cache
+    assert (cache.hits, cache.misses) == (1, 1)
+    del cache["indicator--1"]
+    with pytest.raises(KeyError):
+        cache["indicator--1"]
+    cache.close()
+
+
+def test_sqlite_cache_ttl(tmp_path):
+    cache = OpenCTIStix2SqliteCache(str(tmp_path / "mapping_cache.db"), ttl=0.01)
+    cache["a"] = {"id": "1"}
+    assert cache.get("a") == {"id": "1"}
+    time.sleep(0.02)
+    assert cache.get("a") is None
+    cache.purge()
+    assert len(cache) == 0
+    cache.close()
+
+
+def test_memory_cache_get_while_evicting():
+    cache = OpenCTIStix2MemoryCache(max_size=10)
+    errors = []
+
+    def read():
+        try:
+            for index in range(20000):
+                value = cache.get(str(index % 20))
+                assert value is None or value["id"] == str(index % 20)
+        except Exception as e:  # pylint: disable=broad-except
+            errors.append(e)
+
+    readers = [threading.Thread(target=read) for _ in range(4)]
+    for reader in readers:
+        reader.start()
+    for index in range(20000):
+        cache[str(index % 20)] = {"id": str(index % 20)}
+    for reader in readers:
+        reader.join()
+    assert errors == []
+    assert len(cache) == 10
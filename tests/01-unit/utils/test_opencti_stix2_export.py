@@ -0,0 +1,294 @@
+import base64
+import io
+import json
+import threading
+
+import pytest
+
+from pycti import OpenCTIApiClient
+from pycti.api.opencti_api_batch import OpenCTIApiBatch
+from pycti.api.opencti_api_data_loader import OpenCTIApiDataLoader
+from pycti.utils.opencti_stix2 import OpenCTIStix2
+from pycti.utils.opencti_stix2_export import (
+    OpenCTIStix2ExportIndex,
+    export_memo,
+    memoize,
+)
+
+
+def indicator(index):
+    return {
+        "id": "opencti-indicator-" + str(index),
+        "standard_id": "indicator--" + str(index),
+        "entity_type": "Indicator",
+        "parent_types": ["Stix-Domain-Object"],
+        "name": "Indicator " + str(index),
+        "pattern": "[ipv4-addr:value = '10.0.0." + str(index % 256) + "']",
+        "createdBy": {
+            "id": "opencti-identity-" + str(index % 2),
+            "standard_id": "identity--" + str(index % 2),
+            "entity_type": "Organization",
+            "parent_types": ["Identity"],
+            "name": "Author " + str(index % 2),
+        },
+        "createdById": "opencti-identity-" + str(index % 2),
+        "objectMarking": [
+            {
+                "standard_id": "marking-definition--tlp-white",
+                "definition_type": "TLP",
+                "definition": "TLP:WHITE",
+            }
+        ],
+        "objectMarkingIds": ["opencti-marking"],
+    }
+
+
+class FakeLister:
+    def __init__(self, count):
+        self.count = count
+
+    def list(self, **kwargs):
+        # The exported entities are modified, they are generated for each list
+        entities = (indicator(index) for index in range(self.count))
+        return entities if kwargs.get("stream") else list(entities)
+
+    def read(self, **kwargs):
+        return None
+
+
+class FakeExportClient(OpenCTIApiClient):
+    """Lists generated indicators without a server"""
+
+    def __init__(self, count):
+        self.indicator = FakeLister(count)
+
+    def __getattr__(self, name):
+        # The other entities are empty
+        return FakeLister(0)
+
+    def log(self, level, message):
+        pass
+
+
+def test_export_index():
+    index = OpenCTIStix2ExportIndex([{"id": "a"}, {"id": "b"}, {"id": "a"}])
+    assert index.extend([{"id": "c"}, {"id": "b"}, {"type": "no-id"}]) == [{"id": "c"}]
+    assert [item["id"] for item in index] == ["a", "b", "c"]
+    assert "b" in index and "d" not in index
+    assert len(index) == 3
+
+
+def test_export_list_deduplicates_and_memoizes():
+    api = FakeExportClient(10)
+    stix2 = OpenCTIStix2(api)
+    generated = []
+    generate_export = stix2.generate_export
+
+    def counting_generate_export(entity):
+        generated.append(entity["id"])
+        return generate_export(entity)
+
+    stix2.generate_export = counting_generate_export
+    bundle = stix2.export_list("Indicator")
+    ids = [item["id"] for item in bundle["objects"]]
+    assert ids[:3] == ["identity--0", "marking-definition--tlp-white", "indicator--0"]
+    assert len(ids) == len(set(ids)) == 13
+    # Each author is generated once for the whole export
+    assert sorted(x for x in generated if "identity" in x) == [
+        "opencti-identity-0",
+        "opencti-identity-1",
+    ]
+    # Without an export in progress, nothing is memoized
+    first = stix2.prepare_export(stix2.generate_export(indicator(0)))
+    second = stix2.prepare_export(stix2.generate_export(indicator(2)))
+    assert first[0] == second[0] and first[0] is not second[0]
+
+
+def test_export_list_to():
+    api = FakeExportClient(10)
+    stix2 = OpenCTIStix2(api)
+    text = io.StringIO()
+    assert stix2.export_list_to(text, "Indicator") == 13
+    binary = io.BytesIO()
+    assert stix2.export_list_to(binary, "Indicator") == 13
+    bundles = [json.loads(text.getvalue()), json.loads(binary.getvalue())]
+    expected = stix2.export_list("Indicator")["objects"]
+    for bundle in bundles:
+        assert bundle["type"] == "bundle"
+        assert bundle["objects"] == expected
+    empty = io.StringIO()
+    assert stix2.export_list_to(empty, "Malware") == 0
+    assert json.loads(empty.getvalue())["objects"] == []
+
+
+class FakeNeighbors:
+    """Serves the relations of a malware and reads their targets"""
+
+    def __init__(self, count):
+        self.count = count
+        self.reads = []
+        self.loaders = set()
+        self.threads = set()
+
+    def list(self, **kwargs):
+        # Every tool is the target of two relations
+        return [
+            {
+                "id": "opencti-relationship-" + str(index),
+                "standard_id": "relationship--" + str(index),
+                "entity_type": "stix-core-relationship",
+                "parent_types": ["basic-relationship"],
+                "relationship_type": "uses",
+                "from": {
+                    "id": "opencti-malware",
+                    "standard_id": "malware--1",
+                    "entity_type": "Malware",
+                },
+                "to": {
+                    "id": "opencti-tool-" + str(index // 2),
+                    "standard_id": "tool--" + str(index // 2),
+                    "entity_type": "Tool",
+                },
+            }
+            for index in range(self.count * 2)
+        ]
+
+    def read(self, **kwargs):
+        self.reads.append(kwargs["id"])
+        self.loaders.add(OpenCTIApiBatch.current())
+        self.threads.add(threading.current_thread().name)
+        index = kwargs["id"].split("-")[-1]
+        return {
+            "id": kwargs["id"],
+            "standard_id": "tool--" + index,
+            "entity_type": "Tool",
+            "parent_types": ["Stix-Domain-Object"],
+            "name": "Tool " + index,
+        }
+
+
+class FakeNeighborsClient(OpenCTIApiClient):
+    def __init__(self, count):
+        self.neighbors = FakeNeighbors(count)
+        self.stix_core_relationship = self.neighbors
+        self.tool = self.neighbors
+        self.stix_sighting_relationship = FakeLister(0)
+
+    def __getattr__(self, name):
+        return FakeLister(0)
+
+    def log(self, level, message):
+        pass
+
+
+def test_full_export_resolves_neighbors_concurrently():
+    api = FakeNeighborsClient(20)
+    stix2 = OpenCTIStix2(api)
+    malware = {
+        "id": "opencti-malware",
+        "standard_id": "malware--1",
+        "entity_type": "Malware",
+        "parent_types": ["Stix-Domain-Object"],
+        "name": "Malware",
+    }
+    objects = stix2.prepare_export(stix2.generate_export(malware), "full")
+    ids = [item["id"] for item in objects]
+    assert ids == (
+        ["malware--1"]
+        + ["relationship--" + str(index) for index in range(40)]
+        + ["tool--" + str(index) for index in range(20)]
+    )
+    # Each target is read once, from the threads of a data loader
+    assert sorted(api.neighbors.reads) == sorted(
+        "opencti-tool-" + str(index) for index in range(20)
+    )
+    assert all(
+        isinstance(loader, OpenCTIApiDataLoader) for loader in api.neighbors.loaders
+    )
+    assert all(name.startswith("opencti-batch") for name in api.neighbors.threads)
+
+
+class FakeFileResponse:
+    status_code = 200
+
+    def __init__(self, content):
+        self.content = content
+
+    def raise_for_status(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        pass
+
+    def iter_content(self, chunk_size):
+        for start in range(0, len(self.content), 5):
+            yield self.content[start : start + 5]
+
+
+class FakeSession:
+    def __init__(self):
+        self.urls = []
+
+    def get(self, url, **kwargs):
+        self.urls.append(url)
+        return FakeFileResponse(("content of " + url.split("/")[-1]).encode())
+
+
+class FakeFilesClient(OpenCTIApiClient):
+    def __init__(self):
+        self.api_url = "http://opencti/graphql"
+        self.request_headers = {}
+        self.ssl_verify = False
+        self.proxies = None
+        self.session = FakeSession()
+
+
+def import_file(file_id, size):
+    return {
+        "id": file_id,
+        "name": file_id + ".txt",
+        "size": size,
+        "metaData": {"mimetype": "text/plain", "version": None},
+    }
+
+
+def test_export_files():
+    api = FakeFilesClient()
+    stix2 = OpenCTIStix2(api, export_file_max_size=100)
+    files = [import_file("a", 10), import_file("b", 1000), import_file("c", 10)]
+    with export_memo():
+        exported = stix2.export_files(files)
+        executor = memoize(("executor", "file"), None)
+        assert stix2.export_files([import_file("a", 10)]) == exported[:1]
+        # One pool for the whole export
+        assert memoize(("executor", "file"), None) is executor
+    with pytest.raises(RuntimeError):
+        executor.submit(print)
+    assert exported == [
+        {
+            "name": "a.txt",
+            "mime_type": "text/plain",
+            "version": None,
+            "data": base64.b64encode(b"content of a").decode(),
+        },
+        {
+            "name": "b.txt",
+            "mime_type": "text/plain",
+            "version": None,
+            "uri": "http://opencti/storage/get/b",
+        },
+        {
+            "name": "c.txt",
+            "mime_type": "text/plain",
+            "version": None,
+            "data": base64.b64encode(b"content of c").decode(),
+        },
+    ]
+    # Each file is downloaded once during an export, large files never
+    assert sorted(api.session.urls) == [
+        "http://opencti/storage/get/a",
+        "http://opencti/storage/get/c",
+    ]
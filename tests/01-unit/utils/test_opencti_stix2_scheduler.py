@@ -0,0 +1,69 @@
+import json
+
+from pycti.utils.opencti_stix2_scheduler import OpenCTIStix2Scheduler
+from pycti.utils.opencti_stix2_splitter import OpenCTIStix2Splitter
+
+
+def test_levels_respect_references():
+    with open("./tests/data/enterprise-attack.json") as file:
+        bundle = json.load(file)
+    bundles = OpenCTIStix2Splitter().split_bundle(bundle, False)
+    objects = [item for split in bundles for item in split["objects"]]
+    levels = OpenCTIStix2Scheduler(objects).levels()
+    assert sum(len(level) for level in levels) == len(objects)
+    level_of = {}
+    for index, level in enumerate(levels):
+        for item in level:
+            level_of[item["id"]] = index
+    for item in objects:
+        for reference in OpenCTIStix2Scheduler.references(item):
+            if reference in level_of:
+                assert level_of[reference] < level_of[item["id"]]
+    assert levels[0][0]["type"] in ["marking-definition", "identity"]
+    assert levels[-1][0]["type"] == "relationship"
+
+
+def test_levels_break_cycles():
+    objects = [
+        {
+            "id": "relationship--1",
+            "type": "relationship",
+            "source_ref": "malware--1",
+            "target_ref": "malware--2",
+        },
+        {"id": "malware--1", "type": "malware", "object_refs": ["malware--2"]},
+        {"id": "malware--2", "type": "malware", "object_refs": ["malware--1"]},
+        {"id": "identity--1", "type": "identity"},
+    ]
+    levels = OpenCTIStix2Scheduler(objects).levels()
+    assert [[item["id"] for item in level] for level in levels] == [
+        ["identity--1"],
+        ["malware--1"],
+        ["malware--2"],
+        ["relationship--1"],
+    ]
+
+
+def test_levels_break_independent_cycles_together():
+    objects = []
+    for index in range(10000):
+        objects.append(
+            {
+                "id": "malware--a" + str(index),
+                "type": "malware",
+                "x_ref": "b" + str(index),
+            }
+        )
+        objects.append(
+            {
+                "id": "b" + str(index),
+                "type": "malware",
+                "x_ref": "malware--a" + str(index),
+            }
+        )
+    # A cycle waiting for another one is broken after it
+    objects.append({"id": "c", "type": "malware", "x_refs": ["d", "malware--a0"]})
+    objects.append({"id": "d", "type": "malware", "x_ref": "c"})
+    levels = OpenCTIStix2Scheduler(objects).levels()
+    assert [len(level) for level in levels] == [10000, 10000, 1, 1]
+    assert [item["id"] for item in levels[2] + levels[3]] == ["c", "d"]
@@ -1,3 +1,5 @@
+import json
+
 from stix2 import Report
 
 from pycti.utils.opencti_stix2_splitter import OpenCTIStix2Splitter
@@ -40,3 +42,105 @@ def test_crate_bundle():
     for key in ["type", "id", "spec_version", "objects", "x_opencti_event_version"]:
         assert key in bundle
     assert len(bundle.keys()) == 5
+
+
+def test_split_bundle_long_chain():
+    # Deeper than the recursion limit
+    objects = [{"id": "malware--0", "type": "malware"}]
+    for index in range(1, 5000):
+        objects.append(
+            {
+                "id": "malware--" + str(index),
+                "type": "malware",
+                "sample_refs": ["malware--" + str(index - 1)],
+            }
+        )
+    objects.reverse()
+    bundle = {"type": "bundle", "id": "bundle--1", "objects": objects}
+    bundles = OpenCTIStix2Splitter().split_bundle(bundle, False)
+    assert [split["objects"][0]["id"] for split in bundles] == [
+        "malware--" + str(index) for index in range(5000)
+    ]
+    assert all("nb_deps" not in item for item in objects)
+
+
+def test_split_bundle_cycle():
+    objects = [
+        {"id": "malware--1", "type": "malware", "sample_refs": ["malware--2"]},
+        {"id": "malware--2", "type": "malware", "sample_refs": ["malware--1"]},
+        {"id": "malware--3", "type": "malware", "sample_refs": ["malware--3"]},
+    ]
+    stix_splitter = OpenCTIStix2Splitter()
+    bundles = stix_splitter.split_bundle(
+        {"type": "bundle", "id": "bundle--1", "objects": objects}, False
+    )
+    assert [split["objects"][0]["id"] for split in bundles] == [
+        "malware--2",
+        "malware--3",
+        "malware--1",
+    ]
+    assert stix_splitter.cache_index == {
+        "malware--1": 2,
+        "malware--2": 1,
+        "malware--3": 1,
+    }
+
+
+def test_split_bundle_packing():
+    with open("./tests/data/enterprise-attack.json") as file:
+        content = file.read()
+    bundles = OpenCTIStix2Splitter().split_bundle(
+        content, True, max_objects=500, max_size=1000000
+    )
+    assert len(bundles) < 7029
+    ids = set(item["id"] for item in json.loads(content)["objects"])
+    seen = set()
+    nb_objects = 0
+    for split in bundles:
+        assert len(split.encode("utf-8")) <= 1000000
+        objects = json.loads(split)["objects"]
+        assert 0 < len(objects) <= 500
+        nb_objects += len(objects)
+        seen.update(item["id"] for item in objects)
+        for item in objects:
+            for key, value in item.items():
+                if key.endswith("_refs"):
+                    references = value
+                elif key.endswith("_ref") and not (
+                    key == "created_by_ref"
+                    and item["id"].startswith("marking-definition--")
+                ):
+                    references = [value]
+                else:
+                    continue
+                for reference in references:
+                    if reference in ids:
+                        assert reference in seen
+    assert nb_objects == 7029
+
+
+def test_split_bundle_packing_oversized():
+    objects = [
+        {"id": "malware--" + str(index), "type": "malware", "name": "x" * 100}
+        for index in range(3)
+    ]
+    bundles = OpenCTIStix2Splitter().split_bundle(
+        {"type": "bundle", "id": "bundle--1", "objects": objects},
+        False,
+        max_objects=None,
+        max_size=50,
+    )
+    assert [len(split["objects"]) for split in bundles] == [1, 1, 1]
+
+
+def test_iter_bundles():
+    with open("./tests/data/enterprise-attack.json") as file:
+        bundle = json.load(file)
+    stix_splitter = OpenCTIStix2Splitter()
+    bundles = stix_splitter.iter_bundles(bundle, False, max_objects=1000)
+    assert stix_splitter.nb_bundles == 8
+    first = next(bundles)
+    assert len(first["objects"]) == 1000
+    assert sum(len(split["objects"]) for split in bundles) == 6029
+    expected = OpenCTIStix2Splitter().split_bundle(bundle, False, max_objects=1000)
+    assert first["objects"] == expected[0]["objects"]
@@ -0,0 +1,138 @@
+import io
+import json
+
+import pytest
+
+from pycti import OpenCTIApiClient
+from pycti.utils.opencti_stix2 import OpenCTIStix2
+from pycti.utils.opencti_stix2_scheduler import OpenCTIStix2Scheduler
+from pycti.utils.opencti_stix2_splitter import OpenCTIStix2Splitter
+from pycti.utils.opencti_stix2_stream import OpenCTIStix2BundleIndex, iter_bundle
+
+
+class FakeImportClient(OpenCTIApiClient):
+    """Runs the import loop without a server"""
+
+    def __init__(self):
+        pass
+
+    def log(self, level, message):
+        pass
+
+
+def test_iter_bundle_small_chunks():
+    bundle = {
+        "type": "bundle",
+        "id": "bundle--1",
+        "objects": [
+            {"id": "malware--1", "type": "malware", "name": 'a, [b] {c} "d"'},
+            {"id": "x--1", "type": "x", "x_score": 12345678, "x_list": [1.5, None]},
+        ],
+        "x_opencti_event_version": "3",
+    }
+    file = io.StringIO(json.dumps(bundle, indent=2))
+    assert list(iter_bundle(file, chunk_size=3)) == [
+        ("type", "bundle"),
+        ("id", "bundle--1"),
+        ("objects", bundle["objects"][0]),
+        ("objects", bundle["objects"][1]),
+        ("x_opencti_event_version", "3"),
+    ]
+    assert list(iter_bundle(io.StringIO('{"objects": []}'))) == []
+
+
+def test_iter_bundle_stops_on_invalid_object():
+    objects = ",".join(
+        json.dumps({"id": "malware--" + str(i), "type": "malware"})
+        for i in range(10000)
+    )
+    file = io.StringIO('{"objects": [{"id": malware--0}, ' + objects + "]}")
+    with pytest.raises(ValueError):
+        list(iter_bundle(file, chunk_size=1024))
+    # Raised without reading the rest of the file
+    assert file.tell() < 4096
+    large = json.dumps({"id": "malware--0", "type": "malware", "name": "a" * 1000})
+    file = io.StringIO('{"objects": [' + large + "]}")
+    with pytest.raises(ValueError, match="larger than 100 characters"):
+        list(iter_bundle(file, chunk_size=16, max_value_size=100))
+
+
+def test_index_levels_with_cycles():
+    objects = [
+        {"id": "malware--" + str(i), "type": "malware", "x_ref": "malware--" + str(j)}
+        for i, j in [(0, 1), (1, 2), (2, 0), (3, 4), (4, 3), (5, 3)]
+    ]
+    with OpenCTIStix2BundleIndex() as index:
+        for item in objects:
+            index.add(item)
+        levels = list(index.levels(chunk_size=len(objects)))
+    expected = OpenCTIStix2Scheduler(objects).levels()
+    assert [[item["id"] for item in level] for level in levels] == [
+        [item["id"] for item in level] for level in expected
+    ]
+
+
+def test_index_keeps_last_copy_like_splitter():
+    objects = [
+        {"id": "malware--1", "type": "malware", "name": "first", "x_ref": "tool--1"},
+        {"id": "tool--1", "type": "tool", "name": "tool"},
+        {"id": "malware--2", "type": "malware", "x_ref": "malware--1"},
+        {"id": "malware--1", "type": "malware", "name": "last"},
+    ]
+    with OpenCTIStix2BundleIndex() as index:
+        for item in objects:
+            index.add(item)
+        assert len(index) == 3
+        levels = list(index.levels(chunk_size=len(objects)))
+    bundles = OpenCTIStix2Splitter().split_bundle(
+        {"type": "bundle", "id": "bundle--1", "objects": objects}, False
+    )
+    split = [item for bundle in bundles for item in bundle["objects"]]
+    expected = OpenCTIStix2Scheduler(split).levels()
+    assert levels == expected
+    # The reference of the replaced copy is dropped
+    assert [[item["id"] for item in level] for level in levels] == [
+        ["malware--1", "tool--1"],
+        ["malware--2"],
+    ]
+    assert levels[0][0]["name"] == "last"
+
+
+def test_index_levels_match_scheduler():
+    with open("./tests/data/enterprise-attack.json") as file:
+        objects = [value for key, value in iter_bundle(file) if key == "objects"]
+    with OpenCTIStix2BundleIndex() as index:
+        for item in objects:
+            index.add(item)
+        levels = list(index.levels(chunk_size=len(objects)))
+    expected = OpenCTIStix2Scheduler(objects).levels()
+    assert [sorted(item["id"] for item in level) for level in levels] == [
+        sorted(item["id"] for item in level) for level in expected
+    ]
+
+
+def test_import_bundle_stream():
+    bundle = {
+        "type": "bundle",
+        "id": "bundle--1",
+        "objects": [
+            {
+                "id": "relationship--1",
+                "type": "relationship",
+                "source_ref": "malware--1",
+                "target_ref": "malware--2",
+            },
+            {"id": "malware--1", "type": "malware", "object_refs": ["malware--2"]},
+            {"id": "malware--2", "type": "malware"},
+            {"id": "malware--3", "type": "malware"},
+        ],
+    }
+    stix2 = OpenCTIStix2(FakeImportClient())
+    imported = []
+    stix2.prefetch_vocabulary = lambda objects, *args: None
+    stix2.import_item = lambda item, *args: imported.append(item["id"])
+    count = stix2.import_bundle_stream(
+        io.StringIO(json.dumps(bundle)), max_workers=2, chunk_size=1
+    )
+    assert count == 4
+    assert imported == ["malware--2", "malware--3", "malware--1", "relationship--1"]
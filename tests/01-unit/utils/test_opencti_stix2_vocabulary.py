@@ -0,0 +1,115 @@
+import json
+
+from pycti import OpenCTIApiClient
+from pycti.api.opencti_api_batch import parse_operation
+from pycti.entities.opencti_external_reference import ExternalReference
+from pycti.entities.opencti_kill_chain_phase import KillChainPhase
+from pycti.entities.opencti_label import Label
+from pycti.utils.opencti_stix2 import OpenCTIStix2
+
+
+class FakeResponse:
+    status_code = 200
+
+    def __init__(self, result):
+        self.result = result
+        self.text = json.dumps(result)
+
+    def json(self):
+        return self.result
+
+
+class FakeVocabularyClient(OpenCTIApiClient):
+    """Answers vocabulary creations without a server"""
+
+    def __init__(self):
+        self.requests = 0
+        self.operations = []
+        self.label = Label(self)
+        self.kill_chain_phase = KillChainPhase(self)
+        self.external_reference = ExternalReference(self, None)
+
+    def log(self, level, message):
+        pass
+
+    def post_query(self, query, variables={}):
+        self.requests += 1
+        data = {}
+        for key, selection in parse_operation(query)[3]:
+            field = selection.split("(")[0].strip()
+            prefix = key.split("_")[0] + "_" if key.startswith("b") else ""
+            self.operations.append(field)
+            if field == "labelAdd":
+                value = variables[prefix + "input"]["value"]
+                data[key] = {"id": "label-" + value, "value": value}
+            elif field == "killChainPhaseAdd":
+                value = variables[prefix + "input"]["phase_name"]
+                data[key] = {"id": "phase-" + value, "entity_type": "Kill-Chain-Phase"}
+            else:
+                value = variables[prefix + "input"]["url"]
+                data[key] = {"id": "ref-" + value, "entity_type": "External-Reference"}
+        return FakeResponse({"data": data})
+
+
+def test_prefetch_vocabulary():
+    api = FakeVocabularyClient()
+    stix2 = OpenCTIStix2(api)
+    stix2.mapping_cache["label_known"] = {"id": "label-known"}
+    phase = {"kill_chain_name": "mitre-attack", "phase_name": "execution"}
+    objects = [
+        {
+            "id": "malware--1",
+            "type": "malware",
+            "labels": ["a", "b", "known"],
+            "kill_chain_phases": [phase],
+            "external_references": [
+                {"source_name": "x", "url": "http://x"},
+                {"source_name": "no url"},
+            ],
+            "object_marking_refs": ["marking-definition--1", "marking-definition--2"],
+        },
+        {
+            "id": "malware--2",
+            "type": "malware",
+            "x_opencti_tags": [{"value": "c", "color": "#fff"}],
+            "kill_chain_phases": [phase],
+            "external_references": [{"source_name": "x", "url": "http://x"}],
+            "object_marking_refs": ["marking-definition--1"],
+        },
+        {"id": "marking-definition--2", "type": "marking-definition"},
+        {"id": "tool--1", "type": "tool", "labels": ["out of scope"]},
+        {
+            "id": "malware--1",
+            "type": "malware",
+            "labels": ["patch"],
+            "x_opencti_patch": {},
+        },
+    ]
+    stix2.prefetch_vocabulary(objects, ["malware"], "3")
+    assert sorted(api.operations) == [
+        "externalReferenceAdd",
+        "killChainPhaseAdd",
+        "labelAdd",
+        "labelAdd",
+        "labelAdd",
+    ]
+    # The mutations are sent in one request
+    assert api.requests == 1
+    assert stix2.get_label_id("a") == "label-a"
+    assert stix2.get_label_id("c") == "label-c"
+    assert stix2.mapping_cache["mitre-attackexecution"]["id"] == "phase-execution"
+    assert stix2.mapping_cache["http://x"] == {
+        "id": "ref-http://x",
+        "type": "External-Reference",
+    }
+    assert "marking-definition--1" not in stix2.mapping_cache
+    # Nothing created for the objects out of scope and the patches
+    assert "label_out of scope" not in stix2.mapping_cache
+    assert "label_patch" not in stix2.mapping_cache
+    # Nothing left to resolve while importing the objects
+    api.operations = []
+    embedded = stix2.extract_embedded_relationships(objects[0])
+    assert embedded["object_label"] == ["label-a", "label-b", "label-known"]
+    assert embedded["kill_chain_phases"] == ["phase-execution"]
+    assert embedded["external_references"] == ["ref-http://x"]
+    assert api.operations == []
@@ -0,0 +1,20 @@
+import asyncio
+
+from pycti import AsyncOpenCTIApiClient
+
+
+def test_async_client_concurrent_reads(api_client):
+    async def read_markings():
+        async with AsyncOpenCTIApiClient(
+            api_client.api_url.replace("/graphql", ""),
+            api_client.api_token,
+            ssl_verify=api_client.ssl_verify,
+            max_workers=4,
+        ) as client:
+            markings = await client.marking_definition.list()
+            return markings, await asyncio.gather(
+                *[client.marking_definition.read(id=m["id"]) for m in markings]
+            )
+
+    markings, results = asyncio.run(read_markings())
+    assert [m["id"] for m in markings] == [r["id"] for r in results]